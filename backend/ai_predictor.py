@@ -4,76 +4,144 @@ import os
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from emergentintegrations.llm.chat import LlmChat, UserMessage
 from news_fetcher import NewsArticle
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway
+from prediction_models import CrimePrediction, TrendAnalysis, TrendState
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class CrimePrediction(BaseModel):
-    id: str = Field(default_factory=lambda: str(__import__('uuid').uuid4()))
-    prediction_text: str
-    confidence_level: str  # "low", "medium", "high"
-    crime_type: str
-    location_area: str
-    risk_factors: List[str] = []
-    preventive_measures: List[str] = []
-    valid_until: datetime
-    data_sources: List[str] = []
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands datetimes back naive
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
-class TrendAnalysis(BaseModel):
-    trend_type: str  # "increasing", "decreasing", "stable"
-    crime_categories: List[str]
-    time_period: str
-    key_insights: List[str]
-    statistical_summary: Dict[str, Any]
+TREND_SYSTEM_MESSAGE = "You are an expert crime analyst specializing in campus safety and crime trend analysis. Provide accurate, data-driven insights based on news articles."
+PREDICTION_SYSTEM_MESSAGE = "You are a campus safety expert who generates accurate, actionable crime predictions based on data analysis. Focus on practical campus safety measures."
 
 class AICrimePredictor:
-    def __init__(self, emergent_llm_key: str):
+    def __init__(
+        self,
+        emergent_llm_key: str,
+        cache: Optional[LLMResponseCache] = None,
+        trend_state: Optional[TrendState] = None,
+        gateway: Optional[LLMGateway] = None,
+        window_days: int = 7,
+        max_tracked_articles: int = 500
+    ):
         self.emergent_llm_key = emergent_llm_key
         self.session_id = f"crime_predictor_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.cache = cache
+        self.trend_state = trend_state or TrendState()
+        self.window_days = window_days
+        self.max_tracked_articles = max_tracked_articles
+        self.llm_errors = 0
+        self.gateway = gateway or LLMGateway(emergent_llm_key)
+
+    async def _complete_json(self, system_message: str, prompt: str) -> Any:
+        """Send a prompt expecting a JSON reply, serving repeats from the response cache.
+
+        Only responses that parse are cached; json.JSONDecodeError propagates to the caller.
+        """
+        model_key = self.gateway.model_key
+        response_text = None
+        if self.cache:
+            response_text = await self.cache.get(model_key, system_message, prompt)
+
+        from_cache = response_text is not None
+        if not from_cache:
+            response_text = await self.gateway.complete(
+                "predictor", system_message, prompt, session_id=self.session_id
+            )
+
+        # Parse LLM response
+        cleaned = response_text.strip()
+        if cleaned.startswith('```json'):
+            cleaned = cleaned.replace('```json', '').replace('```', '').strip()
+        data = json.loads(cleaned)
+
+        if self.cache and not from_cache:
+            await self.cache.set(model_key, system_message, prompt, response_text)
+        return data
         
+    @staticmethod
+    def _classify_article(article: NewsArticle) -> str:
+        """Simple crime type classification based on title keywords"""
+        title_lower = article.title.lower()
+        if any(word in title_lower for word in ["murder", "killing", "homicide", "shooting", "stabbing"]):
+            return "violent"
+        elif any(word in title_lower for word in ["theft", "robbery", "burglary", "stolen"]):
+            return "property"
+        elif any(word in title_lower for word in ["drug", "narcotics", "substance", "overdose"]):
+            return "drug"
+        elif any(word in title_lower for word in ["assault", "attack", "harassment"]):
+            return "assault"
+        return "general"
+
+    def _window_statistics(self, state: "TrendState", new_count: int) -> Dict[str, Any]:
+        """Statistical summary over every article in the rolling window"""
+        entries = state.articles
+        if not entries:
+            return {"total_articles": 0, "average_crime_score": 0.0}
+
+        scores = [entry["crime_score"] for entry in entries]
+        published = sorted(_as_utc(entry["published_at"]) for entry in entries)
+        category_counts: Dict[str, int] = {}
+        for entry in entries:
+            category_counts[entry["category"]] = category_counts.get(entry["category"], 0) + 1
+
+        return {
+            "total_articles": len(entries),
+            "new_articles": new_count,
+            "average_crime_score": round(sum(scores) / len(scores), 2),
+            "unique_sources": len(set(entry["source"] for entry in entries)),
+            "category_counts": category_counts,
+            "date_range": f"{published[0].strftime('%Y-%m-%d')} to {published[-1].strftime('%Y-%m-%d')}"
+        }
+
     async def analyze_crime_trends(self, articles: List[NewsArticle]) -> TrendAnalysis:
-        """Analyze crime trends from news articles using LLM"""
+        """Analyze crime trends from news articles using LLM.
+
+        Only articles missing from `self.trend_state` are sent to the LLM,
+        together with the previous summary and the window's category counts.
+        The state is updated in place when the analysis succeeds.
+        """
         
-        if not articles:
-            return TrendAnalysis(
-                trend_type="stable",
-                crime_categories=[],
-                time_period="past_week",
-                key_insights=["No significant crime data available for analysis"],
-                statistical_summary={"total_articles": 0, "average_crime_score": 0.0}
-            )
+        state = self.trend_state.copy(deep=True)
+        state.prune(self.window_days, self.max_tracked_articles)
         
-        # Prepare articles data for analysis
-        articles_summary = []
-        crime_scores = []
-        crime_types = set()
+        seen = state.urls()
+        new_articles = []
+        for article in articles:
+            if article.url not in seen and len(new_articles) < 20:
+                seen.add(article.url)
+                new_articles.append(article)
         
-        for article in articles[:20]:  # Limit to top 20 articles
-            crime_scores.append(article.crime_score or 0.0)
-            
-            # Extract crime type from analysis
-            if article.crime_analysis:
-                # Simple crime type classification based on keywords
-                title_lower = article.title.lower()
-                if any(word in title_lower for word in ["murder", "killing", "homicide", "shooting", "stabbing"]):
-                    crime_type = "violent"
-                elif any(word in title_lower for word in ["theft", "robbery", "burglary", "stolen"]):
-                    crime_type = "property"
-                elif any(word in title_lower for word in ["drug", "narcotics", "substance", "overdose"]):
-                    crime_type = "drug"
-                elif any(word in title_lower for word in ["assault", "attack", "harassment"]):
-                    crime_type = "assault"
-                else:
-                    crime_type = "general"
-                    
-                crime_types.add(crime_type)
-            
+        if not new_articles:
+            if not state.key_insights:
+                return TrendAnalysis(
+                    trend_type="stable",
+                    crime_categories=[],
+                    time_period="past_week",
+                    key_insights=["No significant crime data available for analysis"],
+                    statistical_summary={"total_articles": 0, "average_crime_score": 0.0}
+                )
+            # Nothing new since the last cycle; the previous analysis still holds
+            self.trend_state = state
+            return state.to_analysis(self._window_statistics(state, 0))
+        
+        # Merge new articles into the rolling window
+        articles_summary = []
+        for article in new_articles:
+            state.articles.append({
+                "url": article.url,
+                "category": self._classify_article(article),
+                "crime_score": article.crime_score or 0.0,
+                "published_at": article.published_at,
+                "source": article.source_name
+            })
             articles_summary.append({
                 "title": article.title[:100],  # Truncate for LLM input
                 "crime_score": article.crime_score,
@@ -81,24 +149,29 @@ class AICrimePredictor:
                 "source": article.source_name
             })
         
-        # Calculate statistical summary
-        avg_score = sum(crime_scores) / len(crime_scores) if crime_scores else 0.0
-        statistical_summary = {
-            "total_articles": len(articles),
-            "average_crime_score": round(avg_score, 2),
-            "unique_sources": len(set(article.source_name for article in articles)),
-            "date_range": f"{articles[-1].published_at.strftime('%Y-%m-%d')} to {articles[0].published_at.strftime('%Y-%m-%d')}"
-        }
+        statistical_summary = self._window_statistics(state, len(new_articles))
+        crime_types = list(statistical_summary["category_counts"].keys())
+        
+        if state.key_insights:
+            previous_analysis = f"""PREVIOUS ANALYSIS (covers {statistical_summary['total_articles'] - len(new_articles)} earlier articles):
+        - Trend direction: {state.trend_type}
+        - Crime categories: {', '.join(state.crime_categories)}
+        - Key insights: {'; '.join(state.key_insights)}"""
+        else:
+            previous_analysis = "PREVIOUS ANALYSIS: none, this is the first analysis of the window."
         
         # Create LLM prompt for trend analysis
         prompt = f"""
-        Analyze the following crime-related news articles and provide a comprehensive trend analysis for campus safety.
+        Update the campus safety crime trend analysis with newly published crime-related news articles.
+
+        {previous_analysis}
 
-        ARTICLES DATA:
+        NEW ARTICLES DATA:
         {json.dumps(articles_summary, indent=2)}
 
-        STATISTICAL SUMMARY:
+        STATISTICAL SUMMARY (whole window, including new articles):
         - Total articles analyzed: {statistical_summary['total_articles']}
+        - Articles per category: {json.dumps(statistical_summary['category_counts'])}
         - Average crime severity score: {statistical_summary['average_crime_score']}/10
         - Date range: {statistical_summary['date_range']}
         - Unique news sources: {statistical_summary['unique_sources']}
@@ -123,55 +196,54 @@ class AICrimePredictor:
         """
         
         try:
-            chat = LlmChat(
-                api_key=self.emergent_llm_key,
-                session_id=self.session_id,
-                system_message="You are an expert crime analyst specializing in campus safety and crime trend analysis. Provide accurate, data-driven insights based on news articles."
-            ).with_model("openai", "gpt-4o-mini")
+            analysis_data = await self._complete_json(TREND_SYSTEM_MESSAGE, prompt)
             
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            state.trend_type = analysis_data.get("trend_type", "stable")
+            state.crime_categories = analysis_data.get("crime_categories", crime_types)
+            state.key_insights = analysis_data.get("key_insights", ["Analysis completed successfully"])
+            state.updated_at = datetime.now(timezone.utc)
+            self.trend_state = state
             
-            # Parse LLM response
-            response_text = response.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            
-            analysis_data = json.loads(response_text)
-            
-            return TrendAnalysis(
-                trend_type=analysis_data.get("trend_type", "stable"),
-                crime_categories=analysis_data.get("crime_categories", list(crime_types)),
-                time_period=analysis_data.get("time_period", "past_week"),
-                key_insights=analysis_data.get("key_insights", ["Analysis completed successfully"]),
-                statistical_summary=statistical_summary
-            )
+            return state.to_analysis(statistical_summary, analysis_data.get("time_period", "past_week"))
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response: {e}")
+            self.llm_errors += 1
             return TrendAnalysis(
-                trend_type="stable",
-                crime_categories=list(crime_types),
+                trend_type=state.trend_type,
+                crime_categories=crime_types,
                 time_period="past_week",
                 key_insights=["Analysis completed with limited insights due to parsing error"],
                 statistical_summary=statistical_summary
             )
         except Exception as e:
             logger.error(f"Error in trend analysis: {str(e)}")
+            self.llm_errors += 1
             return TrendAnalysis(
-                trend_type="stable",
-                crime_categories=list(crime_types),
+                trend_type=state.trend_type,
+                crime_categories=crime_types,
                 time_period="past_week",
                 key_insights=[f"Analysis completed with basic insights due to error: {str(e)[:100]}"],
                 statistical_summary=statistical_summary
             )
 
-    async def generate_predictions(self, articles: List[NewsArticle], trend_analysis: TrendAnalysis) -> List[CrimePrediction]:
-        """Generate crime predictions based on articles and trend analysis"""
+    async def generate_predictions(
+        self,
+        articles: List[NewsArticle],
+        trend_analysis: TrendAnalysis,
+        baseline: Optional[List[CrimePrediction]] = None
+    ) -> List[CrimePrediction]:
+        """Generate crime predictions based on articles and trend analysis.
+
+        `baseline` holds predictions from the local statistical model; they are
+        returned instead of the canned fallback when the LLM is unavailable.
+        """
         
         predictions = []
         
         if not articles:
+            if baseline:
+                return baseline[:3]
             # Return a default prediction if no articles
             return [CrimePrediction(
                 prediction_text="No significant crime trends detected for campus area",
@@ -230,21 +302,7 @@ class AICrimePredictor:
         """
         
         try:
-            chat = LlmChat(
-                api_key=self.emergent_llm_key,
-                session_id=self.session_id,
-                system_message="You are a campus safety expert who generates accurate, actionable crime predictions based on data analysis. Focus on practical campus safety measures."
-            ).with_model("openai", "gpt-4o-mini")
-            
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
-            
-            # Parse LLM response
-            response_text = response.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            
-            predictions_data = json.loads(response_text)
+            predictions_data = await self._complete_json(PREDICTION_SYSTEM_MESSAGE, prompt)
             
             # Create prediction objects
             for pred_data in predictions_data:
@@ -263,11 +321,13 @@ class AICrimePredictor:
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse prediction response: {e}")
+            self.llm_errors += 1
             # Fallback predictions
-            predictions = self._generate_fallback_predictions(trend_analysis, articles)
+            predictions = baseline or self._generate_fallback_predictions(trend_analysis, articles)
         except Exception as e:
             logger.error(f"Error generating predictions: {str(e)}")
-            predictions = self._generate_fallback_predictions(trend_analysis, articles)
+            self.llm_errors += 1
+            predictions = baseline or self._generate_fallback_predictions(trend_analysis, articles)
         
         return predictions[:3]  # Ensure max 3 predictions
 
@@ -322,7 +382,8 @@ class AICrimePredictor:
         
         return fallback_predictions
 
-    async def generate_safety_tips(self, predictions: List[CrimePrediction]) -> List[str]:
+    @staticmethod
+    async def generate_safety_tips(predictions: List[CrimePrediction]) -> List[str]:
         """Generate general safety tips based on predictions"""
         
         if not predictions:
@@ -0,0 +1,231 @@
+"""Vectorized batch scoring of news articles for crime relevance.
+
+Produces exactly the scores of `CrimeContentFilter.calculate_crime_score`,
+which adds a keyword's weight whenever it occurs as a substring of the
+lowercased text (a keyword listed twice counts twice).
+
+The texts of a whole batch (combined text, title, description and content
+of every article) are joined into one buffer with NUL separators. Each
+distinct keyword is then searched across the buffer with `str.find`,
+jumping to the next text after every hit. Python-level work therefore
+grows with the number of (keyword, text) hits rather than with
+keywords x texts. The hits fill an indicator matrix with one column per
+distinct keyword (weights of repeated keywords summed), and a single
+matrix product with the weight vector scores the whole batch.
+
+Large batches are split into chunks and scored in a process pool, so the
+event loop stays free. Run `python batch_scoring.py` for a throughput
+benchmark at 1, 4 and 8 workers.
+"""
+import asyncio
+import bisect
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from news_fetcher import CrimeContentFilter
+
+MAX_SCORE = 10.0
+
+# (title, description, content) as passed to CrimeContentFilter.is_crime_related
+ArticleText = Tuple[str, str, str]
+
+
+class KeywordMatrixScorer:
+    """Scores many texts at once with a keyword indicator matrix"""
+
+    def __init__(self, crime_filter: Optional[CrimeContentFilter] = None):
+        crime_filter = crime_filter or CrimeContentFilter()
+
+        weights: Dict[str, float] = {}
+        for data in crime_filter.crime_keywords.values():
+            for keyword in data["keywords"]:
+                weights[keyword] = weights.get(keyword, 0.0) + data["weight"]
+        for keyword in crime_filter.legal_keywords:
+            weights[keyword] = weights.get(keyword, 0.0) + 0.5
+
+        self.vocabulary = list(weights)
+        self.weights = np.array([weights[keyword] for keyword in self.vocabulary])
+
+    def indicator_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """(texts, keywords) matrix, True where the keyword occurs in the lowercased text"""
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=bool)
+        if not texts:
+            return matrix
+
+        lowered = [(text or "").lower() for text in texts]
+        buffer = "\x00".join(lowered)
+        # starts[i] is the buffer offset of text i; the sentinel ends the last one
+        starts = list(itertools.accumulate((len(text) + 1 for text in lowered), initial=0))
+        rows: List[int] = []
+        columns: List[int] = []
+        for column, keyword in enumerate(self.vocabulary):
+            find = buffer.find
+            position = find(keyword)
+            while position != -1:
+                row = bisect.bisect_right(starts, position) - 1
+                rows.append(row)
+                columns.append(column)
+                position = find(keyword, starts[row + 1])
+        matrix[rows, columns] = True
+        return matrix
+
+    def scores(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0)
+        return np.minimum(self.indicator_matrix(texts) @ self.weights, MAX_SCORE)
+
+    def article_matrix(self, articles: Sequence[ArticleText]) -> np.ndarray:
+        """(articles, 4, keywords) presence in the combined text, title, description and content"""
+        texts = []
+        for title, description, content in articles:
+            texts.extend((f"{title} {description} {content}", title, description, content))
+        return self.indicator_matrix(texts).reshape(len(articles), 4, len(self.vocabulary))
+
+    def analyze(
+        self,
+        articles: Sequence[ArticleText],
+        threshold: float = 2.0,
+        crime_filter: Optional[CrimeContentFilter] = None
+    ) -> List[dict]:
+        """Analyses matching `is_crime_related`, plus locations when `crime_filter` is given"""
+        scores = np.minimum(self.article_matrix(articles) @ self.weights, MAX_SCORE)
+
+        analyses = []
+        for (title, description, content), (total, title_score, description_score, content_score) in zip(articles, scores):
+            total = float(total)
+            analysis = {
+                "title_score": float(title_score),
+                "description_score": float(description_score),
+                "content_score": float(content_score) if content else 0.0,
+                "total_score": total,
+                "is_crime_related": total >= threshold,
+                "confidence_level": min(total / 5.0, 1.0)
+            }
+            if crime_filter:
+                analysis.update(crime_filter.location_analysis(f"{title} {description}"))
+            analyses.append(analysis)
+        return analyses
+
+
+# Built once per worker process
+_worker_scorer: Optional[KeywordMatrixScorer] = None
+_worker_filter: Optional[CrimeContentFilter] = None
+
+
+def _analyze_chunk(articles: List[ArticleText], threshold: float, with_locations: bool) -> List[dict]:
+    global _worker_scorer, _worker_filter
+    if _worker_scorer is None:
+        _worker_filter = CrimeContentFilter()
+        _worker_scorer = KeywordMatrixScorer(_worker_filter)
+    return _worker_scorer.analyze(articles, threshold, _worker_filter if with_locations else None)
+
+
+class BatchScorer:
+    """Batch scoring API, parallel over a process pool for large batches.
+
+    Batches smaller than `parallel_threshold` (or any batch with one worker)
+    are scored in the calling process. Results are always in input order.
+    """
+
+    def __init__(self, workers: Optional[int] = None, parallel_threshold: int = 500, chunks_per_worker: int = 4):
+        self.workers = workers or int(os.environ.get("SCORING_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.parallel_threshold = parallel_threshold
+        self.chunks_per_worker = chunks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process with a running event loop and driver threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _chunks(self, articles: List[ArticleText]) -> List[List[ArticleText]]:
+        size = math.ceil(len(articles) / (self.workers * self.chunks_per_worker))
+        return [articles[i:i + size] for i in range(0, len(articles), size)]
+
+    def _parallel(self, articles: List[ArticleText]) -> bool:
+        return self.workers > 1 and len(articles) >= self.parallel_threshold
+
+    def analyze(self, articles: Iterable[ArticleText], threshold: float = 2.0, with_locations: bool = True) -> List[dict]:
+        articles = list(articles)
+        if not self._parallel(articles):
+            return _analyze_chunk(articles, threshold, with_locations)
+        chunks = self._chunks(articles)
+        results = self._pool().map(_analyze_chunk, chunks, [threshold] * len(chunks), [with_locations] * len(chunks))
+        return [analysis for chunk in results for analysis in chunk]
+
+    async def analyze_async(
+        self,
+        articles: Iterable[ArticleText],
+        threshold: float = 2.0,
+        with_locations: bool = True
+    ) -> List[dict]:
+        """Score without blocking the event loop: worker processes for large batches, a thread otherwise"""
+        articles = list(articles)
+        loop = asyncio.get_running_loop()
+        if not self._parallel(articles):
+            return await loop.run_in_executor(None, _analyze_chunk, articles, threshold, with_locations)
+        futures = [
+            loop.run_in_executor(self._pool(), _analyze_chunk, chunk, threshold, with_locations)
+            for chunk in self._chunks(articles)
+        ]
+        return [analysis for chunk in await asyncio.gather(*futures) for analysis in chunk]
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def synthetic_articles(count: int, seed: int = 7) -> List[ArticleText]:
+    """Deterministic article texts, about 5% of words crime keywords"""
+    rng = random.Random(seed)
+    crime_filter = CrimeContentFilter()
+    keywords = [k for data in crime_filter.crime_keywords.values() for k in data["keywords"]] + crime_filter.legal_keywords
+    filler = ["students", "campus", "city", "report", "local", "officials", "week", "residents", "near", "Chennai University"]
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(keywords) if rng.random() < 0.05 else rng.choice(filler) for _ in range(words))
+
+    # NewsAPI truncates `content` to about 200 characters
+    return [(sentence(10).capitalize(), sentence(30), sentence(35)) for _ in range(count)]
+
+
+def benchmark(count: int = 4000, worker_counts: Sequence[int] = (1, 4, 8)) -> List[dict]:
+    """Articles per second through BatchScorer at each worker count, versus the per-article filter"""
+    articles = synthetic_articles(count)
+    crime_filter = CrimeContentFilter()
+
+    started = time.perf_counter()
+    for title, description, content in articles:
+        crime_filter.is_crime_related(title, description, content)
+        crime_filter.extract_location_info(f"{title} {description}")
+    baseline = time.perf_counter() - started
+    report = [{"mode": "per-article filter", "articles_per_second": round(count / baseline)}]
+
+    for workers in worker_counts:
+        scorer = BatchScorer(workers=workers, parallel_threshold=1)
+        scorer.analyze(articles[:workers * 10])  # start the pool outside the timing
+        started = time.perf_counter()
+        scorer.analyze(articles)
+        elapsed = time.perf_counter() - started
+        scorer.close()
+        report.append({
+            "mode": f"batch, {workers} worker{'s' if workers > 1 else ''}",
+            "articles_per_second": round(count / elapsed),
+            "speedup": round(baseline / elapsed, 2),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(row)
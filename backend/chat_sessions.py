@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ChatTurn(BaseModel):
+    message: str
+    intent: str
+    reply: str = ""
+    at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ChatSession(BaseModel):
+    """Server-side chatbot conversation: recent turns verbatim, older ones summarized"""
+    session_id: str
+    language: Optional[str] = None
+    summary: str = ""
+    turns: List[ChatTurn] = []
+    interaction_count: int = 0
+    intent_counts: Dict[str, int] = {}
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def add_turn(self, message: str, intent: str, reply: str, max_chars: int):
+        self.turns.append(ChatTurn(message=message[:max_chars], intent=intent, reply=reply[:max_chars]))
+        self.interaction_count += 1
+        self.intent_counts[intent] = self.intent_counts.get(intent, 0) + 1
+        self.updated_at = datetime.now(timezone.utc)
+
+    def compact(self, max_turns: int, keep_turns: int, summary_chars: int):
+        """Fold all but the last `keep_turns` turns into the summary once over `max_turns`"""
+        if len(self.turns) <= max_turns:
+            return
+
+        older, self.turns = self.turns[:-keep_turns], self.turns[-keep_turns:]
+        notes = [f"asked about {turn.intent.replace('_', ' ')} (\"{turn.message[:60]}\")" for turn in older]
+        summary = "; ".join(filter(None, [self.summary] + notes))
+        # Drop the oldest notes when the summary outgrows its budget
+        while len(summary) > summary_chars and "; " in summary:
+            summary = summary.split("; ", 1)[1]
+        self.summary = summary[:summary_chars]
+
+    def prompt_context(self) -> str:
+        lines = []
+        if self.summary:
+            lines.append(f"Earlier in this conversation the user {self.summary}")
+        for turn in self.turns:
+            lines.append(f"User ({turn.intent}): {turn.message}")
+            if turn.reply:
+                lines.append(f"Voice: {turn.reply}")
+        return "\n".join(lines) if lines else "This is the start of the conversation."
+
+
+class ChatSessionStore:
+    """Sessions kept in an in-memory LRU with TTL.
+
+    With a Mongo collection, sessions pushed out of memory by the LRU are
+    spilled there (expiring via a TTL index) and reloaded on the next turn.
+    """
+
+    def __init__(
+        self,
+        collection=None,
+        memory_size: int = 5000,
+        ttl: timedelta = timedelta(hours=2),
+        max_turns: int = 6,
+        keep_turns: int = 4,
+        summary_chars: int = 400,
+        turn_chars: int = 300
+    ):
+        self.collection = collection
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.keep_turns = keep_turns
+        self.summary_chars = summary_chars
+        self.turn_chars = turn_chars
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl.total_seconds(), on_evict=self._spill)
+        self._pending: set = set()
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def _spill(self, session_id: str, session: ChatSession):
+        if self.collection is None:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._write(session))
+        except RuntimeError:
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _write(self, session: ChatSession):
+        doc = session.dict()
+        doc["_id"] = session.session_id
+        doc["expires_at"] = session.updated_at + self.ttl
+        try:
+            await self.collection.replace_one({"_id": session.session_id}, doc, upsert=True)
+        except Exception as e:
+            logger.warning(f"Failed to spill chat session {session.session_id}: {str(e)}")
+
+    async def get(self, session_id: str) -> ChatSession:
+        session = self.memory.get(session_id)
+        if session is not None:
+            return session
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one(
+                    {"_id": session_id, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+                    {"_id": 0, "expires_at": 0}
+                )
+                if doc:
+                    session = ChatSession(**doc)
+            except Exception as e:
+                logger.warning(f"Failed to load chat session {session_id}: {str(e)}")
+
+        session = session or ChatSession(session_id=session_id)
+        self.memory.set(session_id, session)
+        return session
+
+    def record_turn(self, session: ChatSession, message: str, intent: str, reply: str):
+        session.add_turn(message, intent, reply, self.turn_chars)
+        session.compact(self.max_turns, self.keep_turns, self.summary_chars)
+        self.memory.set(session.session_id, session)
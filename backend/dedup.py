@@ -0,0 +1,95 @@
+"""Near-duplicate detection for news articles with 64-bit SimHash.
+
+The same story syndicated across outlets usually differs only in a
+headline suffix, a few edited words or punctuation. Such articles get
+SimHash fingerprints within a small Hamming distance of each other.
+
+The index splits each fingerprint into `max_distance + 1` bands. By the
+pigeonhole principle, two fingerprints within `max_distance` bits agree
+exactly on at least one band, so a lookup only compares against articles
+sharing a band value: O(1) expected per article instead of a scan.
+"""
+import hashlib
+import re
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+_BIT_POSITIONS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "by", "with", "from",
+    "is", "are", "was", "were", "be", "been", "has", "have", "had", "as", "it", "its", "this",
+    "that", "after", "over", "into", "says", "said",
+}
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over the words and word bigrams of a text"""
+    words = [word for word in _TOKEN.findall(text.lower()) if word not in STOPWORDS]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+
+    # Each bit of the fingerprint is the majority vote of that bit over all feature hashes
+    hashes = np.fromiter((_feature_hash(f) for f in features), dtype=np.uint64, count=len(features))
+    ones = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).sum(axis=0)
+    majority = (2 * ones > len(features)).astype(np.uint64)
+    return int((majority << _BIT_POSITIONS).sum())
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+# Outlet names appended to syndicated headlines: "... - The Hindu", "... | NDTV"
+_HEADLINE_SUFFIX = re.compile(r"\s+[-|\u2013\u2014]\s+[^-|\u2013\u2014]{1,40}$")
+
+
+def article_text(title: Optional[str], description: Optional[str]) -> str:
+    """Text fingerprinted for an article, without the outlet suffix of its headline"""
+    return f"{_HEADLINE_SUFFIX.sub('', title or '')} {description or ''}"
+
+
+class NearDuplicateIndex:
+    """Banded SimHash index returning the first-seen article a new one duplicates"""
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self._mask = (1 << self.band_bits) - 1
+        self._tables: List[Dict[int, List[Tuple[int, Hashable]]]] = [{} for _ in range(self.bands)]
+        self.size = 0
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> (i * self.band_bits)) & self._mask for i in range(self.bands)]
+
+    def find(self, fingerprint: int) -> Optional[Hashable]:
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            for candidate, key in table.get(value, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, key: Hashable, fingerprint: int):
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            table.setdefault(value, []).append((fingerprint, key))
+        self.size += 1
+
+    def check_and_add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Key of an indexed near-duplicate of `text`, or None after indexing it under `key`"""
+        fingerprint = simhash(text)
+        if fingerprint == 0:
+            return None
+        duplicate_of = self.find(fingerprint)
+        if duplicate_of is None:
+            self.add(key, fingerprint)
+        return duplicate_of
@@ -0,0 +1,296 @@
+"""Geocoding proxy with a two-tier cache.
+
+Reverse lookups are keyed by coordinates quantized to `COORDINATE_DECIMALS`
+decimal places (0.0001 deg, about 11 m north-south and 11 m east-west at the
+campus latitude), so every position inside one bucket shares a cache entry.
+The provider is always asked about the bucket centre, so the cached answer
+does not depend on which position in the bucket asked first.
+
+Searches are keyed by the normalized query text. Queries naming a gazetteer
+place exactly ("Paari hostel", "SRM Tech Park") are answered from the
+gazetteer without a lookup.
+
+Results live in an in-memory LRU in front of the `geocode_cache` Mongo
+collection (expired by a TTL index on `expires_at`). Concurrent lookups of
+the same key share one provider call.
+"""
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+from pydantic import BaseModel
+
+from location_extractor import LocationExtractor, Place, location_extractor
+from resilience import dependency
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+COORDINATE_DECIMALS = 4
+
+# Search results are biased towards SRM KTR
+CAMPUS_CENTER = (12.8231, 80.0442)
+
+mapbox_dependency = dependency("mapbox", failure_threshold=3, recovery_timeout=60.0, max_concurrent=8, max_wait=2.0)
+
+
+class GeocodeResult(BaseModel):
+    place_name: str
+    latitude: float
+    longitude: float
+    source: str
+    place_id: Optional[str] = None
+
+
+def quantize(latitude: float, longitude: float, decimals: int = COORDINATE_DECIMALS) -> Tuple[float, float]:
+    return round(latitude, decimals), round(longitude, decimals)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def distance_meters(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (lat, lng) points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+
+class GeocodingProvider:
+    """Upstream geocoder interface"""
+
+    name = "provider"
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[GeocodeResult]:
+        raise NotImplementedError
+
+    async def search(self, query: str, limit: int = 5) -> List[GeocodeResult]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MapboxGeocoder(GeocodingProvider):
+    """Mapbox Geocoding v5 (mapbox.places), guarded by the `mapbox` circuit breaker"""
+
+    name = "mapbox"
+    base_url = "https://api.mapbox.com/geocoding/v5/mapbox.places"
+
+    def __init__(self, token: str, session: Optional[httpx.AsyncClient] = None):
+        self.token = token
+        self.session = session or httpx.AsyncClient(timeout=httpx.Timeout(5.0, connect=2.0))
+
+    async def _features(self, path: str, params: Dict[str, str]) -> List[dict]:
+        async with mapbox_dependency.guard():
+            response = await self.session.get(
+                f"{self.base_url}/{path}.json",
+                params={"access_token": self.token, "types": "address,poi", **params}
+            )
+            response.raise_for_status()
+            return response.json().get("features", [])
+
+    def _result(self, feature: dict) -> GeocodeResult:
+        longitude, latitude = feature["center"]
+        return GeocodeResult(place_name=feature["place_name"], latitude=latitude, longitude=longitude, source=self.name)
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[GeocodeResult]:
+        features = await self._features(f"{longitude},{latitude}", {"limit": "1"})
+        return self._result(features[0]) if features else None
+
+    async def search(self, query: str, limit: int = 5) -> List[GeocodeResult]:
+        features = await self._features(
+            quote(query, safe=""),
+            {"limit": str(limit), "proximity": f"{CAMPUS_CENTER[1]},{CAMPUS_CENTER[0]}"}
+        )
+        return [self._result(feature) for feature in features]
+
+    async def close(self):
+        await self.session.aclose()
+
+
+class GazetteerGeocoder(GeocodingProvider):
+    """Offline geocoder over the campus gazetteer, for tests and deployments without a Mapbox token"""
+
+    name = "gazetteer"
+
+    def __init__(self, extractor: LocationExtractor = location_extractor, radius_meters: float = 150.0):
+        self.extractor = extractor
+        self.radius_meters = radius_meters
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[GeocodeResult]:
+        nearest = min(
+            self.extractor.places.values(),
+            key=lambda place: distance_meters((latitude, longitude), (place.latitude, place.longitude)),
+            default=None
+        )
+        if nearest is None or distance_meters((latitude, longitude), (nearest.latitude, nearest.longitude)) > self.radius_meters:
+            return None
+        return place_result(nearest, self.name)
+
+    async def search(self, query: str, limit: int = 5) -> List[GeocodeResult]:
+        return [place_result(place, self.name) for place in self.extractor.places_in(query)[:limit]]
+
+
+def place_result(place: Place, source: str = "gazetteer") -> GeocodeResult:
+    return GeocodeResult(
+        place_name=place.name,
+        latitude=place.latitude,
+        longitude=place.longitude,
+        source=source,
+        place_id=place.place_id
+    )
+
+
+class GeocodingService:
+    """Cached reverse geocoding and address search in front of a provider.
+
+    Empty answers are cached for `negative_ttl` only, so places the provider
+    learns about later show up. Provider errors are not cached.
+    """
+
+    def __init__(
+        self,
+        provider: GeocodingProvider,
+        collection=None,
+        ttl: timedelta = timedelta(days=30),
+        negative_ttl: timedelta = timedelta(hours=1),
+        memory_size: int = 10000,
+        extractor: LocationExtractor = location_extractor
+    ):
+        self.provider = provider
+        self.collection = collection
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl.total_seconds())
+        self.extractor = extractor
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counts = {"gazetteer_hits": 0, "mongo_hits": 0, "provider_calls": 0, "coalesced": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls, collection=None) -> "GeocodingService":
+        """Mapbox when MAPBOX_TOKEN is set (unless GEOCODER=gazetteer), the offline gazetteer otherwise"""
+        token = os.environ.get("MAPBOX_TOKEN")
+        name = os.environ.get("GEOCODER", "mapbox" if token else "gazetteer").lower()
+        if name == "mapbox" and token:
+            provider: GeocodingProvider = MapboxGeocoder(token)
+        else:
+            if name == "mapbox":
+                logger.warning("GEOCODER=mapbox but MAPBOX_TOKEN is not set; using the gazetteer geocoder")
+            provider = GazetteerGeocoder()
+        return cls(
+            provider,
+            collection=collection,
+            ttl=timedelta(days=float(os.environ.get("GEOCODE_CACHE_TTL_DAYS", "30")))
+        )
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[GeocodeResult]:
+        latitude, longitude = quantize(latitude, longitude)
+        key = f"reverse:{latitude:.{COORDINATE_DECIMALS}f},{longitude:.{COORDINATE_DECIMALS}f}"
+
+        async def fetch() -> List[GeocodeResult]:
+            result = await self.provider.reverse(latitude, longitude)
+            return [result] if result else []
+
+        results = await self._cached(key, fetch)
+        return results[0] if results else None
+
+    async def search(self, query: str, limit: int = 5) -> List[GeocodeResult]:
+        query = normalize_query(query)
+        if not query:
+            return []
+
+        place = self.extractor.lookup(query)
+        if place:
+            self.counts["gazetteer_hits"] += 1
+            return [place_result(place)]
+
+        results = await self._cached(f"search:{limit}:{query}", lambda: self.provider.search(query, limit))
+        return results[:limit]
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[List[GeocodeResult]]]) -> List[GeocodeResult]:
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.counts["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            results = await self._load(key, fetch)
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[List[GeocodeResult]]]) -> List[GeocodeResult]:
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+            except Exception as e:
+                logger.warning(f"Geocode cache lookup failed: {str(e)}")
+                doc = None
+            if doc:
+                self.counts["mongo_hits"] += 1
+                results = [GeocodeResult(**result) for result in doc["results"]]
+                if results:
+                    self.memory.set(key, results)
+                return results
+
+        self.counts["provider_calls"] += 1
+        try:
+            results = await fetch()
+        except Exception:
+            self.counts["errors"] += 1
+            raise
+
+        if results:
+            self.memory.set(key, results)
+        await self._store(key, results)
+        return results
+
+    async def _store(self, key: str, results: List[GeocodeResult]):
+        if self.collection is None:
+            return
+        now = datetime.now(timezone.utc)
+        expires_at = now + (self.ttl if results else self.negative_ttl)
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "results": [result.dict() for result in results],
+                    "provider": self.provider.name,
+                    "created_at": now,
+                    "expires_at": expires_at
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {"provider": self.provider.name, "memory": self.memory.stats(), **self.counts}
+
+    async def close(self):
+        await self.provider.close()
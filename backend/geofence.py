@@ -0,0 +1,214 @@
+"""Campus zones and a grid-accelerated point-in-polygon classifier.
+
+Zones are polygons (campus boundary, hostels, academic blocks, parking,
+...), configurable as a GeoJSON FeatureCollection via GEOFENCE_ZONES_FILE.
+
+`ZoneIndex` rasterizes the zones' bounding box into square cells once at
+startup. Each cell records the zones that contain it entirely and the zones
+whose boundary crosses it. Classifying a point is then an array lookup, plus
+an exact ray-casting test only against the boundary zones of its cell; most
+points need no polygon test at all.
+
+Default polygons are approximate (tens of metres) outlines around the
+gazetteer coordinates in location_extractor.
+"""
+import json
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# (longitude, latitude), GeoJSON order
+Point = Tuple[float, float]
+
+
+class Zone(BaseModel):
+    zone_id: str
+    name: str
+    kind: str  # campus, hostel, academic, parking, medical
+    polygon: List[Point]
+
+    @property
+    def area(self) -> float:
+        """Shoelace area in square degrees; only used to rank zones by size"""
+        points = self.polygon
+        return abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]))) / 2
+
+
+class ZoneMatch(BaseModel):
+    """Zones containing a point, most specific (smallest) first"""
+    zone_id: Optional[str] = None
+    zone_ids: List[str] = []
+    on_campus: bool = False
+
+
+def _box(zone_id: str, name: str, kind: str, south: float, west: float, north: float, east: float) -> Zone:
+    return Zone(
+        zone_id=zone_id, name=name, kind=kind,
+        polygon=[(west, south), (east, south), (east, north), (west, north)]
+    )
+
+
+DEFAULT_ZONES = [
+    Zone(zone_id="srm-ktr", name="SRM KTR Campus", kind="campus", polygon=[
+        (80.0388, 12.8182), (80.0470, 12.8176), (80.0503, 12.8200), (80.0500, 12.8272),
+        (80.0440, 12.8278), (80.0392, 12.8262), (80.0383, 12.8225),
+    ]),
+    _box("boys-hostels", "Boys Hostels", "hostel", 12.8234, 80.0458, 12.8266, 80.0496),
+    _box("girls-hostels", "Girls Hostels", "hostel", 12.8189, 80.0447, 12.8205, 80.0469),
+    _box("tech-park", "SRM Tech Park", "academic", 12.8240, 80.0444, 12.8252, 80.0458),
+    _box("university-building", "University Building", "academic", 12.8226, 80.0418, 12.8238, 80.0432),
+    _box("academic-blocks", "Academic Blocks", "academic", 12.8206, 80.0430, 12.8234, 80.0452),
+    _box("srm-hospital", "SRM Medical College Hospital", "medical", 12.8196, 80.0476, 12.8212, 80.0498),
+    _box("main-gate-parking", "Main Gate Parking", "parking", 12.8212, 80.0398, 12.8224, 80.0412),
+    _box("tech-park-parking", "Tech Park Parking", "parking", 12.8252, 80.0436, 12.8260, 80.0450),
+]
+
+
+def point_in_polygon(x: float, y: float, polygon: Sequence[Point]) -> bool:
+    """Even-odd ray casting"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _segment_hits_box(a: Point, b: Point, x0: float, y0: float, x1: float, y1: float) -> bool:
+    """Liang-Barsky: does segment ab intersect the closed box [x0, x1] x [y0, y1]?"""
+    t0, t1 = 0.0, 1.0
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    for p, q in ((-dx, a[0] - x0), (dx, x1 - a[0]), (-dy, a[1] - y0), (dy, y1 - a[1])):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return False
+    return True
+
+
+class ZoneIndex:
+    """Point -> zones classifier over a precomputed grid of `cell_size` degree cells"""
+
+    def __init__(self, zones: Sequence[Zone], cell_size: float = 0.0002):
+        # Smallest first, so the first containing zone is the most specific
+        self.zones = sorted(zones, key=lambda zone: zone.area)
+        self.by_id: Dict[str, Zone] = {zone.zone_id: zone for zone in self.zones}
+        self.cell_size = cell_size
+
+        points = [point for zone in self.zones for point in zone.polygon]
+        self.west = min((x for x, _ in points), default=0.0)
+        self.south = min((y for _, y in points), default=0.0)
+        self.cols = max(1, math.ceil((max((x for x, _ in points), default=0.0) - self.west) / cell_size))
+        self.rows = max(1, math.ceil((max((y for _, y in points), default=0.0) - self.south) / cell_size))
+
+        # Cell value -> (zones containing the whole cell, zones crossing it), both
+        # as indexes into self.zones; value 0 is "no zone"
+        self.cells: List[Tuple[Tuple[int, ...], Tuple[int, ...]]] = [((), ())]
+        self.grid = np.zeros((self.rows, self.cols), dtype=np.int32)
+        self._rasterize()
+
+    def _cell_box(self, row: int, col: int) -> Tuple[float, float, float, float]:
+        x0 = self.west + col * self.cell_size
+        y0 = self.south + row * self.cell_size
+        return x0, y0, x0 + self.cell_size, y0 + self.cell_size
+
+    def _cell_range(self, low: float, high: float, origin: float, limit: int) -> range:
+        start = max(0, int((low - origin) // self.cell_size))
+        return range(start, min(limit, int((high - origin) // self.cell_size) + 1))
+
+    def _rasterize(self):
+        inside: Dict[Tuple[int, int], List[int]] = {}
+        crossing: Dict[Tuple[int, int], List[int]] = {}
+        for index, zone in enumerate(self.zones):
+            polygon = zone.polygon
+            edges = list(zip(polygon, polygon[1:] + polygon[:1]))
+            xs = [x for x, _ in polygon]
+            ys = [y for _, y in polygon]
+            for row in self._cell_range(min(ys), max(ys), self.south, self.rows):
+                for col in self._cell_range(min(xs), max(xs), self.west, self.cols):
+                    x0, y0, x1, y1 = self._cell_box(row, col)
+                    if any(_segment_hits_box(a, b, x0, y0, x1, y1) for a, b in edges):
+                        crossing.setdefault((row, col), []).append(index)
+                    elif point_in_polygon((x0 + x1) / 2, (y0 + y1) / 2, polygon):
+                        inside.setdefault((row, col), []).append(index)
+
+        signatures: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], int] = {((), ()): 0}
+        for cell in set(inside) | set(crossing):
+            signature = (tuple(inside.get(cell, ())), tuple(crossing.get(cell, ())))
+            if signature not in signatures:
+                signatures[signature] = len(self.cells)
+                self.cells.append(signature)
+            self.grid[cell] = signatures[signature]
+
+    def zones_at(self, latitude: float, longitude: float) -> List[Zone]:
+        """Zones containing the point, most specific first"""
+        row = math.floor((latitude - self.south) / self.cell_size)
+        col = math.floor((longitude - self.west) / self.cell_size)
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return []
+
+        inside, crossing = self.cells[self.grid[row, col]]
+        hits = list(inside)
+        hits.extend(i for i in crossing if point_in_polygon(longitude, latitude, self.zones[i].polygon))
+        return [self.zones[i] for i in sorted(hits)]
+
+    def classify(self, latitude: float, longitude: float) -> ZoneMatch:
+        zones = self.zones_at(latitude, longitude)
+        return ZoneMatch(
+            zone_id=zones[0].zone_id if zones else None,
+            zone_ids=[zone.zone_id for zone in zones],
+            on_campus=any(zone.kind == "campus" for zone in zones)
+        )
+
+    def name_of(self, zone_id: Optional[str]) -> Optional[str]:
+        zone = self.by_id.get(zone_id) if zone_id else None
+        return zone.name if zone else None
+
+
+def load_zones(path: str) -> List[Zone]:
+    """Zones from a GeoJSON FeatureCollection of Polygons with zone_id, name and kind properties"""
+    with open(path) as f:
+        collection = json.load(f)
+    zones = []
+    for feature in collection.get("features", []):
+        properties = feature.get("properties", {})
+        # Outer ring only; GeoJSON rings repeat the first point at the end
+        ring = [tuple(point[:2]) for point in feature["geometry"]["coordinates"][0]]
+        if len(ring) > 1 and ring[0] == ring[-1]:
+            ring = ring[:-1]
+        zones.append(Zone(
+            zone_id=properties["zone_id"],
+            name=properties.get("name", properties["zone_id"]),
+            kind=properties.get("kind", "campus"),
+            polygon=ring
+        ))
+    return zones
+
+
+def zones_from_env() -> List[Zone]:
+    path = os.environ.get("GEOFENCE_ZONES_FILE")
+    if path:
+        try:
+            return load_zones(path)
+        except Exception as e:
+            logger.error(f"Failed to load geofence zones from {path}: {str(e)}")
+    return DEFAULT_ZONES
+
+
+campus_zones = ZoneIndex(zones_from_env())
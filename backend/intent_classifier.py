@@ -0,0 +1,244 @@
+"""Keyword/phrase intent classifier for the Voice chatbot.
+
+All phrase tables (English and Tanglish) compile into a single regular
+expression, so one scan of the message finds every matching phrase. Each
+phrase adds its weight to its intent's score; the best score wins and ties
+go to the intent listed first in INTENT_PRIORITY.
+
+Run `python intent_classifier.py` for accuracy on the labeled evaluation set
+and a throughput benchmark.
+"""
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Tie-break order: reports about something that happened first, emergency last
+# so conversational mentions of help do not hijack more specific intents
+INTENT_PRIORITY = [
+    "theft_report",
+    "harassment_report",
+    "account_help",
+    "signin_help",
+    "sos_help",
+    "map_help",
+    "report_help",
+    "emergency",
+]
+
+# intent -> {phrase: weight}. Phrases match whole words only, so inflected
+# forms are listed explicitly ("account" must not match "accountant");
+# longer phrases win over their prefixes, so "emergency number" counts for
+# sos_help and not emergency.
+INTENT_PHRASES: Dict[str, Dict[str, float]] = {
+    "theft_report": {
+        "stolen": 2, "stole": 2, "steal": 2, "theft": 2, "thefts": 2, "robbed": 2, "robbery": 2, "missing phone": 3, "missing wallet": 3,
+        "missing laptop": 3, "pickpocket": 2, "pickpocketed": 2, "snatched": 2, "lost my phone": 2, "lost my wallet": 2,
+        # Tanglish
+        "thirudu": 2, "thiruttu": 2, "thirudittanga": 3, "thirudunanga": 3, "phone kaanom": 3,
+        "wallet kaanom": 3, "bag kaanom": 3, "kaanom": 1,
+    },
+    "harassment_report": {
+        "harassment": 2, "harassed": 2, "harassing": 2, "bothering": 2, "uncomfortable": 2,
+        "scared": 2, "stalking": 2, "stalked": 2, "stalker": 2, "following me": 2, "eve teasing": 3,
+        "touched me": 3, "catcalling": 2, "harass": 2,
+        # Tanglish
+        "payama irukku": 3, "bayama irukku": 3, "thondharavu": 2, "follow panranga": 3,
+        "follow pannuranga": 3, "tease panranga": 3, "kindal": 2,
+    },
+    "account_help": {
+        "signup": 2, "sign up": 2, "register": 2, "registration": 2, "account": 1, "accounts": 1, "create account": 3, "new account": 3,
+        # Tanglish
+        "account create": 3, "account open": 3, "register pannanum": 3, "signup pannanum": 3,
+    },
+    "signin_help": {
+        "signin": 2, "sign in": 2, "login": 2, "log in": 2, "logged in": 2, "password": 2, "passwords": 2, "forgot password": 3,
+        "reset password": 3,
+        # Tanglish
+        "login aagala": 3, "login aagalai": 3, "password marandhuten": 3, "password maranthuten": 3,
+        "password marandhu": 3,
+    },
+    "sos_help": {
+        "sos": 2, "helpline": 2, "helplines": 2, "emergency contact": 3, "emergency contacts": 3,
+        "emergency number": 3, "emergency numbers": 3, "helpline numbers": 3, "need help numbers": 3,
+        "show me emergency contacts": 4, "trusted contact": 2,
+        # Tanglish
+        "helpline number": 3, "emergency number kudunga": 4, "sos button": 3, "sos eppadi": 3,
+    },
+    "map_help": {
+        "map": 1, "maps": 1, "crime map": 2, "show map": 2, "view map": 2, "check map": 2, "location": 1,
+        "area": 1, "areas": 1, "where": 1, "show me the map": 3, "safe route": 2, "nearby": 1,
+        # Tanglish
+        "map paakanum": 3, "map kaattu": 3, "map kaatunga": 3, "enga": 1, "entha area": 2,
+    },
+    "report_help": {
+        "report": 1, "reported": 1, "reporting": 1, "incident": 1, "incidents": 1, "report incident": 2, "want to report": 2,
+        "need to report": 2, "file report": 2, "complaint": 1, "complaints": 1, "file a complaint": 2,
+        # Tanglish
+        "report pannanum": 3, "report panna": 3, "complaint pannanum": 3, "complaint kudukanum": 3,
+    },
+    "emergency": {
+        "emergency": 2, "danger": 2, "urgent help": 3, "need urgent": 3, "in danger": 3,
+        "threat": 2, "threats": 2, "threatened": 2, "threatening": 2, "attacked": 2, "attacking me": 3, "help me": 1,
+        "hit me": 3, "hitting me": 3, "beating me": 3, "grabbed me": 3, "grabbing me": 3,
+        # Tanglish
+        "aabathu": 2, "apathu": 2, "udane help": 3, "kaapathunga": 3, "kapathunga": 3,
+    },
+}
+
+
+class IntentResult(BaseModel):
+    intent: str
+    scores: Dict[str, float] = {}
+    matched_phrases: List[str] = []
+
+    @property
+    def intents(self) -> List[str]:
+        """Every matched intent, best first"""
+        return sorted(self.scores, key=_rank_key(self.scores))
+
+    @property
+    def is_unambiguous(self) -> bool:
+        return len(self.scores) == 1
+
+    @property
+    def score(self) -> float:
+        return self.scores.get(self.intent, 0.0)
+
+
+def _rank_key(scores: Dict[str, float]):
+    return lambda intent: (-scores[intent], INTENT_PRIORITY.index(intent))
+
+
+class IntentClassifier:
+    """Single-pass matcher over every phrase of every intent"""
+
+    def __init__(self, phrases: Optional[Dict[str, Dict[str, float]]] = None):
+        phrases = phrases or INTENT_PHRASES
+        self._phrase_index: Dict[str, List[Tuple[str, float]]] = {}
+        for intent, table in phrases.items():
+            for phrase, weight in table.items():
+                self._phrase_index.setdefault(phrase, []).append((intent, weight))
+
+        # Longest alternatives first so a phrase beats any of its prefixes
+        alternation = "|".join(
+            re.escape(phrase) for phrase in sorted(self._phrase_index, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b({alternation})\b")
+
+    def classify(self, message: str) -> IntentResult:
+        scores: Dict[str, float] = {}
+        matched = []
+        for match in self._pattern.finditer(message.lower()):
+            phrase = match.group(1)
+            matched.append(phrase)
+            for intent, weight in self._phrase_index[phrase]:
+                scores[intent] = scores.get(intent, 0.0) + weight
+
+        if not scores:
+            return IntentResult(intent="general")
+        intent = min(scores, key=_rank_key(scores))
+        return IntentResult(intent=intent, scores=scores, matched_phrases=matched)
+
+
+default_classifier = IntentClassifier()
+
+
+def classify_intent(message: str) -> IntentResult:
+    return default_classifier.classify(message)
+
+
+# Labeled evaluation set shared by the tests and the benchmark
+EVALUATION_SET: List[Tuple[str, str]] = [
+    ("My phone was stolen in the library", "theft_report"),
+    ("someone robbed me near the main gate", "theft_report"),
+    ("I think there was a theft in my hostel room", "theft_report"),
+    ("missing wallet after the fest", "theft_report"),
+    ("I want to report my stolen laptop", "theft_report"),
+    ("bro en phone kaanom", "theft_report"),
+    ("canteen la bag thirudittanga", "theft_report"),
+    ("a guy keeps bothering me on the bus", "harassment_report"),
+    ("I was harassed outside Tech Park", "harassment_report"),
+    ("someone is following me and I feel uncomfortable", "harassment_report"),
+    ("I'm scared to walk back alone", "harassment_report"),
+    ("hostel pakkathula oruthan follow panranga, payama irukku", "harassment_report"),
+    ("how do I sign up", "account_help"),
+    ("I want to create account", "account_help"),
+    ("can I register with my roll number", "account_help"),
+    ("account create pannanum", "account_help"),
+    ("I can't login", "signin_help"),
+    ("forgot password", "signin_help"),
+    ("how do I sign in", "signin_help"),
+    ("login aagala bro", "signin_help"),
+    ("password marandhuten", "signin_help"),
+    ("show me emergency contacts", "sos_help"),
+    ("what are the helpline numbers", "sos_help"),
+    ("how does SOS work", "sos_help"),
+    ("emergency number please", "sos_help"),
+    ("I need help numbers", "sos_help"),
+    ("helpline number kudunga", "sos_help"),
+    ("show me the map", "map_help"),
+    ("where did the latest incidents happen on the crime map", "map_help"),
+    ("which area is unsafe at night", "map_help"),
+    ("is it safe near my location", "map_help"),
+    ("map paakanum", "map_help"),
+    ("entha area safe illa", "map_help"),
+    ("I want to report something", "report_help"),
+    ("how do I file report", "report_help"),
+    ("need to report an incident", "report_help"),
+    ("report pannanum", "report_help"),
+    ("complaint kudukanum", "report_help"),
+    ("I'm in danger", "emergency"),
+    ("this is an emergency", "emergency"),
+    ("someone is threatening me", "emergency"),
+    ("urgent help needed", "emergency"),
+    ("aabathu, udane help pannunga", "emergency"),
+    ("kaapathunga", "emergency"),
+    ("hello", "general"),
+    ("what can you do", "general"),
+    ("thanks a lot", "general"),
+    ("tell me about my career options", "general"),
+    ("vanakkam, epdi irukeenga", "general"),
+]
+
+
+def evaluate(
+    examples: List[Tuple[str, str]] = EVALUATION_SET,
+    classifier: Optional[IntentClassifier] = None
+) -> dict:
+    """Accuracy and misclassified examples over a labeled set"""
+    classifier = classifier or default_classifier
+    errors = []
+    for message, expected in examples:
+        predicted = classifier.classify(message).intent
+        if predicted != expected:
+            errors.append({"message": message, "expected": expected, "predicted": predicted})
+    return {
+        "examples": len(examples),
+        "accuracy": round(1 - len(errors) / len(examples), 4) if examples else 0.0,
+        "errors": errors,
+    }
+
+
+def benchmark(iterations: int = 20000, classifier: Optional[IntentClassifier] = None) -> dict:
+    """Classification throughput over the evaluation messages"""
+    classifier = classifier or default_classifier
+    messages = [message for message, _ in EVALUATION_SET]
+    started = time.perf_counter()
+    for i in range(iterations):
+        classifier.classify(messages[i % len(messages)])
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "messages_per_second": round(iterations / elapsed),
+        "microseconds_per_message": round(elapsed / iterations * 1e6, 2),
+    }
+
+
+if __name__ == "__main__":
+    report = evaluate()
+    print(f"Accuracy: {report['accuracy']:.2%} on {report['examples']} examples")
+    for error in report["errors"]:
+        print(f"  {error['message']!r}: expected {error['expected']}, got {error['predicted']}")
+    print(benchmark())
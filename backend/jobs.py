@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class JobStage(BaseModel):
+    name: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    status: str = "running"  # "running", "completed", "failed"
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    kind: str
+    status: str = "queued"  # "queued", "running", "completed", "failed"
+    progress: float = 0.0
+    stages: List[JobStage] = []
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    requested_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobContext:
+    """Handle passed to a running job for reporting stages and progress.
+
+    Without a collection it only tracks timings in memory, so pipelines can
+    take a context whether or not they run as a tracked job. `metrics` is a
+    scratch dict pipelines can fill for the job body to report.
+    """
+
+    def __init__(self, job: Optional[Job] = None, collection=None):
+        self.job = job or Job(kind="inline")
+        self.collection = collection
+        self.metrics: Dict[str, Any] = {}
+
+    async def _save(self, fields: Dict[str, Any]):
+        if self.collection is None:
+            return
+        try:
+            await self.collection.update_one({"id": self.job.id}, {"$set": fields})
+        except Exception as e:
+            logger.warning(f"Failed to update job {self.job.id}: {str(e)}")
+
+    async def report_progress(self, progress: float):
+        """Record progress from inside a long-running stage"""
+        self.job.progress = progress
+        await self._save({"progress": progress})
+
+    @asynccontextmanager
+    async def stage(self, name: str, progress: Optional[float] = None):
+        """Time a pipeline stage; `progress` is recorded once the stage completes"""
+        stage = JobStage(name=name, started_at=datetime.now(timezone.utc))
+        self.job.stages.append(stage)
+        await self._save({"stages": [s.dict() for s in self.job.stages]})
+
+        started = time.perf_counter()
+        try:
+            yield stage
+            stage.status = "completed"
+        except BaseException:
+            stage.status = "failed"
+            raise
+        finally:
+            stage.finished_at = datetime.now(timezone.utc)
+            stage.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            fields = {"stages": [s.dict() for s in self.job.stages]}
+            if progress is not None and stage.status == "completed":
+                self.job.progress = progress
+                fields["progress"] = progress
+            await self._save(fields)
+
+
+class JobRunner:
+    """Runs background jobs as asyncio tasks and records their state in Mongo.
+
+    Only one job per kind runs at a time in this process; submitting while
+    one is running returns the running job.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._running: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index([("kind", 1), ("created_at", -1)])
+
+    def running(self, kind: str) -> Optional[Job]:
+        return self._running.get(kind)
+
+    async def submit(
+        self,
+        kind: str,
+        func: Callable[[JobContext], Awaitable[Optional[Dict[str, Any]]]],
+        requested_by: Optional[str] = None
+    ) -> Job:
+        running = self._running.get(kind)
+        if running:
+            return running
+
+        job = Job(kind=kind, requested_by=requested_by)
+        self._running[kind] = job
+        try:
+            await self.collection.insert_one(job.dict())
+        except Exception:
+            del self._running[kind]
+            raise
+
+        self._tasks[job.id] = asyncio.create_task(self._run(job, func))
+        return job
+
+    async def _run(self, job: Job, func: Callable[[JobContext], Awaitable[Optional[Dict[str, Any]]]]):
+        context = JobContext(job, self.collection)
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        await context._save({"status": job.status, "started_at": job.started_at})
+
+        try:
+            job.result = await func(context)
+            job.status = "completed"
+            job.progress = 1.0
+        except Exception as e:
+            logger.error(f"Job {job.kind} ({job.id}) failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)[:500]
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            await context._save({
+                "status": job.status,
+                "progress": job.progress,
+                "result": job.result,
+                "error": job.error,
+                "finished_at": job.finished_at
+            })
+            self._running.pop(job.kind, None)
+            self._tasks.pop(job.id, None)
+
+    async def wait(self, job: Job) -> Job:
+        """Wait for a job submitted by this runner to finish"""
+        task = self._tasks.get(job.id)
+        if task:
+            await asyncio.shield(task)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        doc = await self.collection.find_one({"id": job_id}, {"_id": 0})
+        return Job(**doc) if doc else None
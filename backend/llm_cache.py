@@ -0,0 +1,75 @@
+import hashlib
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def llm_cache_key(model: str, system_message: str, prompt: str) -> str:
+    """Content hash identifying one LLM completion request"""
+    digest = hashlib.sha256()
+    for part in (model, system_message, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier cache for LLM completions: in-memory LRU in front of a Mongo collection.
+
+    Mongo expiry is handled by a TTL index on `expires_at`; call
+    `ensure_indexes()` once at startup.
+    """
+
+    def __init__(self, collection=None, ttl: timedelta = timedelta(hours=24), memory_size: int = 256):
+        self.collection = collection
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl.total_seconds())
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, model: str, system_message: str, prompt: str) -> Optional[str]:
+        key = llm_cache_key(model, system_message, prompt)
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        if self.collection is None:
+            return None
+
+        try:
+            doc = await self.collection.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            return None
+
+        if not doc:
+            return None
+
+        self.memory.set(key, doc["response"])
+        return doc["response"]
+
+    async def set(self, model: str, system_message: str, prompt: str, response: str):
+        key = llm_cache_key(model, system_message, prompt)
+        self.memory.set(key, response)
+
+        if self.collection is None:
+            return
+
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "model": model, "response": response, "created_at": now, "expires_at": now + self.ttl},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
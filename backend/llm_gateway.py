@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+from resilience import dependency
+
+logger = logging.getLogger(__name__)
+
+
+class LLMOverloaded(Exception):
+    """Raised when a request is shed instead of queued for an LLM slot"""
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit with a bounded FIFO wait queue.
+
+    The limit grows additively (+1 per `limit` successful calls) while calls
+    finish under `latency_target` seconds, and shrinks multiplicatively on
+    errors or slow calls. Requests beyond the limit wait up to `max_wait`
+    seconds in a queue of at most `max_queue`; anything else is shed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        latency_target: float = 8.0,
+        backoff_ratio: float = 0.7,
+        max_queue: int = 100,
+        max_wait: float = 5.0
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.completed = 0
+        self.failed = 0
+        self.shed = 0
+        self.queue_time_ewma_ms = 0.0
+        self.max_queue_time_ms = 0.0
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(int(self.limit), 1)
+
+    def _record_queue_time(self, waited: float):
+        waited_ms = waited * 1000
+        self.queue_time_ewma_ms = 0.9 * self.queue_time_ewma_ms + 0.1 * waited_ms
+        self.max_queue_time_ms = max(self.max_queue_time_ms, waited_ms)
+
+    async def acquire(self) -> float:
+        """Take a slot, returning the seconds spent queued"""
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self._record_queue_time(0.0)
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise LLMOverloaded(f"{self.name}: queue full ({self.max_queue})")
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._release_slot()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.shed += 1
+            raise LLMOverloaded(f"{self.name}: waited {self.max_wait}s for a slot")
+
+        waited = time.perf_counter() - started
+        self._record_queue_time(waited)
+        return waited
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        # Hand freed slots directly to queued requests so they cannot be barged
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def release_unused(self):
+        """Give back a slot that was acquired but never used for a call"""
+        self._release_slot()
+
+    def release(self, latency: float, ok: bool):
+        if ok and latency <= self.latency_target:
+            self.completed += 1
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        else:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        self._release_slot()
+
+    def metrics(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "completed": self.completed,
+            "failed": self.failed,
+            "shed": self.shed,
+            "queue_time_ewma_ms": round(self.queue_time_ewma_ms, 1),
+            "max_queue_time_ms": round(self.max_queue_time_ms, 1),
+        }
+
+
+# Per-feature limiter settings: voice requests are interactive and shed fast,
+# predictor calls run in background jobs and can wait
+FEATURE_LIMITS = {
+    "voice": {"initial_limit": 16, "max_limit": 48, "latency_target": 6.0, "max_queue": 50, "max_wait": 1.5},
+    "predictor": {"initial_limit": 2, "max_limit": 4, "latency_target": 30.0, "max_queue": 10, "max_wait": 60.0},
+}
+
+
+class LLMGateway:
+    """Shared entry point for every LLM call in the backend.
+
+    Builds a fresh `LlmChat` per call, since a client keeps the history of
+    every message sent through it and callers already put the context they
+    want into the prompt. Bounds the number of in-flight upstream requests with a global limiter plus one
+    limiter per feature, which act as the per-feature bulkheads. A shared
+    circuit breaker fails calls immediately while the provider is down.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        provider: str = "openai",
+        model: str = "gpt-4o-mini",
+        max_concurrency: Optional[int] = None
+    ):
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model
+        max_concurrency = max_concurrency or int(os.environ.get("LLM_MAX_CONCURRENCY", "32"))
+        self.global_limiter = AIMDLimiter(
+            "global",
+            initial_limit=max_concurrency // 2 or 1,
+            max_limit=max_concurrency,
+            latency_target=30.0,
+            max_queue=200,
+            max_wait=60.0
+        )
+        self.feature_limiters: Dict[str, AIMDLimiter] = {}
+        # Shed requests never reach the provider, so they do not trip the breaker
+        self.dependency = dependency("llm", failure_threshold=5, recovery_timeout=30.0, ignore=(LLMOverloaded,))
+
+    @property
+    def model_key(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+    def limiter(self, feature: str) -> AIMDLimiter:
+        limiter = self.feature_limiters.get(feature)
+        if limiter is None:
+            limiter = AIMDLimiter(feature, **FEATURE_LIMITS.get(feature, {}))
+            self.feature_limiters[feature] = limiter
+        return limiter
+
+    def _client(self, session_id: str, system_message: str) -> LlmChat:
+        return LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=system_message
+        ).with_model(self.provider, self.model)
+
+    async def complete(self, feature: str, system_message: str, prompt: str, session_id: str) -> str:
+        """Send one prompt, waiting for a slot or raising LLMOverloaded.
+
+        Raises CircuitOpenError without queueing while the provider is down.
+        """
+        async with self.dependency.guard():
+            feature_limiter = self.limiter(feature)
+            await feature_limiter.acquire()
+            try:
+                await self.global_limiter.acquire()
+            except BaseException:
+                feature_limiter.release_unused()
+                raise
+
+            started = time.perf_counter()
+            ok = False
+            try:
+                response = await self._client(session_id, system_message).send_message(UserMessage(text=prompt))
+                ok = True
+                return response
+            finally:
+                latency = time.perf_counter() - started
+                self.global_limiter.release(latency, ok)
+                feature_limiter.release(latency, ok)
+
+    def metrics(self) -> dict:
+        return {
+            "model": self.model_key,
+            "global": self.global_limiter.metrics(),
+            "features": {name: limiter.metrics() for name, limiter in self.feature_limiters.items()},
+            "circuit": self.dependency.breaker.status(),
+        }
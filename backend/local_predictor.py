@@ -0,0 +1,220 @@
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from prediction_models import CrimePrediction
+from geofence import campus_zones
+from location_extractor import location_extractor
+
+logger = logging.getLogger(__name__)
+
+# Report crime types mapped onto the vocabulary used by CrimePrediction
+REPORT_CRIME_TYPES = {
+    "theft": "property",
+    "women_safety": "assault",
+    "drugs": "drug",
+}
+
+SEVERITY_WEIGHTS = {"low": 1.0, "medium": 1.5, "high": 2.0}
+
+# Peak times are described in campus local time
+LOCAL_TIMEZONE = "Asia/Kolkata"
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+RISK_FACTORS = {
+    "property": ["Unattended belongings", "High foot traffic", "Limited surveillance"],
+    "assault": ["Poorly lit pathways", "Isolated stretches", "Late hours"],
+    "drug": ["Secluded gathering spots", "Weekend gatherings", "Low patrol frequency"],
+    "general": ["Recent reported incidents", "Reduced visibility", "Fewer people around"],
+}
+
+PREVENTIVE_MEASURES = {
+    "property": ["Secure personal belongings", "Lock rooms and vehicles", "Register valuables with security"],
+    "assault": ["Travel in groups", "Use campus escort service", "Keep the SOS feature ready"],
+    "drug": ["Report suspicious activity", "Avoid isolated gatherings", "Reach out to campus counselling"],
+    "general": ["Stay in well-lit areas", "Keep emergency contacts handy", "Report suspicious activity"],
+}
+
+
+def area_from_location(location: Optional[Dict[str, Any]]) -> str:
+    """Derive a coarse area name from a stored LocationData dict.
+
+    Addresses naming gazetteer places map to the canonical name of the most
+    specific one, the same name news articles mentioning it are tagged with.
+    """
+    if not location:
+        return "Campus Area"
+    address = (location.get("address") or "").strip()
+    if not address:
+        return "Campus Area"
+    place = location_extractor.best_place(address)
+    if place:
+        return place.name
+    return address.split(",")[0].strip() or "Campus Area"
+
+
+class LocalCrimePredictor:
+    """Statistical crime predictor built on the app's own crime reports.
+
+    Events are modelled as Poisson processes per (area, crime_type) with a
+    linear trend over weekly counts, and per hour-of-week slot to find when
+    each risk peaks. Runs in milliseconds and never touches the network.
+    """
+
+    def __init__(self, lookback_weeks: int = 8, horizon_days: int = 7):
+        self.lookback_weeks = lookback_weeks
+        self.horizon_days = horizon_days
+        self.rate_table: Optional[pd.DataFrame] = None
+
+    def _build_frame(self, reports: List[Dict[str, Any]], now: datetime) -> pd.DataFrame:
+        rows = []
+        for report in reports:
+            created_at = report.get("created_at")
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            if not isinstance(created_at, datetime):
+                continue
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            rows.append({
+                "created_at": created_at,
+                "area": campus_zones.name_of(report.get("zone_id")) or area_from_location(report.get("location")),
+                "crime_type": REPORT_CRIME_TYPES.get(report.get("crime_type"), "general"),
+                "severity": SEVERITY_WEIGHTS.get(report.get("severity"), 1.0),
+            })
+
+        frame = pd.DataFrame(rows, columns=["created_at", "area", "crime_type", "severity"])
+        if frame.empty:
+            return frame
+
+        frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True)
+        window_start = now - timedelta(weeks=self.lookback_weeks)
+        frame = frame[frame["created_at"] >= window_start].copy()
+
+        # Week index 0 is the oldest week in the window, lookback_weeks - 1 the latest
+        age_weeks = ((now - frame["created_at"]).dt.total_seconds() // (7 * 86400)).astype(int)
+        frame["week"] = (self.lookback_weeks - 1) - age_weeks.clip(upper=self.lookback_weeks - 1)
+        local = frame["created_at"].dt.tz_convert(LOCAL_TIMEZONE)
+        frame["hour_of_week"] = local.dt.dayofweek * 24 + local.dt.hour
+        return frame
+
+    def fit(self, reports: List[Dict[str, Any]], now: Optional[datetime] = None) -> pd.DataFrame:
+        """Compute per (area, crime_type) rates, trends and peak hour-of-week slots"""
+        now = now or datetime.now(timezone.utc)
+        frame = self._build_frame(reports, now)
+        weeks = self.lookback_weeks
+
+        if frame.empty:
+            self.rate_table = pd.DataFrame(
+                columns=["area", "crime_type", "count", "weekly_rate", "trend_slope",
+                         "expected", "probability", "peak_hour_of_week", "peak_rate", "severity", "score"]
+            )
+            return self.rate_table
+
+        # Hour-of-week Poisson rates (events per week in that hourly slot)
+        slot_rates = (
+            frame.groupby(["area", "crime_type", "hour_of_week"]).size()
+            .div(weeks).rename("slot_rate").reset_index()
+        )
+        peaks = slot_rates.loc[slot_rates.groupby(["area", "crime_type"])["slot_rate"].idxmax()]
+        peaks = peaks.rename(columns={"hour_of_week": "peak_hour_of_week", "slot_rate": "peak_rate"})
+
+        # Weekly count series per group for the trend slope
+        weekly = (
+            frame.groupby(["area", "crime_type", "week"]).size()
+            .unstack("week", fill_value=0)
+            .reindex(columns=range(weeks), fill_value=0)
+        )
+        counts = weekly.to_numpy(dtype=float)
+        x = np.arange(weeks, dtype=float)
+        x_centered = x - x.mean()
+        slopes = (counts - counts.mean(axis=1, keepdims=True)) @ x_centered / (x_centered @ x_centered)
+        mean_rate = counts.mean(axis=1)
+
+        # Project the fitted line one week ahead, never below a quarter of the mean rate
+        projected = np.maximum(mean_rate + slopes * (weeks + 1) / 2, mean_rate * 0.25)
+        expected = projected * (self.horizon_days / 7)
+
+        table = weekly.index.to_frame(index=False)
+        table["count"] = counts.sum(axis=1).astype(int)
+        table["weekly_rate"] = mean_rate
+        table["trend_slope"] = slopes
+        table["expected"] = expected
+        table["probability"] = 1 - np.exp(-expected)
+
+        severity = frame.groupby(["area", "crime_type"])["severity"].mean().rename("severity").reset_index()
+        table = table.merge(peaks, on=["area", "crime_type"]).merge(severity, on=["area", "crime_type"])
+        table["score"] = table["expected"] * table["severity"]
+
+        self.rate_table = table.sort_values(["score", "count"], ascending=False).reset_index(drop=True)
+        return self.rate_table
+
+    @staticmethod
+    def _describe_slot(hour_of_week: int) -> str:
+        day = DAY_NAMES[int(hour_of_week) // 24]
+        hour = int(hour_of_week) % 24
+        return f"{day}s around {hour:02d}:00-{(hour + 1) % 24:02d}:00"
+
+    @staticmethod
+    def _confidence(count: int) -> str:
+        if count >= 8:
+            return "high"
+        if count >= 3:
+            return "medium"
+        return "low"
+
+    def predict(
+        self,
+        reports: List[Dict[str, Any]],
+        top_n: int = 3,
+        now: Optional[datetime] = None
+    ) -> List[CrimePrediction]:
+        """Return ranked predictions for the next horizon from raw crime report documents"""
+        now = now or datetime.now(timezone.utc)
+        table = self.fit(reports, now)
+        predictions = []
+
+        for row in table.head(top_n).itertuples(index=False):
+            if row.trend_slope > 0.1:
+                trend_text = "rising"
+            elif row.trend_slope < -0.1:
+                trend_text = "easing"
+            else:
+                trend_text = "steady"
+
+            prediction_text = (
+                f"{row.probability:.0%} chance of another {row.crime_type} incident near {row.area} "
+                f"in the next {self.horizon_days} days ({trend_text} trend), most likely "
+                f"{self._describe_slot(row.peak_hour_of_week)}"
+            )
+            predictions.append(CrimePrediction(
+                prediction_text=prediction_text,
+                confidence_level=self._confidence(row.count),
+                crime_type=row.crime_type,
+                location_area=row.area,
+                risk_factors=[f"{row.count} reports in the last {self.lookback_weeks} weeks"]
+                + RISK_FACTORS.get(row.crime_type, RISK_FACTORS["general"])[:2],
+                preventive_measures=PREVENTIVE_MEASURES.get(row.crime_type, PREVENTIVE_MEASURES["general"]),
+                valid_until=now + timedelta(days=self.horizon_days),
+                data_sources=["Campus crime reports"]
+            ))
+
+        return predictions
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistical summary of the last fit, shaped like TrendAnalysis.statistical_summary"""
+        table = self.rate_table
+        if table is None or table.empty:
+            return {"total_reports": 0, "analysis_type": "local_model"}
+        return {
+            "total_reports": int(table["count"].sum()),
+            "areas": int(table["area"].nunique()),
+            "lookback_weeks": self.lookback_weeks,
+            "reports_by_type": {k: int(v) for k, v in table.groupby("crime_type")["count"].sum().items()},
+            "average_trend_slope": round(float(table["trend_slope"].mean()), 3),
+            "analysis_type": "local_model",
+        }
@@ -0,0 +1,224 @@
+"""Location extraction for news articles and crime reports.
+
+Two sources of locations:
+
+- A gazetteer of SRM KTR (Kattankulathur) campus buildings, hostels and
+  nearby localities, each with coordinates. Aliases are stored in a
+  word-level trie, so one pass over the tokens of a text finds the
+  leftmost-longest alias at every position. The cost per text depends on
+  the number of words and the longest alias, not on the gazetteer size.
+- The generic patterns CrimeContentFilter always used ("X University",
+  "X Road", "City, ST", "downtown", ...), folded into two regexes
+  compiled at import.
+
+Coordinates are approximate (within about 100 m) and meant for map markers
+and area rollups, not navigation.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+# The generic patterns CrimeContentFilter used, as one case-insensitive
+# scan: "X University/College/Campus", "X Street/Road/...", "City, ST",
+# "X County/District"
+LOCATION_PATTERN = re.compile(
+    r"\b[a-z]+(?: (?:university|college|campus|street|road|avenue|boulevard|lane|county|district)|, [a-z]{2})\b",
+    re.IGNORECASE
+)
+
+AREA_PATTERN = re.compile(r"\b(?:downtown|uptown|campus|university area)\b", re.IGNORECASE)
+
+
+class Place(BaseModel):
+    place_id: str
+    name: str
+    kind: str  # campus, building, hostel, transit, road, locality
+    latitude: float
+    longitude: float
+    aliases: List[str] = []
+
+
+# Most specific first; used to pick one place for an address naming several
+PLACE_KIND_PRECISION = ["hostel", "building", "transit", "road", "campus", "locality"]
+
+
+class ExtractedLocation(BaseModel):
+    """A location mentioned in a text; gazetteer hits carry a place_id and coordinates"""
+    name: str
+    text: str
+    kind: str
+    start: int
+    end: int
+    place_id: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+def _place(place_id: str, name: str, kind: str, latitude: float, longitude: float, *aliases: str) -> Place:
+    return Place(place_id=place_id, name=name, kind=kind, latitude=latitude, longitude=longitude, aliases=list(aliases))
+
+
+# Aliases avoid generic words ("library", "hospital") that would match
+# places elsewhere in Chennai news; that includes a bare "SRM", which also
+# names the Ramapuram and Vadapalani campuses and SRM Nagar
+CAMPUS_GAZETTEER = [
+    _place("srm-ktr", "SRM KTR Campus", "campus", 12.8231, 80.0442,
+           "SRM KTR", "SRMIST", "SRM University", "SRM campus", "SRM Kattankulathur",
+           "SRM Institute of Science and Technology"),
+    _place("srm-tech-park", "SRM Tech Park", "building", 12.8246, 80.0451, "SRM TP"),
+    _place("srm-university-building", "University Building", "building", 12.8232, 80.0425,
+           "SRM University Building", "UB block"),
+    _place("srm-hitech-block", "Hi-Tech Block", "building", 12.8212, 80.0437, "Hitech Block", "Hi Tech Block"),
+    _place("srm-biotech-block", "Bio-Tech Block", "building", 12.8226, 80.0445, "Biotech Block", "Bio Tech Block"),
+    _place("srm-central-library", "SRM Central Library", "building", 12.8237, 80.0438),
+    _place("srm-java-canteen", "Java Canteen", "building", 12.8228, 80.0448, "Java Green"),
+    _place("srm-main-gate", "SRM Main Gate", "building", 12.8218, 80.0400, "SRM Arch", "SRM Arch Gate"),
+    _place("srm-hospital", "SRM Medical College Hospital", "building", 12.8204, 80.0486,
+           "SRM Hospital", "SRM General Hospital", "SRM Medical College"),
+    _place("paari-hostel", "Paari Hostel", "hostel", 12.8249, 80.0468, "Paari Block"),
+    _place("kaari-hostel", "Kaari Hostel", "hostel", 12.8252, 80.0473, "Kaari Block"),
+    _place("oori-hostel", "Oori Hostel", "hostel", 12.8256, 80.0478, "Oori Block"),
+    _place("adhiyaman-hostel", "Adhiyaman Hostel", "hostel", 12.8243, 80.0484, "Adhiyaman Block"),
+    _place("sannasi-hostel", "Sannasi Hostel", "hostel", 12.8239, 80.0490, "Sannasi Block"),
+    _place("nelson-mandela-hostel", "Nelson Mandela Hostel", "hostel", 12.8260, 80.0465, "Mandela Hostel"),
+    _place("manoranjitham-hostel", "Manoranjitham Hostel", "hostel", 12.8199, 80.0455, "Manoranjitham Block"),
+    _place("meenakshi-hostel", "Meenakshi Hostel", "hostel", 12.8195, 80.0462, "Meenakshi Block"),
+    _place("potheri-station", "Potheri Railway Station", "transit", 12.8237, 80.0376, "Potheri station"),
+    _place("ktr-station", "Kattankulathur Railway Station", "transit", 12.8156, 80.0354, "Kattankulathur station"),
+    _place("gst-road-potheri", "GST Road", "road", 12.8230, 80.0405,
+           "Grand Southern Trunk Road", "GST Rd", "NH 45", "NH45"),
+    _place("potheri", "Potheri", "locality", 12.8270, 80.0395),
+    _place("kattankulathur", "Kattankulathur", "locality", 12.8089, 80.0313),
+    _place("guduvanchery", "Guduvanchery", "locality", 12.8454, 80.0606, "Guduvancheri"),
+    _place("urapakkam", "Urapakkam", "locality", 12.8665, 80.0702),
+    _place("maraimalai-nagar", "Maraimalai Nagar", "locality", 12.7960, 80.0232, "Maraimalainagar"),
+    _place("singaperumal-koil", "Singaperumal Koil", "locality", 12.7598, 80.0049, "Singaperumalkoil"),
+    _place("vandalur", "Vandalur", "locality", 12.8913, 80.0810),
+    _place("chengalpattu", "Chengalpattu", "locality", 12.6920, 79.9768, "Chengalpet"),
+    _place("tambaram", "Tambaram", "locality", 12.9249, 80.1000),
+]
+
+
+def _words(text: str) -> List[str]:
+    """Lowercased word tokens; the i-th lines up with the i-th `_WORD` match in text"""
+    return " ".join(_WORD.findall(text)).lower().split(" ")
+
+
+class PlaceTrie:
+    """Word-level trie over place names and aliases"""
+
+    def __init__(self, places: Iterable[Place]):
+        self._root: Dict[str, dict] = {}
+        self.depth = 0
+        for place in places:
+            for alias in [place.name, *place.aliases]:
+                self.add(alias, place)
+
+    def add(self, alias: str, place: Place):
+        words = _words(alias)
+        node = self._root
+        for word in words:
+            node = node.setdefault(word, {})
+        # None is never a token, so it marks the end of an alias
+        node[None] = place
+        self.depth = max(self.depth, len(words))
+
+    def matches(self, words: List[str]) -> List[Tuple[Place, int, int]]:
+        """Leftmost-longest, non-overlapping (place, first word, last word) matches"""
+        root = self._root
+        count = len(words)
+        found = []
+        i = 0
+        while i < count:
+            node = root.get(words[i])
+            if node is None:
+                i += 1
+                continue
+            best = (node[None], i) if None in node else None
+            for j in range(i + 1, min(i + self.depth, count)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                if None in node:
+                    best = (node[None], j)
+            if best is None:
+                i += 1
+                continue
+            found.append((best[0], i, best[1]))
+            i = best[1] + 1
+        return found
+
+
+class LocationExtractor:
+    """Gazetteer and pattern locations in a text, one entry per place or name"""
+
+    def __init__(self, places: Iterable[Place] = CAMPUS_GAZETTEER):
+        self.places = {place.place_id: place for place in places}
+        self.trie = PlaceTrie(self.places.values())
+
+    def places_in(self, text: str) -> List[Place]:
+        """Gazetteer places mentioned in text, in order of first mention"""
+        if not text:
+            return []
+        return list({place.place_id: place for place, _, _ in self.trie.matches(_words(text))}.values())
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """Place whose name or an alias is exactly `name` (ignoring case and punctuation)"""
+        words = _words(name)
+        matches = self.trie.matches(words)
+        if len(matches) == 1 and matches[0][1] == 0 and matches[0][2] == len(words) - 1:
+            return matches[0][0]
+        return None
+
+    def best_place(self, text: str) -> Optional[Place]:
+        """Most specific gazetteer place mentioned in text (first mention on ties)"""
+        places = self.places_in(text)
+        if not places:
+            return None
+        return min(places, key=lambda place: PLACE_KIND_PRECISION.index(place.kind))
+
+    def extract(self, text: str) -> List[ExtractedLocation]:
+        if not text:
+            return []
+
+        places = self.trie.matches(_words(text))
+        # Word offsets are only needed when a place matched
+        spans = [m.span() for m in _WORD.finditer(text)] if places else []
+
+        locations: Dict[str, ExtractedLocation] = {}
+        taken = []
+        for place, first, last in places:
+            start, end = spans[first][0], spans[last][1]
+            taken.append((start, end))
+            if place.place_id not in locations:
+                locations[place.place_id] = ExtractedLocation(
+                    name=place.name,
+                    text=text[start:end],
+                    kind=place.kind,
+                    start=start,
+                    end=end,
+                    place_id=place.place_id,
+                    latitude=place.latitude,
+                    longitude=place.longitude
+                )
+
+        mentions = []
+        # Generic hits inside a gazetteer match ("SRM University") add nothing
+        for pattern in (LOCATION_PATTERN, AREA_PATTERN):
+            mentions.extend(match.span() for match in pattern.finditer(text))
+        for start, end in mentions:
+            if taken and any(s < end and start < e for s, e in taken):
+                continue
+            name = text[start:end]
+            if name not in locations:
+                locations[name] = ExtractedLocation(name=name, text=name, kind="mention", start=start, end=end)
+        return list(locations.values())
+
+    def extract_names(self, text: str) -> List[str]:
+        return [location.name for location in self.extract(text)]
+
+
+location_extractor = LocationExtractor()
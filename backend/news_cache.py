@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# live:   serve fresh cached responses, query NewsAPI otherwise and cache the result
+# record: always query NewsAPI and store every response as a replay fixture
+# replay: never touch the network; serve recorded responses or raise NewsCacheMiss
+# off:    no caching
+NEWS_API_MODES = ("live", "record", "replay", "off")
+
+# Date bounds change every run, so recorded fixtures are keyed without them
+DATE_PARAMS = {"from", "to"}
+
+
+class NewsCacheMiss(Exception):
+    """Raised in replay mode when no response was recorded for a request"""
+
+
+def news_cache_key(endpoint: str, params: Dict[str, Any], ignore_dates: bool = False) -> str:
+    """Hash of an endpoint and its normalized query params"""
+    normalized = {
+        key: " ".join(str(value).split())
+        for key, value in params.items()
+        if value is not None and not (ignore_dates and key in DATE_PARAMS)
+    }
+    payload = json.dumps([endpoint.strip("/"), normalized], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NewsResponseCache:
+    """NewsAPI response cache stored in a local directory or a Mongo collection.
+
+    Entries written in live mode expire after `ttl`; recorded fixtures never
+    expire. With Mongo, expiry is handled by a TTL index on `expires_at`
+    (see `ensure_indexes()`).
+    """
+
+    def __init__(
+        self,
+        mode: str = "live",
+        collection=None,
+        directory: Optional[str] = None,
+        ttl: timedelta = timedelta(minutes=30)
+    ):
+        if mode not in NEWS_API_MODES:
+            raise ValueError(f"Unknown NewsAPI mode {mode!r}; expected one of {NEWS_API_MODES}")
+        self.mode = mode
+        self.collection = collection
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, collection=None) -> "NewsResponseCache":
+        """Configure from NEWS_API_MODE, NEWS_CACHE_DIR and NEWS_CACHE_TTL_MINUTES"""
+        return cls(
+            mode=os.environ.get("NEWS_API_MODE", "live").lower(),
+            collection=collection,
+            directory=os.environ.get("NEWS_CACHE_DIR") or None,
+            ttl=timedelta(minutes=float(os.environ.get("NEWS_CACHE_TTL_MINUTES", "30")))
+        )
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == "replay"
+
+    async def ensure_indexes(self):
+        if self.collection is None or self.directory:
+            return
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def _key(self, endpoint: str, params: Dict[str, Any]) -> str:
+        return news_cache_key(endpoint, params, ignore_dates=self.mode in ("record", "replay"))
+
+    async def _load(self, key: str) -> Optional[dict]:
+        if self.directory:
+            path = self.directory / f"{key}.json"
+            if not path.exists():
+                return None
+            text = await asyncio.to_thread(path.read_text, encoding="utf-8")
+            doc = json.loads(text)
+            if doc.get("expires_at"):
+                doc["expires_at"] = datetime.fromisoformat(doc["expires_at"])
+            return doc
+
+        if self.collection is not None:
+            return await self.collection.find_one({"_id": key})
+        return None
+
+    async def _store(self, key: str, doc: dict):
+        if self.directory:
+            path = self.directory / f"{key}.json"
+            text = json.dumps(doc, default=str, indent=1)
+            await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(path.write_text, text, encoding="utf-8")
+        elif self.collection is not None:
+            await self.collection.replace_one({"_id": key}, {"_id": key, **doc}, upsert=True)
+
+    async def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached response for a request, or None when the network should be used"""
+        if self.mode in ("off", "record"):
+            return None
+
+        key = self._key(endpoint, params)
+        try:
+            doc = await self._load(key)
+        except Exception as e:
+            logger.warning(f"News cache lookup failed: {str(e)}")
+            doc = None
+
+        fresh = doc is not None and (
+            self.mode == "replay"
+            or not doc.get("expires_at")
+            or _as_utc(doc["expires_at"]) > datetime.now(timezone.utc)
+        )
+        if fresh:
+            self.hits += 1
+            return doc["response"]
+
+        self.misses += 1
+        if self.mode == "replay":
+            raise NewsCacheMiss(f"No recorded NewsAPI response for {endpoint} {params}")
+        return None
+
+    async def set(self, endpoint: str, params: Dict[str, Any], response: Dict[str, Any]):
+        if self.mode in ("off", "replay") or response.get("status") != "ok":
+            return
+
+        now = datetime.now(timezone.utc)
+        doc = {
+            "endpoint": endpoint,
+            "params": {key: value for key, value in params.items() if key != "apiKey"},
+            "response": response,
+            "stored_at": now,
+            "expires_at": now + self.ttl if self.mode == "live" else None,
+        }
+        try:
+            await self._store(self._key(endpoint, params), doc)
+        except Exception as e:
+            logger.warning(f"News cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
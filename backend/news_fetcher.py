@@ -5,14 +5,22 @@ from typing import List, Optional, Dict, Any
 import os
 import logging
 from pydantic import BaseModel, Field
-import re
 import json
 from dotenv import load_dotenv
 
+from resilience import dependency, CircuitOpenError
+from news_cache import NewsResponseCache
+from news_ingest import NewsIngestState
+from dedup import NearDuplicateIndex, article_text
+from location_extractor import location_extractor
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Shared breaker/bulkhead for every NewsAPI call in the process
+newsapi_dependency = dependency("newsapi", failure_threshold=3, recovery_timeout=60.0, max_concurrent=4, max_wait=5.0)
+
 class NewsArticle(BaseModel):
     title: str
     description: Optional[str] = None
@@ -27,15 +35,16 @@ class NewsArticle(BaseModel):
     crime_analysis: Optional[Dict[str, Any]] = None
 
 class NewsAPIClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache: Optional[NewsResponseCache] = None):
         self.api_key = api_key
         self.base_url = "https://newsapi.org/v2"
         self.session = None
+        self.cache = cache
     
     async def __aenter__(self):
         self.session = httpx.AsyncClient(
             headers={"X-API-Key": self.api_key},
-            timeout=30.0
+            timeout=httpx.Timeout(30.0, connect=5.0)
         )
         return self
     
@@ -43,6 +52,41 @@ class NewsAPIClient:
         if self.session:
             await self.session.aclose()
     
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an endpoint through the response cache, circuit breaker and bulkhead.
+
+        Raises CircuitOpenError without a network call while NewsAPI is known
+        to be down, and NewsCacheMiss for unrecorded requests in replay mode.
+        """
+        if self.cache:
+            cached = await self.cache.get(path, params)
+            if cached is not None:
+                return cached
+        
+        data = await self._fetch(path, params)
+        if self.cache:
+            await self.cache.set(path, params, data)
+        return data
+    
+    async def _fetch(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with newsapi_dependency.guard():
+            try:
+                # Add small delay to respect rate limits
+                await asyncio.sleep(0.1)
+                
+                response = await self.session.get(
+                    f"{self.base_url}/{path}",
+                    params=params
+                )
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                logger.error(f"NewsAPI HTTP error: {e.response.status_code} - {e.response.text}")
+                raise Exception(f"NewsAPI error: {e.response.status_code}")
+            except httpx.RequestError as e:
+                logger.error(f"NewsAPI request error: {str(e)}")
+                raise Exception(f"Failed to connect to NewsAPI: {str(e)}")
+    
     async def fetch_top_headlines(
         self, 
         country: str = "us",
@@ -65,22 +109,7 @@ class NewsAPIClient:
         if q:
             params["q"] = q
             
-        try:
-            # Add small delay to respect rate limits
-            await asyncio.sleep(0.1)
-            
-            response = await self.session.get(
-                f"{self.base_url}/top-headlines",
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"NewsAPI HTTP error: {e.response.status_code} - {e.response.text}")
-            raise Exception(f"NewsAPI error: {e.response.status_code}")
-        except httpx.RequestError as e:
-            logger.error(f"NewsAPI request error: {str(e)}")
-            raise Exception(f"Failed to connect to NewsAPI: {str(e)}")
+        return await self._get("top-headlines", params)
     
     async def search_everything(
         self,
@@ -111,22 +140,7 @@ class NewsAPIClient:
         if to_date:
             params["to"] = to_date
             
-        try:
-            # Add small delay to respect rate limits
-            await asyncio.sleep(0.1)
-            
-            response = await self.session.get(
-                f"{self.base_url}/everything",
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"NewsAPI HTTP error: {e.response.status_code} - {e.response.text}")
-            raise Exception(f"NewsAPI error: {e.response.status_code}")
-        except httpx.RequestError as e:
-            logger.error(f"NewsAPI request error: {str(e)}")
-            raise Exception(f"Failed to connect to NewsAPI: {str(e)}")
+        return await self._get("everything", params)
 
 class CrimeContentFilter:
     def __init__(self):
@@ -234,120 +248,206 @@ class CrimeContentFilter:
 
     def extract_location_info(self, text: str) -> List[str]:
         """Extract potential location information from text"""
-        if not text:
-            return []
-        
-        # Common location patterns
-        location_patterns = [
-            r'\b([A-Z][a-z]+ (?:University|College|Campus))\b',
-            r'\b([A-Z][a-z]+ (?:Street|Road|Avenue|Boulevard|Lane))\b',
-            r'\b([A-Z][a-z]+, [A-Z]{2})\b',  # City, State
-            r'\b([A-Z][a-z]+ (?:County|District))\b',
-            r'\b(downtown|uptown|campus|university area)\b',
-        ]
-        
-        locations = []
-        for pattern in location_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            locations.extend(matches)
+        return location_extractor.extract_names(text)
+
+    def location_analysis(self, text: str) -> Dict[str, Any]:
+        """Location fields of an article analysis: names, geocoded gazetteer places and has_location"""
+        locations = location_extractor.extract(text)
+        return {
+            "locations": [location.name for location in locations],
+            "geo_locations": [location.dict() for location in locations if location.place_id],
+            "has_location": len(locations) > 0
+        }
+
+# NewsAPI caps page * pageSize of a search (100 on the developer plan)
+NEWSAPI_MAX_RESULTS = int(os.environ.get('NEWSAPI_MAX_RESULTS', '100'))
+INGEST_PAGE_SIZE = 100
+
+# Each term is searched together with the location filter
+CRIME_QUERY_TERMS = ["crime", "assault", "theft", "robbery", "safety"]
+
+def crime_queries(location_filter: str) -> List[str]:
+    return [f"{term} AND ({location_filter})" for term in CRIME_QUERY_TERMS]
+
+def score_news_article(
+    article_data: Dict[str, Any],
+    crime_filter: CrimeContentFilter,
+    threshold: float = 1.5  # Lower threshold for broader detection
+) -> Optional[NewsArticle]:
+    """NewsArticle with crime score and locations for a raw NewsAPI article, or None if not crime-related"""
+    is_crime, crime_score, analysis = crime_filter.is_crime_related(
+        title=article_data.get("title") or "",
+        description=article_data.get("description") or "",
+        content=article_data.get("content") or "",
+        threshold=threshold
+    )
+    
+    if not is_crime:
+        return None
+    
+    # Enhanced analysis with location
+    combined_text = f"{article_data.get('title', '')} {article_data.get('description', '')}"
+    analysis.update(crime_filter.location_analysis(combined_text))
+    
+    return news_article_from_analysis(article_data, analysis)
+
+def news_article_from_analysis(article_data: Dict[str, Any], analysis: Dict[str, Any]) -> Optional[NewsArticle]:
+    """NewsArticle for a raw NewsAPI article already scored (with locations) into `analysis`"""
+    try:
+        # Parse published date
+        published_at = datetime.fromisoformat(
+            article_data["publishedAt"].replace("Z", "+00:00")
+        )
         
-        return list(set(locations))  # Remove duplicates
+        return NewsArticle(
+            title=article_data["title"],
+            description=article_data.get("description"),
+            content=article_data.get("content"),
+            url=article_data["url"],
+            url_to_image=article_data.get("urlToImage"),
+            published_at=published_at,
+            source_name=article_data["source"]["name"],
+            source_id=article_data["source"].get("id"),
+            author=article_data.get("author"),
+            crime_score=analysis["total_score"],
+            crime_analysis=analysis
+        )
+    except Exception as e:
+        logger.warning(f"Error processing article: {str(e)}")
+        return None
 
 async def fetch_crime_news(
     news_api_key: str,
     location_filter: str = "campus OR university OR college",
-    max_articles: int = 50
+    max_articles: int = 50,
+    cache: Optional[NewsResponseCache] = None,
+    ingest: Optional[NewsIngestState] = None
 ) -> List[NewsArticle]:
-    """Fetch and filter crime-related news articles"""
+    """Fetch and filter crime-related news articles.
+
+    With a replay-mode `cache` the whole pipeline runs offline from recorded
+    responses. With an `ingest` state only articles newer than each query's
+    watermark are requested and already-stored URLs are skipped before
+    scoring, so only genuinely new articles are returned.
+    """
+    offline = cache is not None and cache.offline
+    
+    # Fail over immediately while NewsAPI is known to be down
+    if not offline and not newsapi_dependency.available:
+        raise CircuitOpenError("newsapi circuit is open")
     
     crime_filter = CrimeContentFilter()
     filtered_articles = []
+    fetched_urls = set()
+    # Syndicated copies of a story are scored (and sent to the LLM) only once
+    duplicates = ingest.duplicates if ingest else NearDuplicateIndex()
+    near_duplicates = 0
     
-    async with NewsAPIClient(news_api_key) as client:
+    async with NewsAPIClient(news_api_key, cache=cache) as client:
         try:
             # Search for crime-related articles
-            crime_queries = [
-                f"crime AND ({location_filter})",
-                f"assault AND ({location_filter})",
-                f"theft AND ({location_filter})",
-                f"robbery AND ({location_filter})",
-                f"safety AND ({location_filter})"
-            ]
-            
-            for query in crime_queries:
+            for query in crime_queries(location_filter):
                 try:
-                    # Get articles from past week
-                    from_date = (datetime.now(timezone.utc) - timedelta(days=7)).strftime('%Y-%m-%d')
-                    
-                    news_data = await client.search_everything(
-                        q=query,
-                        from_date=from_date,
-                        language="en",
-                        sort_by="relevancy",
-                        page_size=20
-                    )
-                    
-                    if news_data.get("status") != "ok":
-                        logger.warning(f"NewsAPI warning for query '{query}': {news_data.get('message', 'Unknown error')}")
-                        continue
-                    
-                    # Process articles
-                    for article_data in news_data.get("articles", []):
-                        if not article_data.get("title") or not article_data.get("url"):
-                            continue
-                        
-                        # Skip articles we already have
-                        if any(art.url == article_data["url"] for art in filtered_articles):
-                            continue
+                    # Ingest pages newest first down to the query's watermark
+                    page = 1
+                    window_read = not ingest
+                    capped = False
+                    while True:
+                        if ingest:
+                            news_data = await client.search_everything(
+                                q=query,
+                                from_date=ingest.from_date(query),
+                                language="en",
+                                sort_by="publishedAt",
+                                page_size=INGEST_PAGE_SIZE,
+                                page=page
+                            )
+                        else:
+                            # Get articles from past week
+                            from_date = (datetime.now(timezone.utc) - timedelta(days=7)).strftime('%Y-%m-%d')
+                            
+                            news_data = await client.search_everything(
+                                q=query,
+                                from_date=from_date,
+                                language="en",
+                                sort_by="relevancy",
+                                page_size=20
+                            )
                         
-                        # Apply crime filtering
-                        is_crime, crime_score, analysis = crime_filter.is_crime_related(
-                            title=article_data.get("title", ""),
-                            description=article_data.get("description", ""),
-                            content=article_data.get("content", ""),
-                            threshold=1.5  # Lower threshold for broader detection
-                        )
+                        if news_data.get("status") != "ok":
+                            if page > 1 and news_data.get("code") == "maximumResultsReached":
+                                window_read = capped = True
+                            else:
+                                logger.warning(f"NewsAPI warning for query '{query}': {news_data.get('message', 'Unknown error')}")
+                            break
                         
-                        if is_crime and crime_score >= 1.5:
-                            try:
-                                # Parse published date
-                                published_at = datetime.fromisoformat(
-                                    article_data["publishedAt"].replace("Z", "+00:00")
-                                )
-                                
-                                # Extract location information
-                                combined_text = f"{article_data.get('title', '')} {article_data.get('description', '')}"
-                                locations = crime_filter.extract_location_info(combined_text)
-                                
-                                # Enhanced analysis with location
-                                analysis["locations"] = locations
-                                analysis["has_location"] = len(locations) > 0
-                                
-                                # Create article object
-                                article = NewsArticle(
-                                    title=article_data["title"],
-                                    description=article_data.get("description"),
-                                    content=article_data.get("content"),
-                                    url=article_data["url"],
-                                    url_to_image=article_data.get("urlToImage"),
-                                    published_at=published_at,
-                                    source_name=article_data["source"]["name"],
-                                    source_id=article_data["source"].get("id"),
-                                    author=article_data.get("author"),
-                                    crime_score=crime_score,
-                                    crime_analysis=analysis
-                                )
-                                
+                        # Process articles
+                        returned = news_data.get("articles", [])
+                        processed = 0
+                        for article_data in returned:
+                            processed += 1
+                            if not article_data.get("title") or not article_data.get("url"):
+                                continue
+                            
+                            if ingest:
+                                # Seen articles still advance this query's watermark
+                                seen = ingest.is_seen(article_data["url"])
+                                try:
+                                    ingest.observe(query, article_data["url"], datetime.fromisoformat(
+                                        article_data["publishedAt"].replace("Z", "+00:00")
+                                    ))
+                                except (KeyError, AttributeError, ValueError):
+                                    pass
+                                if seen:
+                                    continue
+                            
+                            # Skip articles we already have
+                            if article_data["url"] in fetched_urls:
+                                continue
+                            fetched_urls.add(article_data["url"])
+                            
+                            text = article_text(article_data.get("title"), article_data.get("description"))
+                            if duplicates.check_and_add(article_data["url"], text) is not None:
+                                near_duplicates += 1
+                                continue
+                            
+                            article = score_news_article(article_data, crime_filter)
+                            if article:
                                 filtered_articles.append(article)
                                 
                                 # Stop if we have enough articles
                                 if len(filtered_articles) >= max_articles:
                                     break
-                                    
-                            except Exception as e:
-                                logger.warning(f"Error processing article: {str(e)}")
-                                continue
+                        
+                        if not ingest:
+                            break
+                        total = news_data.get("totalResults", 0)
+                        if len(returned) < INGEST_PAGE_SIZE or page * INGEST_PAGE_SIZE >= total:
+                            window_read = processed == len(returned)
+                            break
+                        if processed < len(returned) or len(filtered_articles) >= max_articles:
+                            break
+                        if page * INGEST_PAGE_SIZE >= NEWSAPI_MAX_RESULTS:
+                            window_read = capped = True
+                            break
+                        page += 1
+                    
+                    if capped:
+                        # Advance past the result cap rather than re-reading the same newest
+                        # pages every cycle; a backfill can harvest the skipped articles
+                        logger.warning(
+                            f"Query '{query}' has more new articles than NewsAPI returns "
+                            f"({NEWSAPI_MAX_RESULTS}); older ones are skipped"
+                        )
+                    
+                    # Keep the old watermark if older new articles were left unread,
+                    # so the next cycle asks for them again
+                    if ingest and not window_read:
+                        ingest.discard(query)
                 
+                except CircuitOpenError:
+                    # NewsAPI went down mid-run; stop instead of failing every query
+                    break
                 except Exception as e:
                     logger.error(f"Error fetching news for query '{query}': {str(e)}")
                     continue
@@ -357,12 +457,19 @@ async def fetch_crime_news(
                     break
                     
                 # Small delay between queries
-                await asyncio.sleep(0.5)
+                if not offline:
+                    await asyncio.sleep(0.5)
         
         except Exception as e:
             logger.error(f"Error in fetch_crime_news: {str(e)}")
             raise
     
+    if near_duplicates:
+        logger.info(f"Skipped {near_duplicates} near-duplicate news articles")
+    
+    if not filtered_articles and not offline and not newsapi_dependency.available:
+        raise CircuitOpenError("newsapi circuit opened while fetching")
+    
     # Sort by crime score (highest first) and publication date
     filtered_articles.sort(key=lambda x: (-x.crime_score, -x.published_at.timestamp()))
     
@@ -0,0 +1,95 @@
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Set
+
+from dedup import NearDuplicateIndex, article_text
+
+logger = logging.getLogger(__name__)
+
+
+class NewsIngestState:
+    """Per-query `publishedAt` watermarks plus the set of already-stored article URLs.
+
+    `fetch_crime_news` asks NewsAPI only for articles published after each
+    query's watermark and skips URLs in `seen_urls`, and near-duplicates of
+    stored articles in `duplicates`, before scoring them.
+    Watermarks advance in memory while fetching and are persisted by
+    `commit()` once the articles have been stored, so a failed cycle is
+    retried from the old watermarks.
+    """
+
+    def __init__(self, state_collection=None, articles_collection=None, lookback: timedelta = timedelta(days=7)):
+        self.state_collection = state_collection
+        self.articles_collection = articles_collection
+        self.lookback = lookback
+        self.watermarks: Dict[str, datetime] = {}
+        self.seen_urls: Set[str] = set()
+        self.duplicates = NearDuplicateIndex()
+        self._pending: Dict[str, datetime] = {}
+
+    async def load(self) -> "NewsIngestState":
+        """Read watermarks and prime the seen-URL set and duplicate index from stored articles"""
+        since = datetime.now(timezone.utc) - self.lookback
+        try:
+            if self.state_collection is not None:
+                async for doc in self.state_collection.find({}, {"query": 1, "watermark": 1}):
+                    self.watermarks[doc["query"]] = _as_utc(doc["watermark"])
+            if self.articles_collection is not None:
+                async for doc in self.articles_collection.find(
+                    {"published_at": {"$gte": since}}, {"url": 1, "title": 1, "description": 1}
+                ):
+                    self.seen_urls.add(doc["url"])
+                    self.duplicates.check_and_add(doc["url"], article_text(doc.get("title"), doc.get("description")))
+        except Exception as e:
+            logger.warning(f"Failed to load news ingest state: {str(e)}")
+        return self
+
+    def from_date(self, query: str) -> str:
+        """NewsAPI `from` for a query: its watermark, clamped to the lookback window.
+
+        The window starts at midnight so the request (and its cache key) stays
+        the same all day for a query without a watermark.
+        """
+        floor = (datetime.now(timezone.utc) - self.lookback).replace(hour=0, minute=0, second=0, microsecond=0)
+        watermark = self.watermarks.get(query)
+        start = max(watermark, floor) if watermark else floor
+        return start.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def is_seen(self, url: str) -> bool:
+        return url in self.seen_urls
+
+    def observe(self, query: str, url: str, published_at: datetime):
+        """Record an article returned for a query, scored or not"""
+        self.seen_urls.add(url)
+        published_at = _as_utc(published_at)
+        current = self._pending.get(query) or self.watermarks.get(query)
+        if current is None or published_at > current:
+            self._pending[query] = published_at
+
+    def discard(self, query: str):
+        """Keep a query's previous watermark for this cycle"""
+        self._pending.pop(query, None)
+
+    async def commit(self):
+        """Persist the watermarks advanced since the last commit"""
+        if not self._pending:
+            return
+        self.watermarks.update(self._pending)
+        pending, self._pending = self._pending, {}
+        if self.state_collection is None:
+            return
+
+        now = datetime.now(timezone.utc)
+        try:
+            for query, watermark in pending.items():
+                await self.state_collection.update_one(
+                    {"query": query},
+                    {"$set": {"watermark": watermark, "updated_at": now}},
+                    upsert=True
+                )
+        except Exception as e:
+            logger.warning(f"Failed to save news ingest watermarks: {str(e)}")
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,381 @@
+"""Streaming NewsAPI harvesting pipeline.
+
+Work is split into slices (one query over one time window). Fetch workers
+page through slices concurrently and push raw articles into a bounded
+queue; a scoring stage filters them into a second bounded queue; a storage
+stage writes batches. Full queues block the stages upstream, so memory
+stays bounded however much history is harvested.
+
+NewsAPI returns at most `NEWSAPI_MAX_RESULTS` results per search, so
+backfills use narrow time windows instead of deep paging. A slice is
+checkpointed only after all of its articles are stored, so a backfill that
+crashes resumes from the first unfinished slice.
+"""
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+from batch_scoring import BatchScorer
+from dedup import NearDuplicateIndex, article_text
+from news_fetcher import NEWSAPI_MAX_RESULTS, NewsAPIClient, NewsArticle, news_article_from_analysis
+from resilience import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class HarvestSlice(BaseModel):
+    query: str
+    from_date: datetime
+    to_date: datetime
+
+    @property
+    def key(self) -> str:
+        return f"{self.query}|{self.from_date.isoformat()}|{self.to_date.isoformat()}"
+
+
+def plan_slices(
+    queries: List[str],
+    start: datetime,
+    end: datetime,
+    window: timedelta = timedelta(days=1)
+) -> List[HarvestSlice]:
+    """Slices covering [start, end) per query, newest window first"""
+    slices = []
+    window_end = end
+    while window_end > start:
+        window_start = max(window_end - window, start)
+        slices.extend(HarvestSlice(query=query, from_date=window_start, to_date=window_end) for query in queries)
+        window_end = window_start
+    return slices
+
+
+async def iter_slice_pages(
+    client: NewsAPIClient,
+    harvest_slice: HarvestSlice,
+    page_size: int = 100,
+    max_results: int = NEWSAPI_MAX_RESULTS
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield each page of raw articles for a slice, stopping at the result cap"""
+    max_pages = max(1, math.ceil(max_results / page_size))
+    for page in range(1, max_pages + 1):
+        data = await client.search_everything(
+            q=harvest_slice.query,
+            from_date=harvest_slice.from_date.strftime('%Y-%m-%dT%H:%M:%S'),
+            to_date=harvest_slice.to_date.strftime('%Y-%m-%dT%H:%M:%S'),
+            language="en",
+            sort_by="publishedAt",
+            page_size=page_size,
+            page=page
+        )
+        if data.get("status") != "ok":
+            if data.get("code") == "maximumResultsReached":
+                return
+            raise Exception(f"NewsAPI error for '{harvest_slice.query}': {data.get('message', 'Unknown error')}")
+
+        articles = data.get("articles", [])
+        if articles:
+            yield articles
+
+        total = data.get("totalResults", 0)
+        if len(articles) < page_size or page * page_size >= min(total, max_results):
+            if total > max_results:
+                logger.warning(
+                    f"Slice {harvest_slice.key} has {total} results; only {max_results} are reachable, use a narrower window"
+                )
+            return
+
+
+class BackfillCheckpoints:
+    """Completed slice keys for one backfill, stored in a single Mongo document"""
+
+    def __init__(self, collection, backfill_id: str):
+        self.collection = collection
+        self.backfill_id = backfill_id
+
+    async def start(self, params: Dict[str, Any]) -> Set[str]:
+        """Mark the backfill running, count the attempt and return the slices already completed"""
+        doc = await self.collection.find_one_and_update(
+            {"_id": self.backfill_id},
+            {
+                "$set": {"status": "running", "params": params, "updated_at": datetime.now(timezone.utc)},
+                "$inc": {"attempts": 1},
+                "$setOnInsert": {"done": [], "articles_stored": 0, "created_at": datetime.now(timezone.utc)}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return set(doc.get("done", [])) if doc else set()
+
+    async def mark_done(self, slice_key: str, stored: int):
+        await self.collection.update_one(
+            {"_id": self.backfill_id},
+            {
+                "$addToSet": {"done": slice_key},
+                "$inc": {"articles_stored": stored},
+                "$set": {"updated_at": datetime.now(timezone.utc)}
+            }
+        )
+
+    async def finish(self, status: str):
+        await self.collection.update_one(
+            {"_id": self.backfill_id},
+            {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}}
+        )
+
+
+class NewsHarvestPipeline:
+    """Fetch -> score -> store pipeline over harvest slices.
+
+    `store` receives batches of scored articles. `on_slice_done(slice, stored)`
+    is awaited once every article of a slice has been stored. Requests are
+    paced to at most `requests_per_second` across all fetch workers. Pages
+    are collected into batches of `score_batch_size` articles (the scorer's
+    parallel threshold by default) and scored off the event loop by `scorer`.
+    """
+
+    def __init__(
+        self,
+        client: NewsAPIClient,
+        store: Callable[[List[NewsArticle]], Awaitable[None]],
+        on_slice_done: Optional[Callable[[HarvestSlice, int], Awaitable[None]]] = None,
+        concurrency: int = 3,
+        queue_size: int = 500,
+        batch_size: int = 50,
+        requests_per_second: float = 2.0,
+        page_size: int = 100,
+        seen_urls: Optional[Set[str]] = None,
+        duplicates: Optional[NearDuplicateIndex] = None,
+        scorer: Optional[BatchScorer] = None,
+        threshold: float = 1.5,
+        score_batch_size: Optional[int] = None,
+        score_linger: float = 2.0
+    ):
+        self.client = client
+        self.store = store
+        self.on_slice_done = on_slice_done
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.page_size = page_size
+        self.seen_urls = seen_urls if seen_urls is not None else set()
+        self.duplicates = duplicates or NearDuplicateIndex()
+        self.scorer = scorer or BatchScorer(workers=1)
+        self.threshold = threshold
+        # Batches at least this big go to the scorer's process pool
+        self.score_batch_size = score_batch_size or self.scorer.parallel_threshold
+        self.score_linger = score_linger
+        self.stats = {"slices_done": 0, "slices_failed": 0, "pages": 0, "fetched": 0, "near_duplicates": 0, "scored": 0, "stored": 0}
+        self._pace_lock = asyncio.Lock()
+        self._next_request_at = 0.0
+
+    async def _pace(self):
+        if not self.min_interval:
+            return
+        async with self._pace_lock:
+            delay = self._next_request_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_request_at = time.monotonic() + self.min_interval
+
+    async def _fetch_worker(self, slices: asyncio.Queue, raw: asyncio.Queue, abort: asyncio.Event):
+        while not abort.is_set():
+            try:
+                harvest_slice = slices.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                await self._pace()
+                async for articles in iter_slice_pages(self.client, harvest_slice, self.page_size):
+                    self.stats["pages"] += 1
+                    self.stats["fetched"] += len(articles)
+                    await raw.put((harvest_slice, articles))
+                    await self._pace()
+                # End-of-slice marker; the store stage checkpoints it after flushing
+                await raw.put((harvest_slice, None))
+            except CircuitOpenError:
+                logger.warning("NewsAPI circuit open; stopping harvest")
+                self.stats["slices_failed"] += 1
+                abort.set()
+            except Exception as e:
+                logger.error(f"Error harvesting slice {harvest_slice.key}: {str(e)}")
+                self.stats["slices_failed"] += 1
+
+    def _candidates(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """New, titled articles that are not near-duplicates of ones already seen"""
+        candidates = []
+        for article_data in articles:
+            url = article_data.get("url")
+            if not url or not article_data.get("title") or url in self.seen_urls:
+                continue
+            self.seen_urls.add(url)
+            text = article_text(article_data.get("title"), article_data.get("description"))
+            if self.duplicates.check_and_add(url, text) is not None:
+                self.stats["near_duplicates"] += 1
+                continue
+            candidates.append(article_data)
+        return candidates
+
+    async def _score_batch(self, pending: List[tuple], scored: asyncio.Queue):
+        """Score buffered pages in one call and emit them, slice markers in their original order"""
+        candidates = [article for _, articles in pending if articles for article in articles]
+        analyses = iter(await self.scorer.analyze_async(
+            [(a.get("title") or "", a.get("description") or "", a.get("content") or "") for a in candidates],
+            threshold=self.threshold
+        ) if candidates else [])
+        for harvest_slice, articles in pending:
+            if articles is None:
+                await scored.put((harvest_slice, None))
+                continue
+            for article_data in articles:
+                analysis = next(analyses)
+                if not analysis["is_crime_related"]:
+                    continue
+                article = news_article_from_analysis(article_data, analysis)
+                if article:
+                    self.stats["scored"] += 1
+                    await scored.put((harvest_slice, article))
+
+    async def _score_stage(self, raw: asyncio.Queue, scored: asyncio.Queue):
+        """Buffer pages until there are enough articles for the scorer's process pool.
+
+        A batch is scored once it reaches `score_batch_size` articles, when no
+        page arrives for `score_linger` seconds, or when fetching is done.
+        """
+        pending: List[tuple] = []
+        buffered = 0
+        while True:
+            try:
+                item = await (asyncio.wait_for(raw.get(), self.score_linger) if pending else raw.get())
+            except asyncio.TimeoutError:
+                item = None
+            if item is None or item is _DONE:
+                if pending:
+                    await self._score_batch(pending, scored)
+                    pending, buffered = [], 0
+                if item is _DONE:
+                    await scored.put(_DONE)
+                    return
+                continue
+
+            harvest_slice, articles = item
+            if articles is None:
+                pending.append(item)
+            else:
+                candidates = self._candidates(articles)
+                pending.append((harvest_slice, candidates))
+                buffered += len(candidates)
+            if buffered >= self.score_batch_size:
+                await self._score_batch(pending, scored)
+                pending, buffered = [], 0
+
+    async def _store_stage(self, scored: asyncio.Queue):
+        batch: List[NewsArticle] = []
+        per_slice: Dict[str, int] = {}
+
+        async def flush():
+            if batch:
+                await self.store(list(batch))
+                self.stats["stored"] += len(batch)
+                batch.clear()
+
+        while True:
+            item = await scored.get()
+            if item is _DONE:
+                await flush()
+                return
+
+            harvest_slice, article = item
+            if article is None:
+                # Everything from this slice is queued ahead of its marker
+                await flush()
+                self.stats["slices_done"] += 1
+                if self.on_slice_done:
+                    await self.on_slice_done(harvest_slice, per_slice.pop(harvest_slice.key, 0))
+                continue
+
+            batch.append(article)
+            per_slice[harvest_slice.key] = per_slice.get(harvest_slice.key, 0) + 1
+            if len(batch) >= self.batch_size:
+                await flush()
+
+    async def run(self, slices: List[HarvestSlice]) -> Dict[str, int]:
+        slice_queue: asyncio.Queue = asyncio.Queue()
+        for harvest_slice in slices:
+            slice_queue.put_nowait(harvest_slice)
+        raw: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        scored: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        abort = asyncio.Event()
+
+        async def fetch_all():
+            await asyncio.gather(*(
+                self._fetch_worker(slice_queue, raw, abort) for _ in range(max(1, self.concurrency))
+            ))
+            await raw.put(_DONE)
+
+        # A failing stage would leave the others blocked on full queues, so
+        # the first error cancels the whole pipeline
+        tasks = [
+            asyncio.create_task(fetch_all()),
+            asyncio.create_task(self._score_stage(raw, scored)),
+            asyncio.create_task(self._store_stage(scored)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if abort.is_set():
+            raise CircuitOpenError("newsapi circuit opened during harvest")
+        return dict(self.stats)
+
+
+async def run_backfill(
+    news_api_key: str,
+    queries: List[str],
+    days: int,
+    checkpoints: BackfillCheckpoints,
+    store: Callable[[List[NewsArticle]], Awaitable[None]],
+    window: timedelta = timedelta(days=1),
+    end: Optional[datetime] = None,
+    progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    **pipeline_options
+) -> Dict[str, int]:
+    """Harvest `days` of history before `end`, skipping slices completed by earlier runs"""
+    end = end or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    slices = plan_slices(queries, end - timedelta(days=days), end, window)
+    done = await checkpoints.start({"queries": queries, "days": days, "end": end})
+    pending = [s for s in slices if s.key not in done]
+    completed = len(slices) - len(pending)
+    logger.info(f"Backfill {checkpoints.backfill_id}: {len(pending)} of {len(slices)} slices to harvest")
+
+    async def on_slice_done(harvest_slice: HarvestSlice, stored: int):
+        nonlocal completed
+        completed += 1
+        await checkpoints.mark_done(harvest_slice.key, stored)
+        if progress:
+            await progress(completed, len(slices))
+
+    try:
+        async with NewsAPIClient(news_api_key) as client:
+            pipeline = NewsHarvestPipeline(client, store, on_slice_done=on_slice_done, **pipeline_options)
+            stats = await pipeline.run(pending)
+    except BaseException:
+        await checkpoints.finish("interrupted")
+        raise
+
+    await checkpoints.finish("completed" if stats["slices_failed"] == 0 else "partial")
+    return {**stats, "slices_total": len(slices), "slices_skipped": len(slices) - len(pending)}
@@ -0,0 +1,72 @@
+"""Prediction and trend models shared by the LLM and the local predictors.
+
+Kept free of the LLM client stack so the statistical predictor and its
+tests do not need it installed.
+"""
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import BaseModel, Field, validator
+
+class CrimePrediction(BaseModel):
+    id: str = Field(default_factory=lambda: str(__import__('uuid').uuid4()))
+    prediction_text: str
+    confidence_level: str  # "low", "medium", "high"
+    crime_type: str
+    location_area: str
+    risk_factors: List[str] = []
+    preventive_measures: List[str] = []
+    valid_until: datetime
+    data_sources: List[str] = []
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class TrendAnalysis(BaseModel):
+    trend_type: str  # "increasing", "decreasing", "stable"
+    crime_categories: List[str]
+    time_period: str
+    key_insights: List[str]
+    statistical_summary: Dict[str, Any]
+
+class TrendState(BaseModel):
+    """Rolling trend state carried between refreshes.
+
+    `articles` holds, per article URL, the few fields the window statistics
+    need, so the LLM only has to look at articles it has not seen before.
+    Entries are a list rather than a URL-keyed map: URLs contain dots and
+    are not safe as Mongo field names.
+    """
+    trend_type: str = "stable"
+    crime_categories: List[str] = []
+    key_insights: List[str] = []
+    articles: List[Dict[str, Any]] = []
+    updated_at: Optional[datetime] = None
+
+    @validator("articles", pre=True)
+    def articles_as_list(cls, value):
+        # States saved before entries became a list map URL -> entry
+        if isinstance(value, dict):
+            return [{"url": url, **entry} for url, entry in value.items()]
+        return value
+
+    def urls(self) -> Set[str]:
+        return {entry["url"] for entry in self.articles}
+
+    def prune(self, window_days: int, max_articles: int):
+        """Drop articles older than the window, keeping at most `max_articles` newest"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+        recent = [entry for entry in self.articles if _as_utc(entry["published_at"]) >= cutoff]
+        recent.sort(key=lambda entry: _as_utc(entry["published_at"]), reverse=True)
+        self.articles = recent[:max_articles]
+
+    def to_analysis(self, statistical_summary: Dict[str, Any], time_period: str = "past_week") -> TrendAnalysis:
+        return TrendAnalysis(
+            trend_type=self.trend_type,
+            crime_categories=self.crime_categories,
+            time_period=time_period,
+            key_insights=self.key_insights,
+            statistical_summary=statistical_summary
+        )
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands datetimes back naive
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,236 @@
+"""Circuit breakers and bulkheads for external dependencies.
+
+Each dependency (NewsAPI, the LLM provider) gets one `Dependency` in a
+module-level registry, so every handler and background job in the process
+sees the same breaker state. While a breaker is open, calls fail with
+CircuitOpenError without touching the network, letting callers fall back
+to cached or mock data straight away.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class BulkheadFull(Exception):
+    """Raised when a dependency already has its maximum calls in flight"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with half-open probing.
+
+    After `failure_threshold` consecutive failures the breaker opens for
+    `recovery_timeout` seconds. It then lets up to `half_open_max_calls`
+    probe calls through: a successful probe closes it, a failed one opens it
+    again. Exceptions listed in `ignore` neither count as failures nor
+    successes.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        ignore: Tuple[Type[BaseException], ...] = ()
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.ignore = ignore
+        self._state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probes = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self):
+        """Reserve a call or raise CircuitOpenError"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is {state}")
+
+    def record_success(self):
+        """Close after a successful half-open probe.
+
+        While open, successes come from calls that started before the breaker
+        tripped; they say nothing about recovery and are ignored.
+        """
+        state = self.state
+        if state == self.OPEN or (state == self.HALF_OPEN and not self._probes):
+            return
+        if state == self.HALF_OPEN:
+            logger.info(f"Circuit {self.name} closed")
+        self._state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probes = 0
+
+    def reset(self):
+        """Force the breaker closed, e.g. after a manual fix or between tests"""
+        self._state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probes = 0
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        self.consecutive_failures += 1
+        if error is not None:
+            self.last_error = str(error)[:200]
+        if self._state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} failures")
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probes = 0
+
+    def record_ignored(self):
+        """Give back a half-open probe whose call never reached the dependency"""
+        if self._state == self.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def status(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "retry_in_seconds": (
+                round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1)
+                if state == self.OPEN else 0.0
+            ),
+            "last_error": self.last_error,
+        }
+
+
+class Bulkhead:
+    """Caps concurrent calls to one dependency so it cannot tie up every worker"""
+
+    def __init__(self, name: str, max_concurrent: int = 10, max_wait: float = 0.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.max_wait <= 0:
+            self.rejected += 1
+            raise BulkheadFull(f"{self.name}: {self.max_concurrent} calls in flight")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait or None)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFull(f"{self.name}: waited {self.max_wait}s for a slot")
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def status(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+
+
+class Dependency:
+    """Breaker plus optional bulkhead guarding calls to one external service"""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, bulkhead: Optional[Bulkhead] = None):
+        self.name = name
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    @asynccontextmanager
+    async def guard(self):
+        """Run the body as one call to the dependency, recording its outcome"""
+        self.breaker.allow()
+        try:
+            if self.bulkhead:
+                async with self.bulkhead.slot():
+                    yield
+            else:
+                yield
+        except BulkheadFull:
+            self.breaker.record_ignored()
+            raise
+        except self.breaker.ignore:
+            self.breaker.record_ignored()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.record_ignored()
+            raise
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        else:
+            self.breaker.record_success()
+
+    def status(self) -> dict:
+        status = {"available": self.available, "circuit": self.breaker.status()}
+        if self.bulkhead:
+            status["bulkhead"] = self.bulkhead.status()
+        return status
+
+
+# Shared by every request handler and background job in the process
+_dependencies: Dict[str, Dependency] = {}
+
+
+def dependency(
+    name: str,
+    failure_threshold: int = 5,
+    recovery_timeout: float = 30.0,
+    max_concurrent: Optional[int] = None,
+    max_wait: float = 0.0,
+    ignore: Tuple[Type[BaseException], ...] = ()
+) -> Dependency:
+    """Get the registered dependency `name`, creating it on first use"""
+    registered = _dependencies.get(name)
+    if registered is None:
+        registered = Dependency(
+            name,
+            CircuitBreaker(name, failure_threshold, recovery_timeout, ignore=ignore),
+            Bulkhead(name, max_concurrent, max_wait) if max_concurrent else None
+        )
+        _dependencies[name] = registered
+    return registered
+
+
+def dependency_status() -> Dict[str, dict]:
+    return {name: registered.status() for name, registered in _dependencies.items()}
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def default_holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLost(Exception):
+    """Raised out of `MongoLease.hold()` when another holder took the lease over"""
+
+
+class MongoLease:
+    """Named, expiring lease stored in Mongo, used for leader election.
+
+    The holder renews by acquiring again before `ttl` runs out; if it dies,
+    another worker can take over once the lease expires.
+    """
+
+    def __init__(self, collection, name: str, ttl: timedelta, holder: Optional[str] = None):
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or default_holder_id()
+
+    async def acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            doc = await self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [{"expires_at": {"$lte": now}}, {"holder": self.holder}]
+                },
+                {"$set": {"holder": self.holder, "expires_at": now + self.ttl, "renewed_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lease exists, is unexpired and held by someone else
+            return False
+        return bool(doc) and doc.get("holder") == self.holder
+
+    async def release(self):
+        await self.collection.delete_one({"_id": self.name, "holder": self.holder})
+
+    @asynccontextmanager
+    async def hold(self):
+        """Keep an acquired lease renewed while the body runs, then release it.
+
+        If another holder takes the lease over, the body is cancelled and
+        LeaseLost is raised, so two holders never run it at the same time.
+        """
+        body = asyncio.current_task()
+        lost = False
+
+        async def renew():
+            nonlocal lost
+            while True:
+                await asyncio.sleep(self.ttl.total_seconds() / 3)
+                try:
+                    if not await self.acquire():
+                        logger.warning(f"Lease {self.name} was taken over by another holder")
+                        lost = True
+                        body.cancel()
+                        return
+                except Exception as e:
+                    logger.error(f"Failed to renew lease {self.name}: {str(e)}")
+
+        renewer = asyncio.create_task(renew())
+        try:
+            yield self
+        except asyncio.CancelledError:
+            if not lost:
+                raise
+            body.uncancel()
+            raise LeaseLost(f"Lease {self.name} was taken over by another holder")
+        finally:
+            renewer.cancel()
+            try:
+                await renewer
+            except asyncio.CancelledError:
+                pass
+            if not lost:
+                try:
+                    await self.release()
+                except Exception as e:
+                    logger.error(f"Failed to release lease {self.name}: {str(e)}")
+
+
+class PeriodicTask:
+    """Runs `func` every `interval` seconds on whichever worker holds `lease`.
+
+    Each wait is jittered by +/- `jitter` so a fleet does not wake in lockstep.
+    After a failure the next attempt backs off exponentially (with jitter) up
+    to `max_backoff` seconds, then returns to the normal cadence on success.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: float,
+        lease: Optional[MongoLease] = None,
+        jitter: float = 0.1,
+        initial_delay: float = 5.0,
+        base_backoff: float = 30.0,
+        max_backoff: float = 1800.0
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.lease = lease
+        self.jitter = jitter
+        self.initial_delay = initial_delay
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease:
+            try:
+                await self.lease.release()
+            except Exception as e:
+                logger.warning(f"Failed to release lease for {self.name}: {str(e)}")
+
+    def next_delay(self) -> float:
+        if self.failures:
+            backoff = min(self.base_backoff * (2 ** (self.failures - 1)), self.max_backoff)
+            return backoff * random.uniform(0.5, 1.0)
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def run_once(self) -> bool:
+        """Run the task if this worker is leader; returns whether it ran"""
+        if self.lease and not await self.lease.acquire():
+            return False
+
+        try:
+            await self.func()
+            self.failures = 0
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)[:200]
+            logger.error(f"Scheduled task {self.name} failed ({self.failures} in a row): {str(e)}")
+        finally:
+            self.last_run_at = datetime.now(timezone.utc)
+        return True
+
+    async def _loop(self):
+        await asyncio.sleep(self.initial_delay * random.uniform(0.5, 1.5))
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lease errors (e.g. Mongo unreachable) count as failures too
+                self.failures += 1
+                logger.error(f"Scheduler {self.name} error: {str(e)}")
+            await asyncio.sleep(self.next_delay())
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "consecutive_failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error,
+        }
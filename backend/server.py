@@ -1,6 +1,7 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
@@ -14,10 +15,34 @@ import jwt
 from passlib.context import CryptContext
 import bcrypt
 import re
+import json
 import asyncio
-from news_fetcher import fetch_crime_news, NewsArticle
-from ai_predictor import AICrimePredictor, CrimePrediction, TrendAnalysis
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from news_fetcher import fetch_crime_news, crime_queries, NewsArticle, newsapi_dependency
+from news_cache import NewsResponseCache
+from news_ingest import NewsIngestState
+from news_pipeline import BackfillCheckpoints, run_backfill
+from batch_scoring import BatchScorer
+from geocoding import GeocodingService
+from geofence import campus_zones
+from sos_dispatch import DispatchQueue, DispatchWorkers, delivery_provider_from_env, sos_dispatch_jobs
+from sos_tracking import LocationPing, SOSTracker, ensure_timeseries
+from sos_escalation import EscalationPolicy, SOSEscalator
+from sos_listing import BBox, alert_filter, ensure_alert_indexes, nearest_page, recent_page
+from ai_predictor import AICrimePredictor
+from prediction_models import CrimePrediction, TrendAnalysis, TrendState
+from local_predictor import LocalCrimePredictor
+from llm_cache import LLMResponseCache
+from jobs import Job, JobContext, JobRunner
+from scheduler import MongoLease, PeriodicTask
+from llm_gateway import LLMGateway
+from intent_classifier import classify_intent
+from chat_sessions import ChatSessionStore
+from resilience import dependency_status
+from voice_assistant import (
+    quick_buttons_for, safety_tip_for, system_prompt_for,
+    fast_path_response, fallback_response, templated_response, llm_deadline_for,
+    FastPathStats, VoiceResponseCache, FALLBACK_BUTTONS
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -26,6 +51,37 @@ load_dotenv(ROOT_DIR / '.env')
 NEWS_API_KEY = os.environ.get('NEWS_API_KEY')
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
 
+# Background AI analysis precompute
+AI_REFRESH_INTERVAL_MINUTES = float(os.environ.get('AI_REFRESH_INTERVAL_MINUTES', '60'))
+AI_REFRESH_SCHEDULER_ENABLED = os.environ.get('AI_REFRESH_SCHEDULER_ENABLED', 'true').lower() == 'true'
+
+# Unfinished news backfills are resumed this often; "partial" ones (some slices
+# failed, e.g. during a NewsAPI outage) only until they have run this many times
+NEWS_BACKFILL_RESUME_MINUTES = float(os.environ.get('NEWS_BACKFILL_RESUME_MINUTES', '30'))
+NEWS_BACKFILL_MAX_ATTEMPTS = int(os.environ.get('NEWS_BACKFILL_MAX_ATTEMPTS', '3'))
+
+# Stored news articles are kept by publication date so backfilled history survives
+NEWS_ARTICLE_RETENTION_DAYS = int(os.environ.get('NEWS_ARTICLE_RETENTION_DAYS', '90'))
+NEWS_LOCATION_FILTER = "campus OR university OR college OR SRM OR academic"
+
+# Reject crime reports located outside the campus geofence (SOS alerts are never rejected)
+GEOFENCE_REQUIRE_CAMPUS = os.environ.get('GEOFENCE_REQUIRE_CAMPUS', 'false').lower() == 'true'
+
+# SOS notification workers, separate from the AI/news background jobs
+SOS_DISPATCH_WORKERS = int(os.environ.get('SOS_DISPATCH_WORKERS', '4'))
+
+# Stored SOS location tracks expire after this many days (time-series collections only)
+SOS_LOCATION_RETENTION_DAYS = int(os.environ.get('SOS_LOCATION_RETENTION_DAYS', '30'))
+
+# Extra numbers (e.g. campus security) notified when an SOS alert escalates, comma-separated
+SOS_ESCALATION_CONTACTS = [p.strip() for p in os.environ.get('SOS_ESCALATION_CONTACTS', '').split(',') if p.strip()]
+
+# Users (e.g. campus security staff) who may see, acknowledge and resolve any SOS alert, comma-separated ids
+SOS_RESPONDER_USER_IDS = {u.strip() for u in os.environ.get('SOS_RESPONDER_USER_IDS', '').split(',') if u.strip()}
+
+# Spill chatbot sessions evicted from memory to Mongo
+CHAT_SESSION_MONGO_SPILL = os.environ.get('CHAT_SESSION_MONGO_SPILL', 'false').lower() == 'true'
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -96,8 +152,8 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 class LocationData(BaseModel):
-    lat: float
-    lng: float
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
     address: str
     source: Optional[str] = "unknown"  # "current", "search", "map", "unknown"
 
@@ -111,6 +167,9 @@ class CrimeReport(BaseModel):
     severity: str  # "low", "medium", "high"
     status: str = "pending"  # "pending", "investigating", "resolved"
     is_anonymous: bool = False
+    zone_id: Optional[str] = None  # most specific geofence zone
+    zone_ids: List[str] = []  # every zone containing the location
+    on_campus: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class CrimeReportCreate(BaseModel):
@@ -131,6 +190,9 @@ class CrimeReportResponse(BaseModel):
     severity: str
     status: str
     is_anonymous: bool
+    zone_id: Optional[str] = None
+    zone_ids: List[str] = []
+    on_campus: bool = False
     created_at: datetime
 
 class SOSAlert(BaseModel):
@@ -139,9 +201,27 @@ class SOSAlert(BaseModel):
     location: LocationData
     emergency_type: str = "general"  # "general", "medical", "security", "fire"
     status: str = "active"  # "active", "resolved"
-    trusted_contacts_notified: List[str] = []
+    trusted_contacts_notified: List[str] = []  # contacts with a delivered notification
+    dispatch_enqueued: bool = False
+    dispatch_receipts: List[Dict[str, Any]] = []
+    zone_id: Optional[str] = None
+    zone_ids: List[str] = []
+    on_campus: bool = False
+    last_location: Optional[Dict[str, Any]] = None  # latest streamed position, written in batches
+    last_location_at: Optional[datetime] = None
+    escalation_level: int = 0  # escalations sent while nobody acknowledged the alert
+    escalate_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # auto-resolved as "expired" after this
+    acknowledged_at: Optional[datetime] = None
+    acknowledged_by: Optional[str] = None
+    resolved_at: Optional[datetime] = None
+    resolved_by: Optional[str] = None
+    resolution: Optional[str] = None  # "resolved", "expired"
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class SOSAlertListItem(SOSAlert):
+    distance_m: Optional[float] = None  # set when sorted by proximity
+
 class SOSCreate(BaseModel):
     location: LocationData
     emergency_type: str = "general"
@@ -231,8 +311,10 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
+
+async def user_from_token(token: str) -> User:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("sub")
         if user_id is None:
@@ -323,8 +405,16 @@ async def login(login_data: UserLogin):
 # Crime reporting routes
 @api_router.post("/crimes/report", response_model=CrimeReportResponse)
 async def report_crime(crime_data: CrimeReportCreate, current_user: User = Depends(get_current_user)):
+    zone = campus_zones.classify(crime_data.location.lat, crime_data.location.lng)
+    if GEOFENCE_REQUIRE_CAMPUS and not zone.on_campus:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Reported location is outside the SRM KTR campus"
+        )
+    
     crime_dict = crime_data.dict()
     crime_dict["user_id"] = current_user.id
+    crime_dict.update(zone.dict())
     crime = CrimeReport(**crime_dict)
     
     await db.crime_reports.insert_one(crime.dict())
@@ -362,23 +452,343 @@ async def get_map_data():
     return {"crimes": map_data}
 
 # SOS routes
+sos_dispatch_queue = DispatchQueue(db.dispatch_jobs)
+sos_dispatch_workers = DispatchWorkers(
+    sos_dispatch_queue, delivery_provider_from_env(), receipts=db.sos_alerts, concurrency=SOS_DISPATCH_WORKERS
+)
+
 @api_router.post("/sos/alert", response_model=SOSAlert)
 async def create_sos_alert(sos_data: SOSCreate, current_user: User = Depends(get_current_user)):
-    # Get trusted contacts for notification
-    trusted_contacts_phones = [contact.phone for contact in current_user.trusted_contacts]
-    
     sos_dict = sos_data.dict()
     sos_dict["user_id"] = current_user.id
-    sos_dict["trusted_contacts_notified"] = trusted_contacts_phones
+    sos_dict.update(campus_zones.classify(sos_data.location.lat, sos_data.location.lng).dict())
+    sos_dict["created_at"] = datetime.now(timezone.utc)
+    sos_dict.update(sos_escalator.deadlines(sos_dict["created_at"]))
     sos_alert = SOSAlert(**sos_dict)
     
     await db.sos_alerts.insert_one(sos_alert.dict())
+    sos_escalator.schedule(sos_alert.dict())
+    
+    # Respond as soon as the alert is stored; notifications are queued in the
+    # background and recover_sos_dispatch re-queues any this task missed
+    task = asyncio.create_task(enqueue_sos_dispatch(sos_alert.dict(), current_user))
+    sos_enqueue_tasks.add(task)
+    task.add_done_callback(sos_enqueue_tasks.discard)
     return sos_alert
 
-@api_router.get("/sos/alerts", response_model=List[SOSAlert])
-async def get_sos_alerts():
-    alerts = await db.sos_alerts.find().sort("created_at", -1).to_list(100)
-    return [SOSAlert(**alert) for alert in alerts]
+# Background enqueue tasks, referenced until done
+sos_enqueue_tasks = set()
+
+async def enqueue_sos_dispatch(alert: Dict[str, Any], user: User):
+    try:
+        jobs = sos_dispatch_jobs(alert, user.name, [contact.dict() for contact in user.trusted_contacts])
+        await sos_dispatch_queue.enqueue(jobs)
+        await db.sos_alerts.update_one({"id": alert["id"]}, {"$set": {"dispatch_enqueued": True}})
+        sos_dispatch_workers.notify()
+    except Exception as e:
+        logger.error(f"Error queueing SOS notifications for alert {alert['id']}: {str(e)}")
+
+async def recover_sos_dispatch(max_age: timedelta = timedelta(hours=24)):
+    """Queue notifications for recent active alerts whose enqueue never completed"""
+    since = datetime.now(timezone.utc) - max_age
+    recovered = 0
+    async for alert in db.sos_alerts.find({"status": "active", "dispatch_enqueued": False, "created_at": {"$gte": since}}):
+        user = await db.users.find_one({"id": alert["user_id"]})
+        if user:
+            await enqueue_sos_dispatch(alert, User(**user))
+            recovered += 1
+    if recovered:
+        logger.info(f"Re-queued SOS notifications for {recovered} alerts")
+
+# SOS escalation and expiry
+async def escalate_sos_alert(alert: Dict[str, Any], level: int):
+    """Notify trusted contacts again, plus the escalation contacts, at SOS priority"""
+    user = await db.users.find_one({"id": alert["user_id"]})
+    if user is None:
+        return
+    user = User(**user)
+    contacts = [contact.dict() for contact in user.trusted_contacts]
+    contacts += [{"name": "Campus security", "phone": phone} for phone in SOS_ESCALATION_CONTACTS]
+    await sos_dispatch_queue.enqueue(sos_dispatch_jobs(alert, user.name, contacts, level=level))
+    sos_dispatch_workers.notify()
+    logger.warning(f"SOS alert {alert['id']} escalated to level {level}")
+
+async def close_sos_tracking(alert: Dict[str, Any]):
+    sos_tracker.close_session(alert["id"])
+
+sos_escalator = SOSEscalator(
+    db.sos_alerts, EscalationPolicy.from_env(), on_escalate=escalate_sos_alert, on_resolve=close_sos_tracking
+)
+
+def is_sos_responder(user: User) -> bool:
+    return user.id in SOS_RESPONDER_USER_IDS
+
+@api_router.post("/sos/{alert_id}/acknowledge", response_model=SOSAlert)
+async def acknowledge_sos_alert(alert_id: str, current_user: User = Depends(get_current_user)):
+    """A responder has seen the alert; stops further escalation"""
+    if not is_sos_responder(current_user):
+        raise HTTPException(status_code=403, detail="Only SOS responders can acknowledge alerts")
+    alert = await sos_escalator.acknowledge(alert_id, current_user.id)
+    if alert is None:
+        alert = await db.sos_alerts.find_one({"id": alert_id})
+        if alert is None:
+            raise HTTPException(status_code=404, detail="SOS alert not found")
+        if alert.get("status") != "active":
+            raise HTTPException(status_code=409, detail="SOS alert is no longer active")
+    return SOSAlert(**alert)
+
+@api_router.post("/sos/{alert_id}/resolve", response_model=SOSAlert)
+async def resolve_sos_alert(alert_id: str, current_user: User = Depends(get_current_user)):
+    """Close an alert; allowed for its owner and for responders"""
+    alert = await db.sos_alerts.find_one({"id": alert_id}, {"user_id": 1, "status": 1})
+    if alert is None:
+        raise HTTPException(status_code=404, detail="SOS alert not found")
+    if alert["user_id"] != current_user.id and not is_sos_responder(current_user):
+        raise HTTPException(status_code=403, detail="Only the alert owner or a responder can resolve it")
+    resolved = await sos_escalator.resolve(alert_id, current_user.id)
+    if resolved is None:
+        raise HTTPException(status_code=409, detail="SOS alert is no longer active")
+    return SOSAlert(**resolved)
+
+@api_router.get("/sos/escalation/metrics")
+async def get_sos_escalation_metrics():
+    """Pending lifecycle timers and escalation/expiry counts"""
+    return sos_escalator.metrics()
+
+@api_router.get("/sos/dispatch/metrics")
+async def get_sos_dispatch_metrics():
+    """SOS notification queue depth by status and worker delivery counts"""
+    return {
+        "provider": sos_dispatch_workers.provider.name,
+        "queue": await sos_dispatch_queue.counts(),
+        "workers": sos_dispatch_workers.stats
+    }
+
+# Live SOS location streaming
+sos_tracker = SOSTracker(db.sos_locations, db.sos_alerts)
+
+async def authorize_sos_stream(alert_id: str, user: User):
+    """Allow the alert's owner to stream while it is active; cached per alert"""
+    if sos_tracker.sessions.get(alert_id) == user.id:
+        return
+    alert = await db.sos_alerts.find_one({"id": alert_id}, {"user_id": 1, "status": 1})
+    if alert is None:
+        raise HTTPException(status_code=404, detail="SOS alert not found")
+    if alert["user_id"] != user.id:
+        raise HTTPException(status_code=403, detail="Not your SOS alert")
+    if alert.get("status") != "active":
+        raise HTTPException(status_code=409, detail="SOS alert is no longer active")
+    sos_tracker.open_session(alert_id, user.id)
+
+async def authorize_sos_read(alert_id: str, user: User):
+    """Allow the alert's owner and responders to see where it is"""
+    if is_sos_responder(user) or sos_tracker.sessions.get(alert_id) == user.id:
+        return
+    alert = await db.sos_alerts.find_one({"id": alert_id}, {"user_id": 1})
+    if alert is None:
+        raise HTTPException(status_code=404, detail="SOS alert not found")
+    if alert["user_id"] != user.id:
+        raise HTTPException(status_code=403, detail="Not your SOS alert")
+
+@api_router.post("/sos/{alert_id}/location")
+async def append_sos_location(
+    alert_id: str,
+    pings: List[LocationPing],
+    current_user: User = Depends(get_current_user)
+):
+    """Append buffered pings, e.g. when the client could not hold a WebSocket open"""
+    await authorize_sos_stream(alert_id, current_user)
+    stored = sum(sos_tracker.record(alert_id, ping) for ping in pings)
+    return {"accepted": len(pings), "stored": stored}
+
+@app.websocket("/api/sos/{alert_id}/stream")
+async def stream_sos_location(websocket: WebSocket, alert_id: str, token: str = Query(...)):
+    """Receive JSON location pings without per-message acknowledgements"""
+    try:
+        user = await user_from_token(token)
+        await authorize_sos_stream(alert_id, user)
+    except HTTPException as e:
+        await websocket.close(code=4000 + e.status_code, reason=str(e.detail))
+        return
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                ping = LocationPing(**await websocket.receive_json())
+            except (ValueError, TypeError):
+                continue  # skip malformed pings, keep the stream open
+            if alert_id not in sos_tracker.sessions:
+                # Resolved or expired since the stream opened
+                await websocket.close(code=4409, reason="SOS alert is no longer active")
+                return
+            sos_tracker.record(alert_id, ping)
+    except WebSocketDisconnect:
+        pass
+
+@api_router.get("/sos/{alert_id}/location")
+async def get_sos_location(alert_id: str, current_user: User = Depends(get_current_user)):
+    """Latest position of an alert: live from memory, else the last one written"""
+    await authorize_sos_read(alert_id, current_user)
+    position = sos_tracker.live.get(alert_id)
+    if position:
+        return {"alert_id": alert_id, "live": True, **position.dict(exclude={"alert_id"})}
+    alert = await db.sos_alerts.find_one({"id": alert_id}, {"_id": 0, "location": 1, "last_location": 1, "last_location_at": 1, "created_at": 1})
+    if alert is None:
+        raise HTTPException(status_code=404, detail="SOS alert not found")
+    location = alert.get("last_location") or alert["location"]
+    return {
+        "alert_id": alert_id,
+        "live": False,
+        "lat": location["lat"],
+        "lng": location["lng"],
+        "accuracy": location.get("accuracy"),
+        "at": alert.get("last_location_at") or alert.get("created_at")
+    }
+
+@api_router.get("/sos/{alert_id}/track")
+async def get_sos_track(
+    alert_id: str,
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user)
+):
+    """Stored (downsampled) pings of an alert, oldest first"""
+    await authorize_sos_read(alert_id, current_user)
+    return {"alert_id": alert_id, "points": await sos_tracker.track(alert_id, limit)}
+
+@api_router.get("/sos/tracking/metrics")
+async def get_sos_tracking_metrics():
+    """Live streaming sessions and batched location write counts"""
+    return sos_tracker.metrics()
+
+@api_router.get("/sos/alerts", response_model=List[SOSAlertListItem])
+async def get_sos_alerts(
+    response: Response,
+    alert_status: str = Query("active", alias="status", pattern="^(active|resolved|all)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lng: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lng: Optional[float] = Query(None, ge=-180, le=180),
+    sort: str = Query("recent", pattern="^(recent|nearest)$"),
+    near_lat: Optional[float] = Query(None, ge=-90, le=90),
+    near_lng: Optional[float] = Query(None, ge=-180, le=180),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """SOS alerts, active ones newest first by default.
+
+    Responders see every user's alerts; anyone else only their own. The next
+    page's cursor is returned in the X-Next-Cursor header (absent on the last
+    page), so the body stays a plain list.
+    """
+    corners = (min_lat, min_lng, max_lat, max_lng)
+    if any(v is not None for v in corners) and any(v is None for v in corners):
+        raise HTTPException(status_code=422, detail="bbox needs min_lat, min_lng, max_lat and max_lng")
+    bbox = BBox(min_lat=min_lat, min_lng=min_lng, max_lat=max_lat, max_lng=max_lng) if min_lat is not None else None
+    owner = None if is_sos_responder(current_user) else current_user.id
+    query = alert_filter(None if alert_status == "all" else alert_status, since, until, bbox, user_id=owner)
+    try:
+        if sort == "nearest":
+            if near_lat is None or near_lng is None:
+                raise HTTPException(status_code=422, detail="sort=nearest needs near_lat and near_lng")
+            page = await nearest_page(db.sos_alerts, query, (near_lat, near_lng), limit, cursor)
+        else:
+            page = await recent_page(db.sos_alerts, query, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return [SOSAlertListItem(**alert) for alert in page.alerts]
+
+# Geocoding proxy routes (cached; the browser no longer calls Mapbox directly)
+@api_router.get("/geo/reverse")
+async def reverse_geocode(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        result = await geocoder.reverse(lat, lng)
+    except Exception as e:
+        logger.error(f"Reverse geocoding failed: {str(e)}")
+        result = None
+    return {
+        "place_name": result.place_name if result else f"{lat:.4f}, {lng:.4f}",
+        "found": result is not None,
+        "result": result
+    }
+
+@api_router.get("/geo/search")
+async def search_geocode(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(5, ge=1, le=10),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        results = await geocoder.search(q, limit)
+    except Exception as e:
+        logger.error(f"Address search failed: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Address search is unavailable")
+    return {"results": results}
+
+@api_router.get("/geo/metrics")
+async def get_geo_metrics():
+    """Geocoding cache tiers and provider call counts"""
+    return geocoder.stats()
+
+# Geofence zone routes
+@api_router.get("/zones")
+async def get_zones():
+    return {"zones": [
+        {"zone_id": zone.zone_id, "name": zone.name, "kind": zone.kind, "polygon": zone.polygon}
+        for zone in campus_zones.zones
+    ]}
+
+@api_router.get("/zones/lookup")
+async def lookup_zone(lat: float = Query(..., ge=-90, le=90), lng: float = Query(..., ge=-180, le=180)):
+    match = campus_zones.classify(lat, lng)
+    return {**match.dict(), "zone_name": campus_zones.name_of(match.zone_id)}
+
+@api_router.get("/zones/rollup")
+async def get_zone_rollup(days: int = Query(30, ge=1, le=365)):
+    """Crime report counts per zone and crime type; reports count towards every zone containing them"""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = await db.crime_reports.aggregate([
+        {"$match": {"created_at": {"$gte": since}, "zone_ids.0": {"$exists": True}}},
+        {"$unwind": "$zone_ids"},
+        {"$group": {"_id": {"zone_id": "$zone_ids", "crime_type": "$crime_type"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    
+    rollup: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        zone_id = row["_id"]["zone_id"]
+        entry = rollup.setdefault(zone_id, {
+            "zone_id": zone_id, "name": campus_zones.name_of(zone_id), "total": 0, "by_crime_type": {}
+        })
+        entry["total"] += row["count"]
+        entry["by_crime_type"][row["_id"]["crime_type"]] = row["count"]
+    return {"days": days, "zones": sorted(rollup.values(), key=lambda entry: -entry["total"])}
+
+@api_router.get("/zones/{zone_id}/crimes", response_model=List[CrimeReportResponse])
+async def get_zone_crimes(zone_id: str, limit: int = Query(50, ge=1, le=500)):
+    if zone_id not in campus_zones.by_id:
+        raise HTTPException(status_code=404, detail="Zone not found")
+    crimes = await db.crime_reports.find({"zone_ids": zone_id}).sort("created_at", -1).limit(limit).to_list(limit)
+    return [CrimeReportResponse(**crime) for crime in crimes]
+
+async def tag_untagged_locations(collection):
+    """Tag documents stored before geofencing with their zones"""
+    tagged = 0
+    async for doc in collection.find({"zone_ids": {"$exists": False}}, {"_id": 1, "location": 1}):
+        location = doc.get("location") or {}
+        if location.get("lat") is None or location.get("lng") is None:
+            continue
+        match = campus_zones.classify(location["lat"], location["lng"])
+        await collection.update_one({"_id": doc["_id"]}, {"$set": match.dict()})
+        tagged += 1
+    return tagged
 
 # Get user's trusted contacts
 @api_router.get("/user/trusted-contacts")
@@ -439,121 +849,267 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
     }
 
 # Enhanced AI Predictions routes
+local_predictor = LocalCrimePredictor()
+llm_cache = LLMResponseCache(db.llm_cache)
+llm_gateway = LLMGateway(EMERGENT_LLM_KEY)
+news_response_cache = NewsResponseCache.from_env(db.news_api_cache)
+news_batch_scorer = BatchScorer()
+geocoder = GeocodingService.from_env(db.geocode_cache)
+job_runner = JobRunner(db.ai_jobs)
+
+async def load_recent_crime_reports() -> List[Dict[str, Any]]:
+    """Crime reports inside the local predictor's lookback window"""
+    since = datetime.now(timezone.utc) - timedelta(weeks=local_predictor.lookback_weeks)
+    return await db.crime_reports.find(
+        {"created_at": {"$gte": since}},
+        {"_id": 0, "created_at": 1, "crime_type": 1, "severity": 1, "location": 1, "zone_id": 1}
+    ).to_list(10000)
+
+def to_enhanced_predictions(predictions: List[CrimePrediction]) -> List[EnhancedAIPrediction]:
+    return [
+        EnhancedAIPrediction(
+            id=pred.id,
+            prediction_text=pred.prediction_text,
+            confidence_level=pred.confidence_level,
+            crime_type=pred.crime_type,
+            location_area=pred.location_area,
+            risk_factors=pred.risk_factors,
+            preventive_measures=pred.preventive_measures,
+            data_sources=pred.data_sources,
+            valid_until=pred.valid_until,
+            created_at=pred.created_at
+        )
+        for pred in predictions
+    ]
+
+async def get_local_ai_predictions(reports: List[Dict[str, Any]]) -> AIAnalysisResponse:
+    """Fast path: statistical predictions from our own crime reports, no network calls"""
+    predictions = local_predictor.predict(reports)
+    summary = local_predictor.summary()
+    slope = summary.get("average_trend_slope", 0.0)
+    if slope > 0.1:
+        trend_type = "increasing"
+    elif slope < -0.1:
+        trend_type = "decreasing"
+    else:
+        trend_type = "stable"
+
+    trend_analysis = CrimeTrendAnalysis(
+        trend_type=trend_type,
+        crime_categories=list(summary.get("reports_by_type", {}).keys()),
+        time_period=f"past_{local_predictor.lookback_weeks}_weeks",
+        key_insights=[pred.prediction_text for pred in predictions],
+        statistical_summary=summary
+    )
+    safety_tips = await AICrimePredictor.generate_safety_tips(predictions)
+
+    return AIAnalysisResponse(
+        predictions=to_enhanced_predictions(predictions),
+        trend_analysis=trend_analysis,
+        safety_tips=safety_tips,
+        news_articles_analyzed=0,
+        last_updated=datetime.now(timezone.utc)
+    )
+
 @api_router.get("/ai/predictions", response_model=AIAnalysisResponse)
-async def get_enhanced_ai_predictions(background_tasks: BackgroundTasks):
+async def get_enhanced_ai_predictions():
     """Get AI-powered crime predictions based on real news data analysis"""
     
     try:
-        # Check if we have API keys
-        if not NEWS_API_KEY or not EMERGENT_LLM_KEY:
-            # Fall back to mock predictions if keys not available
-            return await get_mock_ai_predictions()
-        
         # Try to get recent cached analysis first
         recent_analysis = await db.ai_analysis.find_one(
-            {"analysis_date": {"$gte": datetime.now(timezone.utc) - timedelta(hours=6)}},
-            sort=[("analysis_date", -1)]
+            {"last_updated": {"$gte": datetime.now(timezone.utc) - timedelta(hours=6)}},
+            sort=[("last_updated", -1)]
         )
         
         if recent_analysis:
             # Return cached analysis if less than 6 hours old
             return AIAnalysisResponse(**recent_analysis)
         
-        # Fetch new crime news data
-        try:
-            crime_articles = await fetch_crime_news(
-                news_api_key=NEWS_API_KEY,
-                location_filter="campus OR university OR college OR SRM OR academic",
-                max_articles=30
-            )
-        except Exception as e:
-            logging.error(f"Error fetching news: {str(e)}")
-            # Fall back to mock if news fetch fails
-            return await get_mock_ai_predictions()
-        
-        # Initialize AI predictor
-        ai_predictor = AICrimePredictor(EMERGENT_LLM_KEY)
+        # Answer immediately from the local statistical model; the LLM
+        # analysis is computed by a background job and cached for later reads
+        reports = await load_recent_crime_reports()
         
-        # Analyze trends
-        try:
-            trend_analysis = await ai_predictor.analyze_crime_trends(crime_articles)
-        except Exception as e:
-            logging.error(f"Error in trend analysis: {str(e)}")
-            trend_analysis = TrendAnalysis(
-                trend_type="stable",
-                crime_categories=["general"],
-                time_period="past_week",
-                key_insights=["Analysis temporarily unavailable"],
-                statistical_summary={"total_articles": len(crime_articles)}
-            )
+        # Skip the refresh while NewsAPI or the LLM provider is known to be down
+        news_up = news_response_cache.offline or newsapi_dependency.available
+        dependencies_up = news_up and llm_gateway.dependency.available
+        if NEWS_API_KEY and EMERGENT_LLM_KEY and dependencies_up:
+            await job_runner.submit("ai_analysis_refresh", run_ai_analysis_job)
         
-        # Generate predictions
-        try:
-            predictions = await ai_predictor.generate_predictions(crime_articles, trend_analysis)
-        except Exception as e:
-            logging.error(f"Error generating predictions: {str(e)}")
-            predictions = []
-        
-        # Generate safety tips
-        try:
-            safety_tips = await ai_predictor.generate_safety_tips(predictions)
-        except Exception as e:
-            logging.error(f"Error generating safety tips: {str(e)}")
-            safety_tips = [
-                "Stay aware of your surroundings",
-                "Travel in groups when possible",
-                "Report suspicious activity to campus security"
-            ]
-        
-        # Convert to response models
-        enhanced_predictions = []
-        for pred in predictions:
-            enhanced_pred = EnhancedAIPrediction(
-                id=pred.id,
-                prediction_text=pred.prediction_text,
-                confidence_level=pred.confidence_level,
-                crime_type=pred.crime_type,
-                location_area=pred.location_area,
-                risk_factors=pred.risk_factors,
-                preventive_measures=pred.preventive_measures,
-                data_sources=pred.data_sources,
-                valid_until=pred.valid_until,
-                created_at=pred.created_at
-            )
-            enhanced_predictions.append(enhanced_pred)
-        
-        # Create trend analysis model
-        trend_analysis_model = CrimeTrendAnalysis(
-            trend_type=trend_analysis.trend_type,
-            crime_categories=trend_analysis.crime_categories,
-            time_period=trend_analysis.time_period,
-            key_insights=trend_analysis.key_insights,
-            statistical_summary=trend_analysis.statistical_summary
-        )
-        
-        # Create response
-        analysis_response = AIAnalysisResponse(
-            predictions=enhanced_predictions,
-            trend_analysis=trend_analysis_model,
-            safety_tips=safety_tips,
-            news_articles_analyzed=len(crime_articles),
-            last_updated=datetime.now(timezone.utc)
-        )
-        
-        # Store analysis in database for caching
-        background_tasks.add_task(
-            store_ai_analysis,
-            analysis_response.dict(),
-            crime_articles
-        )
+        if not reports:
+            return await get_mock_ai_predictions()
         
-        return analysis_response
+        return await get_local_ai_predictions(reports)
         
     except Exception as e:
         logging.error(f"Error in enhanced AI predictions: {str(e)}")
         # Fall back to mock predictions
         return await get_mock_ai_predictions()
 
+async def run_llm_analysis(
+    reports: List[Dict[str, Any]],
+    job: Optional[JobContext] = None
+) -> Optional[AIAnalysisResponse]:
+    """Full news + LLM pipeline; the local model's predictions seed the LLM fallback.
+
+    The new analysis is inserted before older ones are pruned, so readers
+    always find a cached document.
+    """
+    job = job or JobContext()
+    
+    # Fetch only articles published since the last cycle, then analyze them
+    # together with the recent ones already stored
+    try:
+        async with job.stage("fetch_news", progress=0.3):
+            ingest = await NewsIngestState(db.news_ingest_state, db.news_articles).load()
+            new_articles = await fetch_crime_news(
+                news_api_key=NEWS_API_KEY,
+                location_filter=NEWS_LOCATION_FILTER,
+                max_articles=30,
+                cache=news_response_cache,
+                ingest=ingest
+            )
+            crime_articles = merge_news_articles(new_articles, await load_stored_news_articles(), limit=30)
+    except Exception as e:
+        logging.error(f"Error fetching news: {str(e)}")
+        return None
+    job.metrics["new_articles"] = len(new_articles)
+    
+    # Initialize AI predictor with the rolling trend state from the previous cycle
+    ai_predictor = AICrimePredictor(
+        EMERGENT_LLM_KEY,
+        cache=llm_cache,
+        trend_state=await load_trend_state(),
+        gateway=llm_gateway
+    )
+    baseline = local_predictor.predict(reports) if reports else None
+    
+    # Analyze trends
+    try:
+        async with job.stage("trend_analysis", progress=0.55):
+            trend_analysis = await ai_predictor.analyze_crime_trends(crime_articles)
+    except Exception as e:
+        logging.error(f"Error in trend analysis: {str(e)}")
+        trend_analysis = TrendAnalysis(
+            trend_type="stable",
+            crime_categories=["general"],
+            time_period="past_week",
+            key_insights=["Analysis temporarily unavailable"],
+            statistical_summary={"total_articles": len(crime_articles)}
+        )
+    
+    # Generate predictions
+    try:
+        async with job.stage("predictions", progress=0.8):
+            predictions = await ai_predictor.generate_predictions(crime_articles, trend_analysis, baseline=baseline)
+    except Exception as e:
+        logging.error(f"Error generating predictions: {str(e)}")
+        predictions = baseline or []
+    
+    # Generate safety tips
+    try:
+        async with job.stage("safety_tips", progress=0.85):
+            safety_tips = await ai_predictor.generate_safety_tips(predictions)
+    except Exception as e:
+        logging.error(f"Error generating safety tips: {str(e)}")
+        safety_tips = [
+            "Stay aware of your surroundings",
+            "Travel in groups when possible",
+            "Report suspicious activity to campus security"
+        ]
+    
+    # Create trend analysis model
+    trend_analysis_model = CrimeTrendAnalysis(
+        trend_type=trend_analysis.trend_type,
+        crime_categories=trend_analysis.crime_categories,
+        time_period=trend_analysis.time_period,
+        key_insights=trend_analysis.key_insights,
+        statistical_summary=trend_analysis.statistical_summary
+    )
+    
+    analysis_response = AIAnalysisResponse(
+        predictions=to_enhanced_predictions(predictions),
+        trend_analysis=trend_analysis_model,
+        safety_tips=safety_tips,
+        news_articles_analyzed=len(crime_articles),
+        last_updated=datetime.now(timezone.utc)
+    )
+    
+    async with job.stage("store", progress=1.0):
+        await save_trend_state(ai_predictor.trend_state)
+        await store_ai_analysis(analysis_response.dict(), new_articles)
+        await ingest.commit()
+    job.metrics["llm_errors"] = ai_predictor.llm_errors
+    return analysis_response
+
+async def load_stored_news_articles(days: int = 7, limit: int = 200) -> List[NewsArticle]:
+    """Recently published articles from earlier ingestion cycles"""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    try:
+        docs = await db.news_articles.find(
+            {"published_at": {"$gte": since}}, {"_id": 0}
+        ).sort("published_at", -1).limit(limit).to_list(limit)
+        # Mongo returns naive UTC datetimes
+        return [NewsArticle(**{**doc, "published_at": doc["published_at"].replace(tzinfo=timezone.utc)}) for doc in docs]
+    except Exception as e:
+        logging.error(f"Error loading stored news articles: {str(e)}")
+        return []
+
+def merge_news_articles(new: List[NewsArticle], stored: List[NewsArticle], limit: int) -> List[NewsArticle]:
+    """New and stored articles without duplicate URLs, highest crime score first"""
+    merged = {article.url: article for article in stored}
+    merged.update((article.url, article) for article in new)
+    articles = sorted(merged.values(), key=lambda a: (-(a.crime_score or 0.0), -a.published_at.timestamp()))
+    return articles[:limit]
+
+async def run_ai_analysis_job(job: JobContext) -> Dict[str, Any]:
+    """Job body for an AI analysis refresh"""
+    async with job.stage("load_reports", progress=0.05):
+        reports = await load_recent_crime_reports()
+    
+    analysis = await run_llm_analysis(reports, job)
+    if analysis is None:
+        raise RuntimeError("News fetch failed; keeping the previous analysis")
+    
+    return {
+        "news_articles_analyzed": analysis.news_articles_analyzed,
+        "new_articles": job.metrics.get("new_articles", 0),
+        "predictions": len(analysis.predictions),
+        "llm_errors": job.metrics.get("llm_errors", 0),
+        "last_updated": analysis.last_updated
+    }
+
+async def scheduled_ai_refresh():
+    """Scheduler body: run the refresh job and raise so the scheduler backs off on errors"""
+    job = await job_runner.submit("ai_analysis_refresh", run_ai_analysis_job, requested_by="scheduler")
+    job = await job_runner.wait(job)
+    if job.status == "failed":
+        raise RuntimeError(job.error or "AI analysis refresh failed")
+    if job.result and job.result.get("llm_errors"):
+        raise RuntimeError(f"LLM errors during refresh: {job.result['llm_errors']}")
+
+ai_refresh_scheduler = PeriodicTask(
+    "ai_analysis_refresh",
+    scheduled_ai_refresh,
+    interval=AI_REFRESH_INTERVAL_MINUTES * 60,
+    lease=MongoLease(db.scheduler_leases, "ai_analysis_refresh", ttl=timedelta(minutes=AI_REFRESH_INTERVAL_MINUTES * 2))
+)
+
+async def load_trend_state() -> TrendState:
+    try:
+        doc = await db.ai_trend_state.find_one({"_id": "news_trends"}, {"_id": 0})
+        if doc:
+            return TrendState(**doc)
+    except Exception as e:
+        logging.error(f"Error loading trend state: {str(e)}")
+    return TrendState()
+
+async def save_trend_state(state: TrendState):
+    try:
+        await db.ai_trend_state.replace_one({"_id": "news_trends"}, state.dict(), upsert=True)
+    except Exception as e:
+        logging.error(f"Error saving trend state: {str(e)}")
+
 async def get_mock_ai_predictions() -> AIAnalysisResponse:
     """Fallback mock predictions when API services are unavailable"""
     
@@ -630,43 +1186,45 @@ async def store_ai_analysis(analysis_data: dict, articles: List[NewsArticle]):
         await db.ai_analysis.insert_one(analysis_data)
         
         # Store news articles for future reference
-        for article in articles:
-            article_dict = {
-                "title": article.title,
-                "description": article.description,
-                "content": article.content,
-                "url": article.url,
-                "url_to_image": article.url_to_image,
-                "published_at": article.published_at,
-                "source_name": article.source_name,
-                "source_id": article.source_id,
-                "author": article.author,
-                "crime_score": article.crime_score,
-                "crime_analysis": article.crime_analysis,
-                "locations": article.crime_analysis.get("locations", []) if article.crime_analysis else [],
-                "created_at": datetime.now(timezone.utc)
-            }
-            
-            # Only store if we don't already have this article
-            existing = await db.news_articles.find_one({"url": article.url})
-            if not existing:
-                await db.news_articles.insert_one(article_dict)
+        await store_news_articles(articles)
         
         # Clean up old analysis (keep only last 10)
-        analyses = await db.ai_analysis.find().sort("analysis_date", -1).skip(10).to_list(100)
+        analyses = await db.ai_analysis.find().sort("last_updated", -1).skip(10).to_list(100)
         for old_analysis in analyses:
             await db.ai_analysis.delete_one({"_id": old_analysis["_id"]})
             
-        # Clean up old articles (keep only last 200)
-        old_articles = await db.news_articles.find().sort("created_at", -1).skip(200).to_list(1000)
-        for old_article in old_articles:
-            await db.news_articles.delete_one({"_id": old_article["_id"]})
+        # Clean up articles published before the retention window
+        cutoff = datetime.now(timezone.utc) - timedelta(days=NEWS_ARTICLE_RETENTION_DAYS)
+        await db.news_articles.delete_many({"published_at": {"$lt": cutoff}})
             
         logging.info(f"Stored AI analysis with {len(articles)} articles")
         
     except Exception as e:
         logging.error(f"Error storing AI analysis: {str(e)}")
 
+async def store_news_articles(articles: List[NewsArticle]):
+    """Insert articles whose URL is not stored yet"""
+    now = datetime.now(timezone.utc)
+    for article in articles:
+        article_dict = {
+            "title": article.title,
+            "description": article.description,
+            "content": article.content,
+            "url": article.url,
+            "url_to_image": article.url_to_image,
+            "published_at": article.published_at,
+            "source_name": article.source_name,
+            "source_id": article.source_id,
+            "author": article.author,
+            "crime_score": article.crime_score,
+            "crime_analysis": article.crime_analysis,
+            "locations": article.crime_analysis.get("locations", []) if article.crime_analysis else [],
+            "created_at": now
+        }
+        
+        # Only store if we don't already have this article
+        await db.news_articles.update_one({"url": article.url}, {"$setOnInsert": article_dict}, upsert=True)
+
 # Get recent news articles
 @api_router.get("/ai/news-articles")
 async def get_recent_news_articles(limit: int = 10):
@@ -690,267 +1248,410 @@ async def get_recent_news_articles(limit: int = 10):
         }
 
 # Force refresh AI analysis
-@api_router.post("/ai/refresh-analysis")
-async def refresh_ai_analysis(background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
-    """Force refresh of AI analysis (requires authentication)"""
+@api_router.post("/ai/refresh-analysis", status_code=status.HTTP_202_ACCEPTED)
+async def refresh_ai_analysis(current_user: User = Depends(get_current_user)):
+    """Start a background refresh of the AI analysis (requires authentication).
+
+    Returns a job id immediately; poll /api/ai/jobs/{job_id} for progress.
+    The previous analysis keeps being served until the new one is stored.
+    """
+    
+    if not NEWS_API_KEY or not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=503, detail="AI analysis services are not configured")
     
     try:
-        # Delete cached analysis to force refresh
-        await db.ai_analysis.delete_many({})
-        
-        # Get fresh analysis
-        analysis = await get_enhanced_ai_predictions(background_tasks)
-        
-        return {
-            "message": "AI analysis refreshed successfully",
-            "analysis": analysis,
-            "refreshed_at": datetime.now(timezone.utc).isoformat()
-        }
-        
+        job = await job_runner.submit("ai_analysis_refresh", run_ai_analysis_job, requested_by=current_user.id)
     except Exception as e:
         logging.error(f"Error refreshing AI analysis: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to refresh AI analysis: {str(e)}"
+            detail=f"Failed to start AI analysis refresh: {str(e)}"
         )
+    
+    return {
+        "message": "AI analysis refresh started",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/ai/jobs/{job.id}"
+    }
+
+def news_backfill_id(days: int, end: datetime) -> str:
+    return f"news_backfill_{end:%Y%m%d}_{days}d"
+
+def news_backfill_lease(backfill_id: str) -> MongoLease:
+    """One lease per backfill so no two workers harvest (and spend quota on) the same slices"""
+    return MongoLease(db.scheduler_leases, backfill_id, ttl=timedelta(minutes=2))
+
+def news_backfill_job(days: int, end: datetime, lease: MongoLease):
+    """Job body harvesting `days` of news history before `end`, resuming from checkpoints.
+
+    `lease` must already be acquired; the job renews it while running and releases it at the end.
+    """
+    async def run(job: JobContext) -> Dict[str, Any]:
+        checkpoints = BackfillCheckpoints(db.news_backfills, lease.name)
+        
+        async def progress(done: int, total: int):
+            await job.report_progress(round(done / total, 3))
+        
+        async with lease.hold(), job.stage("harvest"):
+            return await run_backfill(
+                NEWS_API_KEY,
+                crime_queries(NEWS_LOCATION_FILTER),
+                days,
+                checkpoints,
+                store_news_articles,
+                end=end,
+                progress=progress,
+                scorer=news_batch_scorer
+            )
+    return run
+
+@api_router.post("/ai/news/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def start_news_backfill(days: int = 14, current_user: User = Depends(get_current_user)):
+    """Start a background job ingesting past news day by day (requires authentication).
+
+    Re-running a backfill for the same day and range resumes from its checkpoints.
+    Unfinished backfills are also resumed automatically, partial ones up to
+    NEWS_BACKFILL_MAX_ATTEMPTS runs in total.
+    """
+    if not NEWS_API_KEY:
+        raise HTTPException(status_code=503, detail="News API is not configured")
+    if not 1 <= days <= NEWS_ARTICLE_RETENTION_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {NEWS_ARTICLE_RETENTION_DAYS}")
+    
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    running = job_runner.running("news_backfill")
+    if running:
+        raise HTTPException(status_code=409, detail=f"News backfill job {running.id} is already running")
+    lease = news_backfill_lease(news_backfill_id(days, end))
+    if not await lease.acquire():
+        raise HTTPException(status_code=409, detail=f"News backfill {lease.name} is already running")
+    try:
+        job = await job_runner.submit("news_backfill", news_backfill_job(days, end, lease), requested_by=current_user.id)
+    except Exception:
+        await lease.release()
+        raise
+    return {
+        "message": "News backfill started",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/ai/jobs/{job.id}"
+    }
+
+async def resume_news_backfill():
+    """Resubmit the most recent backfill that did not finish, e.g. after a crash or an outage"""
+    # Retrying while NewsAPI is down would only use up attempts
+    if job_runner.running("news_backfill") or not newsapi_dependency.available:
+        return
+    doc = await db.news_backfills.find_one(
+        {"$or": [
+            {"status": {"$in": ["running", "interrupted"]}},
+            {"status": "partial", "attempts": {"$lt": NEWS_BACKFILL_MAX_ATTEMPTS}}
+        ]},
+        sort=[("updated_at", -1)]
+    )
+    if doc:
+        lease = news_backfill_lease(doc["_id"])
+        if not await lease.acquire():
+            logging.info(f"News backfill {doc['_id']} is already running on another worker")
+            return
+        params = doc["params"]
+        logging.info(f"Resuming news backfill {doc['_id']}")
+        try:
+            await job_runner.submit(
+                "news_backfill",
+                news_backfill_job(params["days"], params["end"].replace(tzinfo=timezone.utc), lease),
+                requested_by="startup"
+            )
+        except Exception:
+            await lease.release()
+            raise
+
+news_backfill_resumer = PeriodicTask(
+    "news_backfill_resume",
+    resume_news_backfill,
+    interval=NEWS_BACKFILL_RESUME_MINUTES * 60
+)
+
+@api_router.get("/ai/jobs/{job_id}", response_model=Job)
+async def get_ai_job(job_id: str):
+    """Progress and stage timings of an AI analysis job"""
+    job = await job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/ai/llm-metrics")
+async def get_llm_metrics():
+    """In-flight, queue and limit metrics for the shared LLM gateway"""
+    return llm_gateway.metrics()
 
 # Voice Chatbot Routes
+class VoiceTurn(BaseModel):
+    """Everything about a chatbot turn that is known before the LLM answers"""
+    language: str
+    intent: str
+    message: str
+    session_id: str
+    system_prompt: str
+    context_info: str
+    quick_buttons: List[Dict[str, str]] = []
+    safety_tip: Optional[str] = None
+    conversation_context: Dict[str, Any] = {}
+    fast_response: Optional[str] = None  # templated answer that skips the LLM
+
+voice_fast_path_stats = FastPathStats()
+voice_response_cache = VoiceResponseCache()
+chat_session_store = ChatSessionStore(db.chat_sessions if CHAT_SESSION_MONGO_SPILL else None)
+
+async def prepare_voice_turn(chat_message: VoiceChatMessage):
+    """Resolve language, intent, buttons and safety tip for a chatbot message.
+
+    Returns a VoiceChatResponse when the turn needs no LLM call (language
+    selection), otherwise a VoiceTurn ready to be sent to the LLM.
+    """
+    # Generate session ID if not provided
+    if not chat_message.session_id:
+        chat_message.session_id = f"voice_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+    
+    # Conversation history lives server-side; the client context only carries UI flags
+    session = await chat_session_store.get(chat_message.session_id)
+    context = chat_message.conversation_context or {}
+    language = chat_message.language_preference or session.language or context.get('language', None)
+    
+    # Language selection flow
+    if not language and not context.get('language_asked'):
+        return VoiceChatResponse(
+            response="Hi! I'm Voice, your campus safety assistant. I'm here to help you stay safe at Echo. Which language are you comfortable with?",
+            quick_buttons=[
+                {"text": "English", "action": "select_language", "value": "english"},
+                {"text": "Tamil-English", "action": "select_language", "value": "tamil_english"}
+            ],
+            language_used="english",
+            session_id=chat_message.session_id,
+            conversation_context={"language_asked": True}
+        )
+    
+    # Set language preference
+    if not language and "select_language" in chat_message.message.lower():
+        if "tamil" in chat_message.message.lower():
+            language = "tamil_english"
+        else:
+            language = "english"
+        context['language'] = language
+    
+    # Default to English if still no language set
+    if not language:
+        language = "english"
+        context['language'] = language
+    
+    # Analyze user message and create contextual prompt
+    user_input = chat_message.message.lower()
+    intent_result = classify_intent(user_input)
+    intent = intent_result.intent
+    
+    # Create contextual message for LLM from the compacted session history
+    context_info = (
+        f"User intent detected: {intent}\n"
+        f"Conversation so far:\n{session.prompt_context()}\n"
+        f"User message: {chat_message.message}"
+    )
+    
+    # Update conversation context
+    session.language = language
+    context = {
+        'last_intent': intent,
+        'language': language,
+        'interaction_count': session.interaction_count + 1
+    }
+    
+    # Log intent for metrics (non-PII)
+    intent_log = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "intent_detected": intent,
+        "language_used": language,
+        "session_id": chat_message.session_id
+    }
+    logging.info(f"Voice chatbot intent: {intent_log}")
+    
+    return VoiceTurn(
+        language=language,
+        intent=intent,
+        message=chat_message.message,
+        session_id=chat_message.session_id,
+        system_prompt=system_prompt_for(language),
+        context_info=context_info,
+        quick_buttons=quick_buttons_for(intent),
+        safety_tip=safety_tip_for(language, chat_message.session_id),
+        conversation_context=context,
+        fast_response=fast_path_response(user_input, intent_result, language, chat_message.session_id)
+    )
+
+async def answer_voice_turn(turn: VoiceTurn) -> str:
+    """Answer a turn and record it in the session history"""
+    response = await generate_voice_answer(turn)
+    session = await chat_session_store.get(turn.session_id)
+    chat_session_store.record_turn(session, turn.message, turn.intent, response)
+    return response
+
+async def generate_voice_answer(turn: VoiceTurn) -> str:
+    """Templated answer for unambiguous common intents, then the response cache, then the LLM"""
+    if turn.fast_response is not None:
+        voice_fast_path_stats.record(turn.intent, "fast_path")
+        return turn.fast_response
+    
+    cached = voice_response_cache.get(turn.language, turn.intent, turn.message)
+    if cached is not None:
+        voice_fast_path_stats.record(turn.intent, "cache")
+        return cached
+    
+    # Send message to ChatGPT through the shared gateway; raises LLMOverloaded
+    # when the voice feature is saturated so we fall back immediately
+    llm_task = asyncio.create_task(llm_gateway.complete(
+        "voice", turn.system_prompt, turn.context_info, session_id=turn.session_id
+    ))
+    deadline = llm_deadline_for(turn.intent)
+    done, _ = await asyncio.wait({llm_task}, timeout=deadline)
+    
+    if llm_task in done and llm_task.exception() is None:
+        llm_response = llm_task.result()
+        voice_fast_path_stats.record(turn.intent, "llm")
+        voice_response_cache.set(turn.language, turn.intent, turn.message, llm_response)
+        return llm_response
+    
+    if llm_task in done:
+        # Failed or shed (LLMOverloaded) within the deadline: degrade the same way
+        logging.warning(f"Voice LLM call failed for intent {turn.intent}: {str(llm_task.exception())}")
+        voice_fast_path_stats.record(turn.intent, "llm_error")
+    else:
+        # Past the deadline: answer from the templates now and let the LLM call
+        # finish in the background so its reply can still warm the cache
+        logging.warning(f"Voice LLM missed {deadline}s deadline for intent {turn.intent}")
+        voice_fast_path_stats.record(turn.intent, "deadline")
+        voice_late_answers.add(llm_task)
+        llm_task.add_done_callback(lambda task: store_late_voice_answer(turn, task))
+    
+    cached = voice_response_cache.get(turn.language, turn.intent, turn.message)
+    return (
+        cached
+        or templated_response(turn.intent, turn.language, turn.session_id)
+        or fallback_response(turn.language)[0]
+    )
+
+# LLM calls still running after their turn was answered from templates
+voice_late_answers = set()
+
+def store_late_voice_answer(turn: VoiceTurn, task: asyncio.Task):
+    voice_late_answers.discard(task)
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logging.error(f"Late voice LLM call failed: {str(task.exception())}")
+        return
+    voice_response_cache.set(turn.language, turn.intent, turn.message, task.result())
+
+def voice_fallback_response(chat_message: VoiceChatMessage) -> VoiceChatResponse:
+    # Fallback response with language awareness
+    fallback_lang = chat_message.language_preference or "english"
+    fallback_text, fallback_tip = fallback_response(fallback_lang)
+    
+    return VoiceChatResponse(
+        response=fallback_text,
+        quick_buttons=[dict(button) for button in FALLBACK_BUTTONS],
+        language_used=fallback_lang,
+        intent_detected="error",
+        safety_tip=fallback_tip,
+        session_id=chat_message.session_id or f"error_{str(uuid.uuid4())[:8]}",
+        conversation_context={"error": True}
+    )
+
 @api_router.post("/voice", response_model=VoiceChatResponse)
 async def voice_chat(chat_message: VoiceChatMessage):
     """Adaptive, bilingual voice chatbot powered by Emergent LLM"""
     
     try:
-        # Generate session ID if not provided
-        if not chat_message.session_id:
-            chat_message.session_id = f"voice_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
-        
-        # Get conversation context
-        context = chat_message.conversation_context or {}
-        language = chat_message.language_preference or context.get('language', None)
-        
-        # Language selection flow
-        if not language and not context.get('language_asked'):
-            return VoiceChatResponse(
-                response="Hi! I'm Voice, your campus safety assistant. I'm here to help you stay safe at Echo. Which language are you comfortable with?",
-                quick_buttons=[
-                    {"text": "English", "action": "select_language", "value": "english"},
-                    {"text": "Tamil-English", "action": "select_language", "value": "tamil_english"}
-                ],
-                language_used="english",
-                session_id=chat_message.session_id,
-                conversation_context={"language_asked": True}
-            )
-        
-        # Set language preference
-        if not language and "select_language" in chat_message.message.lower():
-            if "tamil" in chat_message.message.lower():
-                language = "tamil_english"
-            else:
-                language = "english"
-            context['language'] = language
+        turn = await prepare_voice_turn(chat_message)
+        if isinstance(turn, VoiceChatResponse):
+            return turn
         
-        # Default to English if still no language set
-        if not language:
-            language = "english"
-            context['language'] = language
-        
-        # Enhanced system prompt for app-aware responses
-        if language == "tamil_english":
-            system_prompt = """You are Voice, Echo's campus safety assistant. You speak in friendly Tanglish style (mix Tamil words in English letters, casual and natural).
-
-LANGUAGE STYLE:
-- Use Tamil words written in English letters naturally mixed with English
-- Examples: "Enna problem bro?", "Naan help pannuren", "Map paakanum na?", "Report pannalam"
-- Be casual, friendly, and supportive
-- Use "da", "bro", "anna", "thangachi" appropriately
-
-CORE RULES:
-1. Keep responses SHORT (1-2 sentences max)
-2. Be direct and helpful - suggest specific actions
-3. Always end with a simple safety tip
-4. For app actions, be clear: "Report pannalam" or "Map paakalam"
-
-APP-AWARE ACTIONS:
-When user needs help with:
-- Reporting incidents → Suggest "Report pannalam?"
-- Viewing crime locations → Suggest "Map paakalam?"  
-- Emergency help → Suggest "SOS use pannalam?"
-
-EMERGENCY: For serious situations: "Emergency na police ku call pannunga da - 100. Naan call panna mudiyathu."
-"""
-        else:
-            system_prompt = """You are Voice, Echo's friendly campus safety assistant. You help students with short, natural responses.
-
-CORE RULES:
-1. Keep responses SHORT (1-2 sentences max) 
-2. Be direct and helpful - suggest specific actions
-3. Always end with a simple safety tip
-4. For app actions, be clear: "Let's report this" or "Check the map"
-
-APP-AWARE ACTIONS:
-When user needs help with:
-- Reporting incidents → Suggest "Let's report this?"
-- Viewing crime locations → Suggest "Check the map?"
-- Emergency help → Suggest "Use SOS feature?"
-
-EMERGENCY: For serious situations: "Call police immediately at 100. I can't make calls for you."
-"""
-        
-        # Analyze user message and create contextual prompt
-        user_input = chat_message.message.lower()
-        
-        # Intent detection logic - enhanced for contextual action buttons
-        intent = "general"
-        if any(word in user_input for word in ["stolen", "theft", "robbed", "missing phone", "missing wallet"]):
-            intent = "theft_report"
-        elif any(word in user_input for word in ["harassment", "harassed", "bothering", "uncomfortable", "scared"]):
-            intent = "harassment_report"
-        elif any(word in user_input for word in ["signup", "sign up", "register", "account", "create account"]):
-            intent = "account_help"
-        elif any(word in user_input for word in ["signin", "sign in", "login", "password", "forgot password"]):
-            intent = "signin_help"
-        # Enhanced SOS/helplines detection (check BEFORE emergency to avoid overlap)
-        elif any(phrase in user_input for phrase in ["sos", "helpline", "helplines", "emergency contact", "emergency number", "emergency numbers", "need help numbers", "show me emergency contacts"]):
-            intent = "sos_help"
-        # Enhanced map detection (check BEFORE emergency to avoid overlap)
-        elif any(phrase in user_input for phrase in ["map", "crime map", "show map", "view map", "check map", "location", "area", "where", "show me the map"]):
-            intent = "map_help"
-        # Enhanced report detection (check BEFORE emergency to avoid overlap)
-        elif any(phrase in user_input for phrase in ["report", "reporting", "incident", "report incident", "want to report", "need to report", "file report"]):
-            intent = "report_help"
-        # Emergency detection - more specific to avoid catching conversational "help"
-        elif any(phrase in user_input for phrase in ["emergency", "danger", "urgent help", "need urgent", "in danger", "threat", "threatening"]):
-            intent = "emergency"
-        
-        # Create contextual message for LLM
-        context_info = f"User intent detected: {intent}\nUser message: {chat_message.message}\nConversation context: {context}"
-        
-        # Initialize LLM chat
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=chat_message.session_id,
-            system_message=system_prompt
-        ).with_model("openai", "gpt-4o-mini")
-        
-        # Send message to ChatGPT
-        user_message = UserMessage(text=context_info)
-        llm_response = await chat.send_message(user_message)
-        
-        # Generate app-aware quick buttons based on intent
-        quick_buttons = []
-        safety_tip = None
-        
-        if intent == "theft_report":
-            quick_buttons = [
-                {"text": "Report Incident", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Open Report Incident page?"},
-                {"text": "View Map", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Check crime locations on map?"},
-                {"text": "Call Security", "action": "call", "value": "security"}
-            ]
-        elif intent == "harassment_report":
-            quick_buttons = [
-                {"text": "Report Now", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Report this incident now?"},
-                {"text": "Emergency Call", "action": "call", "value": "emergency"},
-                {"text": "SOS Help", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Use SOS feature?"}
-            ]
-        elif intent == "emergency":
-            quick_buttons = [
-                {"text": "Call 100", "action": "call", "value": "emergency"},
-                {"text": "SOS Alert", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Trigger SOS alert?"}
-            ]
-        elif intent == "map_help":
-            quick_buttons = [
-                {"text": "View Map", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Open crime map?"}
-            ]
-        elif intent == "report_help":
-            quick_buttons = [
-                {"text": "Report Incident", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Open report form?"}
-            ]
-        elif intent == "sos_help":
-            quick_buttons = [
-                {"text": "SOS/Helplines", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Access SOS and helpline numbers?"}
-            ]
-        elif intent == "account_help":
-            quick_buttons = [
-                {"text": "Sign Up", "action": "navigate", "value": "/signup"},
-                {"text": "Sign In", "action": "navigate", "value": "/signin"}
-            ]
-        elif intent == "signin_help":
-            quick_buttons = [
-                {"text": "Sign In", "action": "navigate", "value": "/signin"},
-                {"text": "Reset Password", "action": "navigate", "value": "/forgot-password"}
-            ]
-        # NOTE: Removed general help buttons - action buttons now only appear when contextually appropriate
-        
-        # Generate safety tip based on language and context
-        if language == "tamil_english":
-            safety_tips = [
-                "💡 Oru tip: rathri time la group la travel pannunga da, safe ah irukum!",
-                "🔒 Phone la emergency contacts ready ah vekkunga bro!",
-                "🗺️ Puthiya area ku pogumbothu crime map check pannunnga!",
-                "🚨 Suspicious activity patheenga na campus security ku immediately call pannunga!",
-                "💪 Self defense class join pannunnga if possible, useful ah irukum!"
-            ]
-        else:
-            safety_tips = [
-                "💡 Safety tip: Travel in groups during late hours for better security!",
-                "🔒 Keep emergency contacts easily accessible on your phone!",
-                "🗺️ Check the crime map before visiting unfamiliar areas on campus!",
-                "🚨 Report any suspicious activity to campus security immediately!",
-                "💪 Consider joining self-defense classes for personal safety!"
-            ]
-        
-        safety_tip = safety_tips[hash(chat_message.session_id) % len(safety_tips)]
-        
-        # Update conversation context
-        context.update({
-            'last_intent': intent,
-            'language': language,
-            'interaction_count': context.get('interaction_count', 0) + 1
-        })
-        
-        # Log intent for metrics (non-PII)
-        intent_log = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "intent_detected": intent,
-            "language_used": language,
-            "session_id": chat_message.session_id
-        }
-        logging.info(f"Voice chatbot intent: {intent_log}")
+        llm_response = await answer_voice_turn(turn)
         
         return VoiceChatResponse(
             response=llm_response,
-            quick_buttons=quick_buttons,
-            language_used=language,
-            intent_detected=intent,
-            safety_tip=safety_tip,
-            session_id=chat_message.session_id,
-            conversation_context=context
+            quick_buttons=turn.quick_buttons,
+            language_used=turn.language,
+            intent_detected=turn.intent,
+            safety_tip=turn.safety_tip,
+            session_id=turn.session_id,
+            conversation_context=turn.conversation_context
         )
         
     except Exception as e:
         logging.error(f"Error in voice chatbot: {str(e)}")
-        
-        # Fallback response with language awareness
-        fallback_lang = chat_message.language_preference or "english"
-        if fallback_lang == "tamil_english":
-            fallback_response = "Sorry bro, konjam problem irukku. Emergency na police ku call pannunga - 100. Campus security um available ah irukku!"
-            fallback_tip = "🔒 Safe ah irukka emergency contacts ready ah vekkunga!"
-        else:
-            fallback_response = "I'm having trouble right now. For emergencies, call police at 100. Campus security is also available!"
-            fallback_tip = "🔒 Always keep emergency contacts readily available!"
-        
-        return VoiceChatResponse(
-            response=fallback_response,
-            quick_buttons=[
-                {"text": "Call Emergency", "action": "call", "value": "emergency"},
-                {"text": "Try Again", "action": "retry", "value": "true"}
-            ],
-            language_used=fallback_lang,
-            intent_detected="error",
-            safety_tip=fallback_tip,
-            session_id=chat_message.session_id or f"error_{str(uuid.uuid4())[:8]}",
-            conversation_context={"error": True}
-        )
+        return voice_fallback_response(chat_message)
+
+def ndjson_event(event: str, **fields) -> str:
+    return json.dumps({"event": event, **fields}, default=str) + "\n"
+
+@api_router.post("/voice/stream")
+async def voice_chat_stream(chat_message: VoiceChatMessage):
+    """Streaming variant of /voice as newline-delimited JSON events.
+
+    A `meta` event with intent, quick buttons and safety tip is sent as soon
+    as intent detection finishes, followed by `token` events with the reply
+    text and a final `done` event. Errors produce an `error` event carrying
+    the usual fallback response.
+    """
+    
+    async def events():
+        try:
+            turn = await prepare_voice_turn(chat_message)
+            if isinstance(turn, VoiceChatResponse):
+                yield ndjson_event("meta", **turn.dict(exclude={"response"}))
+                yield ndjson_event("token", text=turn.response)
+                yield ndjson_event("done", response=turn.response)
+                return
+            
+            yield ndjson_event(
+                "meta",
+                quick_buttons=turn.quick_buttons,
+                language_used=turn.language,
+                intent_detected=turn.intent,
+                safety_tip=turn.safety_tip,
+                session_id=turn.session_id,
+                conversation_context=turn.conversation_context
+            )
+            
+            # LlmChat only returns whole completions, so the reply arrives as a
+            # single token event once the LLM has answered
+            llm_response = await answer_voice_turn(turn)
+            yield ndjson_event("token", text=llm_response)
+            yield ndjson_event("done", response=llm_response)
+            
+        except Exception as e:
+            logging.error(f"Error in voice chatbot stream: {str(e)}")
+            yield ndjson_event("error", **voice_fallback_response(chat_message).dict())
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/voice/metrics")
+async def get_voice_metrics():
+    """Per-intent fast-path hit rate, response cache and LLM limiter metrics for the chatbot"""
+    return {
+        "fast_path": voice_fast_path_stats.metrics(),
+        "response_cache": voice_response_cache.stats(),
+        "sessions": chat_session_store.memory.stats(),
+        "llm": llm_gateway.limiter("voice").metrics()
+    }
+
+@api_router.get("/health/dependencies")
+async def get_dependency_health():
+    """Circuit breaker and bulkhead state for each external dependency"""
+    return dependency_status()
 
 # Basic route from original code
 @api_router.get("/")
@@ -966,6 +1667,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -975,6 +1677,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_tasks():
+    if geocoder.provider.name == "gazetteer":
+        logger.warning(
+            "Geocoding is using the offline campus gazetteer: only known campus places resolve. "
+            "Set MAPBOX_TOKEN to geocode through Mapbox."
+        )
+    try:
+        await llm_cache.ensure_indexes()
+        await job_runner.ensure_indexes()
+        await chat_session_store.ensure_indexes()
+        await news_response_cache.ensure_indexes()
+        await geocoder.ensure_indexes()
+        await db.news_articles.create_index("url")
+        await db.news_articles.create_index("published_at")
+        await db.crime_reports.create_index([("zone_ids", 1), ("created_at", -1)])
+        await db.sos_alerts.create_index([("zone_ids", 1), ("created_at", -1)])
+        await ensure_alert_indexes(db.sos_alerts)
+        await sos_dispatch_queue.ensure_indexes()
+        await ensure_timeseries(db, "sos_locations", expire_after=SOS_LOCATION_RETENTION_DAYS * 86400)
+    except Exception as e:
+        logger.error(f"Error creating indexes: {str(e)}")
+    
+    try:
+        for collection in (db.crime_reports, db.sos_alerts):
+            await tag_untagged_locations(collection)
+    except Exception as e:
+        logger.error(f"Error tagging geofence zones: {str(e)}")
+    
+    sos_dispatch_workers.start()
+    sos_tracker.start()
+    try:
+        logger.info(f"Scheduled lifecycle timers for {await sos_escalator.rebuild()} active SOS alerts")
+    except Exception as e:
+        logger.error(f"Error rebuilding SOS escalation timers: {str(e)}")
+    sos_escalator.start()
+    try:
+        await recover_sos_dispatch()
+    except Exception as e:
+        logger.error(f"Error recovering SOS dispatch: {str(e)}")
+    
+    if AI_REFRESH_SCHEDULER_ENABLED and NEWS_API_KEY and EMERGENT_LLM_KEY:
+        ai_refresh_scheduler.start()
+    
+    if NEWS_API_KEY:
+        # Each backfill's own lease keeps workers from resuming the same one twice
+        news_backfill_resumer.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await ai_refresh_scheduler.stop()
+    await news_backfill_resumer.stop()
+    await sos_dispatch_workers.stop()
+    await sos_dispatch_workers.provider.close()
+    await sos_escalator.stop()
+    await sos_tracker.stop()
+    news_batch_scorer.close()
+    await geocoder.close()
     client.close()
\ No newline at end of file
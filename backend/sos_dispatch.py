@@ -0,0 +1,410 @@
+"""Durable notification dispatch for SOS alerts.
+
+Each notification (one alert, one channel, one recipient) is a document in
+the `dispatch_jobs` collection whose `_id` is its idempotency key, so
+enqueueing the same notification twice is a no-op and a retried delivery
+carries the same key to the provider.
+
+Workers claim the queued job with the lowest `priority` (SOS is 0, ahead of
+anything else queued) with one atomic `find_one_and_update`, which also sets
+a lease. A worker that dies mid-delivery leaves an expired lease, and the
+job is claimed again. Failures are retried with capped exponential backoff;
+permanent errors (bad number, 4xx) fail the job at once. Every outcome is
+appended to the alert's `dispatch_receipts`.
+
+Workers are dedicated to this queue, so SOS delivery never waits behind
+AI refresh or news backfill jobs, and `notify()` wakes them as soon as
+something is enqueued instead of at the next poll.
+"""
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+
+from resilience import dependency
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_SOS = 0
+PRIORITY_DEFAULT = 10
+
+sms_dependency = dependency("sms", failure_threshold=5, recovery_timeout=30.0, max_concurrent=8, max_wait=5.0)
+
+
+class DeliveryError(Exception):
+    """Delivery failed; `retryable` is False when retrying cannot help"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class DispatchJob(BaseModel):
+    id: str  # idempotency key
+    alert_id: str
+    channel: str  # "sms", "webhook"
+    recipient: str
+    recipient_name: Optional[str] = None
+    message: str
+    priority: int = PRIORITY_DEFAULT
+    status: str = "queued"  # "queued", "sending", "delivered", "failed"
+    attempts: int = 0
+    max_attempts: int = 6
+    available_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    lease_until: Optional[datetime] = None
+    worker: Optional[str] = None  # holder of the current lease
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class DeliveryReceipt(BaseModel):
+    job_id: str
+    channel: str
+    recipient: str
+    status: str  # "delivered", "failed"
+    provider: str
+    provider_message_id: Optional[str] = None
+    attempts: int
+    error: Optional[str] = None
+    at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def dispatch_key(alert_id: str, channel: str, recipient: str, level: int = 0) -> str:
+    key = f"{alert_id}:{channel}:{recipient}"
+    return f"{key}:escalation-{level}" if level else key
+
+
+def sos_message(user_name: str, emergency_type: str, location: Dict) -> str:
+    return (
+        f"SOS from {user_name} ({emergency_type} emergency) via Echo. "
+        f"Location: {location.get('address') or 'unknown'} "
+        f"https://maps.google.com/?q={location.get('lat')},{location.get('lng')}"
+    )
+
+
+def sos_dispatch_jobs(alert: Dict, user_name: str, contacts: List[Dict], level: int = 0) -> List[DispatchJob]:
+    """One SMS per contact of an alert, at SOS priority; `level` > 0 for escalation reminders"""
+    message = sos_message(user_name, alert.get("emergency_type", "general"), alert.get("location") or {})
+    if level:
+        message = f"STILL UNANSWERED (escalation {level}): {message}"
+    return [
+        DispatchJob(
+            id=dispatch_key(alert["id"], "sms", contact["phone"], level),
+            alert_id=alert["id"],
+            channel="sms",
+            recipient=contact["phone"],
+            recipient_name=contact.get("name"),
+            message=message,
+            priority=PRIORITY_SOS
+        )
+        for contact in contacts
+        if contact.get("phone")
+    ]
+
+
+class DeliveryProvider:
+    """Sends one notification; returns the provider's message id"""
+
+    name = "provider"
+
+    async def send(self, job: DispatchJob) -> Optional[str]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class StubDeliveryProvider(DeliveryProvider):
+    """Records messages instead of sending them (local development and tests)"""
+
+    name = "stub"
+
+    def __init__(self):
+        self.sent: List[DispatchJob] = []
+
+    async def send(self, job: DispatchJob) -> Optional[str]:
+        logger.info(f"[stub dispatch] {job.channel} to {job.recipient}: {job.message}")
+        self.sent.append(job)
+        return f"stub-{len(self.sent)}"
+
+
+def _raise_for_delivery(response: httpx.Response):
+    if response.status_code < 400:
+        return
+    # Rate limits and server errors are worth retrying; other 4xx are not
+    retryable = response.status_code == 429 or response.status_code >= 500
+    raise DeliveryError(f"HTTP {response.status_code}: {response.text[:200]}", retryable=retryable)
+
+
+class TwilioSMSProvider(DeliveryProvider):
+    """SMS through the Twilio Messages API"""
+
+    name = "twilio"
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str, session: Optional[httpx.AsyncClient] = None):
+        self.url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.from_number = from_number
+        self.session = session or httpx.AsyncClient(auth=(account_sid, auth_token), timeout=httpx.Timeout(10.0, connect=3.0))
+
+    async def send(self, job: DispatchJob) -> Optional[str]:
+        async with sms_dependency.guard():
+            response = await self.session.post(self.url, data={"To": job.recipient, "From": self.from_number, "Body": job.message})
+            _raise_for_delivery(response)
+            return response.json().get("sid")
+
+    async def close(self):
+        await self.session.aclose()
+
+
+class WebhookDeliveryProvider(DeliveryProvider):
+    """POSTs each notification as JSON to an SMS gateway or webhook, with an Idempotency-Key header"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, token: Optional[str] = None, session: Optional[httpx.AsyncClient] = None):
+        self.url = url
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.session = session or httpx.AsyncClient(headers=headers, timeout=httpx.Timeout(10.0, connect=3.0))
+
+    async def send(self, job: DispatchJob) -> Optional[str]:
+        async with sms_dependency.guard():
+            response = await self.session.post(
+                self.url,
+                json={"channel": job.channel, "to": job.recipient, "message": job.message, "alert_id": job.alert_id},
+                headers={"Idempotency-Key": job.id}
+            )
+            _raise_for_delivery(response)
+            try:
+                return response.json().get("id")
+            except ValueError:
+                return None
+
+    async def close(self):
+        await self.session.aclose()
+
+
+def delivery_provider_from_env() -> DeliveryProvider:
+    """SOS_DISPATCH_PROVIDER: "twilio", "webhook" or "stub" (default)"""
+    name = os.environ.get("SOS_DISPATCH_PROVIDER", "stub").lower()
+    if name == "twilio":
+        sid, token, sender = (os.environ.get(k) for k in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_FROM_NUMBER"))
+        if sid and token and sender:
+            return TwilioSMSProvider(sid, token, sender)
+        logger.error("SOS_DISPATCH_PROVIDER=twilio needs TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN and TWILIO_FROM_NUMBER")
+    elif name == "webhook":
+        url = os.environ.get("SOS_WEBHOOK_URL")
+        if url:
+            return WebhookDeliveryProvider(url, os.environ.get("SOS_WEBHOOK_TOKEN"))
+        logger.error("SOS_DISPATCH_PROVIDER=webhook needs SOS_WEBHOOK_URL")
+    if name != "stub":
+        logger.warning("Falling back to the stub SOS delivery provider; notifications will NOT be sent")
+    return StubDeliveryProvider()
+
+
+class DispatchQueue:
+    """Priority-ordered job queue in a Mongo collection"""
+
+    def __init__(self, collection, lease: timedelta = timedelta(seconds=60)):
+        self.collection = collection
+        self.lease = lease
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", 1), ("priority", 1), ("available_at", 1)])
+        await self.collection.create_index("alert_id")
+
+    async def enqueue(self, jobs: List[DispatchJob]) -> int:
+        """Insert jobs not queued before; returns how many were new"""
+        added = 0
+        for job in jobs:
+            doc = job.dict()
+            doc["_id"] = doc.pop("id")
+            result = await self.collection.update_one({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True)
+            if result.upserted_id is not None:
+                added += 1
+        return added
+
+    async def claim(self, worker_id: str) -> Optional[DispatchJob]:
+        """Lease the most urgent job that is due, or one whose lease expired"""
+        now = datetime.now(timezone.utc)
+        doc = await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "available_at": {"$lte": now}},
+                {"status": "sending", "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "sending", "lease_until": now + self.lease, "worker": worker_id}, "$inc": {"attempts": 1}},
+            sort=[("priority", 1), ("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            return None
+        doc["id"] = doc.pop("_id")
+        return DispatchJob(**doc)
+
+    @staticmethod
+    def _leased(job: DispatchJob) -> dict:
+        # Matches only while this claim still holds the lease; once it expires and
+        # another worker re-claims the job, the stale worker's updates are dropped
+        return {"_id": job.id, "status": "sending", "worker": job.worker, "attempts": job.attempts}
+
+    async def complete(self, job: DispatchJob, provider_message_id: Optional[str]) -> bool:
+        """Mark the job delivered; returns False when the lease was lost to another worker"""
+        result = await self.collection.update_one(
+            self._leased(job),
+            {"$set": {
+                "status": "delivered",
+                "provider_message_id": provider_message_id,
+                "delivered_at": datetime.now(timezone.utc),
+                "lease_until": None
+            }}
+        )
+        return result.modified_count > 0
+
+    async def retry(self, job: DispatchJob, error: str, delay: float) -> bool:
+        result = await self.collection.update_one(
+            self._leased(job),
+            {"$set": {
+                "status": "queued",
+                "available_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+                "last_error": error,
+                "lease_until": None
+            }}
+        )
+        return result.modified_count > 0
+
+    async def fail(self, job: DispatchJob, error: str) -> bool:
+        result = await self.collection.update_one(
+            self._leased(job),
+            {"$set": {"status": "failed", "last_error": error, "lease_until": None}}
+        )
+        return result.modified_count > 0
+
+    async def counts(self) -> Dict[str, int]:
+        counts = {}
+        for status in ("queued", "sending", "delivered", "failed"):
+            counts[status] = await self.collection.count_documents({"status": status})
+        return counts
+
+
+class DispatchWorkers:
+    """Async workers delivering queued jobs and writing receipts to `receipts` (sos_alerts)"""
+
+    def __init__(
+        self,
+        queue: DispatchQueue,
+        provider: DeliveryProvider,
+        receipts=None,
+        concurrency: int = 4,
+        poll_interval: float = 5.0,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0
+    ):
+        self.queue = queue
+        self.provider = provider
+        self.receipts = receipts
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats = {"delivered": 0, "retried": 0, "failed": 0}
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(f"{os.getpid()}-{uuid.uuid4().hex[:6]}")) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers right away"""
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _worker(self, worker_id: str):
+        while True:
+            try:
+                if await self.run_once(worker_id):
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Dispatch worker {worker_id} error: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_once(self, worker_id: str = "inline") -> bool:
+        """Claim and deliver one job; returns False when nothing was due"""
+        job = await self.queue.claim(worker_id)
+        if job is None:
+            return False
+
+        try:
+            message_id = await self.provider.send(job)
+        except Exception as e:
+            error = str(e)[:300] or type(e).__name__
+            retryable = getattr(e, "retryable", True)
+            if retryable and job.attempts < job.max_attempts:
+                delay = self.backoff(job.attempts)
+                logger.warning(f"Dispatch {job.id} attempt {job.attempts} failed, retrying in {delay:.0f}s: {error}")
+                if not await self.queue.retry(job, error, delay):
+                    logger.warning(f"Dispatch {job.id} lease was taken over; leaving the job to its new worker")
+                    return True
+                self.stats["retried"] += 1
+            else:
+                logger.error(f"Dispatch {job.id} failed after {job.attempts} attempts: {error}")
+                if not await self.queue.fail(job, error):
+                    logger.warning(f"Dispatch {job.id} lease was taken over; leaving the job to its new worker")
+                    return True
+                await self._record(job, "failed", error=error)
+                self.stats["failed"] += 1
+            return True
+
+        if not await self.queue.complete(job, message_id):
+            # The message did go out, so the receipt stands; the job's status
+            # belongs to the worker that re-claimed it
+            logger.warning(f"Dispatch {job.id} delivered after its lease was taken over; it may be sent twice")
+        await self._record(job, "delivered", message_id=message_id)
+        self.stats["delivered"] += 1
+        return True
+
+    async def _record(self, job: DispatchJob, status: str, message_id: Optional[str] = None, error: Optional[str] = None):
+        if self.receipts is None:
+            return
+        receipt = DeliveryReceipt(
+            job_id=job.id,
+            channel=job.channel,
+            recipient=job.recipient,
+            status=status,
+            provider=self.provider.name,
+            provider_message_id=message_id,
+            attempts=job.attempts,
+            error=error
+        )
+        update = {"$push": {"dispatch_receipts": receipt.dict()}}
+        if status == "delivered":
+            update["$addToSet"] = {"trusted_contacts_notified": job.recipient}
+        try:
+            # The receipt filter keeps a re-delivered job from being recorded twice
+            await self.receipts.update_one(
+                {"id": job.alert_id, "dispatch_receipts.job_id": {"$ne": job.id}},
+                update
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record dispatch receipt for {job.id}: {str(e)}")
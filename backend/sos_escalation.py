@@ -0,0 +1,204 @@
+"""Escalation and expiry for active SOS alerts.
+
+Each active alert has up to two timers in one in-process `TimerWheel`:
+escalate (nobody acknowledged it in time) and expire (auto-resolve a
+stale alert). A single task advances the wheel once per tick, so there
+is no per-alert polling. The deadlines are stored on the alert
+(`escalate_at`, `expires_at`) and `rebuild` reschedules every active
+alert at startup; state changes are conditional updates, so a timer
+firing late or twice is harmless. An escalation level is only recorded
+once its notification has been sent, so a failed send is retried rather
+than lost.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+from timer_wheel import Timer, TimerWheel
+
+logger = logging.getLogger(__name__)
+
+ESCALATE = "escalate"
+EXPIRE = "expire"
+RETRY_DELAY = 30.0  # seconds before a timer whose handler failed fires again
+
+
+class EscalationPolicy(BaseModel):
+    escalate_after: float = 120.0  # seconds unacknowledged before the first escalation
+    escalate_every: float = 300.0  # seconds between further escalations
+    max_level: int = 3
+    expire_after: float = 6 * 3600.0  # active alerts are auto-resolved after this long
+
+    @classmethod
+    def from_env(cls) -> "EscalationPolicy":
+        return cls(
+            escalate_after=float(os.environ.get('SOS_ESCALATE_AFTER_SECONDS', '120')),
+            escalate_every=float(os.environ.get('SOS_ESCALATE_EVERY_SECONDS', '300')),
+            max_level=int(os.environ.get('SOS_ESCALATION_MAX_LEVEL', '3')),
+            expire_after=float(os.environ.get('SOS_EXPIRE_AFTER_HOURS', '6')) * 3600
+        )
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class SOSEscalator:
+    """Schedules, fires and cancels the lifecycle timers of active alerts"""
+
+    def __init__(
+        self,
+        alerts,
+        policy: Optional[EscalationPolicy] = None,
+        on_escalate: Optional[Callable[[Dict, int], Awaitable]] = None,
+        on_resolve: Optional[Callable[[Dict], Awaitable]] = None,
+        wheel: Optional[TimerWheel] = None
+    ):
+        self.alerts = alerts
+        self.policy = policy or EscalationPolicy()
+        self.on_escalate = on_escalate
+        self.on_resolve = on_resolve
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"escalated": 0, "expired": 0, "acknowledged": 0, "resolved": 0}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self.wheel.clock(), timezone.utc)
+
+    def deadlines(self, created_at: datetime) -> Dict:
+        """Lifecycle fields for a new alert"""
+        return {
+            "escalation_level": 0,
+            "escalate_at": created_at + timedelta(seconds=self.policy.escalate_after),
+            "expires_at": created_at + timedelta(seconds=self.policy.expire_after)
+        }
+
+    def schedule(self, alert: Dict):
+        """(Re)schedule the timers of an active alert from its stored deadlines"""
+        alert_id = alert["id"]
+        created_at = _aware(alert.get("created_at")) or self._now()
+        level = alert.get("escalation_level") or 0
+        expires_at = _aware(alert.get("expires_at")) or created_at + timedelta(seconds=self.policy.expire_after)
+        escalate_at = _aware(alert.get("escalate_at")) or created_at + timedelta(seconds=self.policy.escalate_after)
+        # Alerts stale enough to expire are not escalated first (e.g. overdue after a restart)
+        if alert.get("acknowledged_at") is None and level < self.policy.max_level and expires_at > max(escalate_at, self._now()):
+            self.wheel.schedule((alert_id, ESCALATE), escalate_at.timestamp(), level + 1)
+        else:
+            self.wheel.cancel((alert_id, ESCALATE))
+        self.wheel.schedule((alert_id, EXPIRE), expires_at.timestamp())
+
+    def cancel(self, alert_id: str):
+        self.wheel.cancel((alert_id, ESCALATE))
+        self.wheel.cancel((alert_id, EXPIRE))
+
+    async def rebuild(self) -> int:
+        """Schedule timers for every active alert, e.g. after a restart"""
+        scheduled = 0
+        async for alert in self.alerts.find(
+            {"status": "active"},
+            {"_id": 0, "id": 1, "created_at": 1, "escalation_level": 1, "escalate_at": 1, "expires_at": 1, "acknowledged_at": 1}
+        ):
+            self.schedule(alert)
+            scheduled += 1
+        return scheduled
+
+    async def acknowledge(self, alert_id: str, user_id: str) -> Optional[Dict]:
+        """Mark an active alert as seen by a responder, which stops escalation"""
+        alert = await self.alerts.find_one_and_update(
+            {"id": alert_id, "status": "active", "acknowledged_at": None},
+            {"$set": {"acknowledged_at": self._now(), "acknowledged_by": user_id, "escalate_at": None}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if alert:
+            self.wheel.cancel((alert_id, ESCALATE))
+            self.stats["acknowledged"] += 1
+        return alert
+
+    async def resolve(self, alert_id: str, user_id: Optional[str] = None, resolution: str = "resolved") -> Optional[Dict]:
+        """Close an active alert; returns None when it was not active"""
+        alert = await self.alerts.find_one_and_update(
+            {"id": alert_id, "status": "active"},
+            {"$set": {
+                "status": "resolved",
+                "resolution": resolution,
+                "resolved_by": user_id,
+                "resolved_at": self._now(),
+                "escalate_at": None
+            }},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        self.cancel(alert_id)
+        if alert:
+            self.stats["expired" if resolution == "expired" else "resolved"] += 1
+            if self.on_resolve:
+                await self.on_resolve(alert)
+        return alert
+
+    async def _escalate(self, alert_id: str, level: int):
+        pending = {"id": alert_id, "status": "active", "acknowledged_at": None, "escalation_level": {"$in": [level - 1, None]}}
+        alert = await self.alerts.find_one(pending, {"_id": 0})
+        if alert is None:
+            return
+        # Notify before recording the level: if notifying fails, run_due retries this level
+        if self.on_escalate:
+            await self.on_escalate({**alert, "escalation_level": level}, level)
+        now = self._now()
+        next_at = now + timedelta(seconds=self.policy.escalate_every) if level < self.policy.max_level else None
+        result = await self.alerts.update_one(
+            pending,
+            {"$set": {"escalation_level": level, "escalate_at": next_at}, "$push": {"escalations": {"level": level, "at": now}}}
+        )
+        if not result.modified_count:
+            return  # acknowledged or resolved while notifying
+        self.stats["escalated"] += 1
+        if next_at:
+            self.wheel.schedule((alert_id, ESCALATE), next_at.timestamp(), level + 1)
+
+    async def fire(self, timer: Timer):
+        alert_id, kind = timer.key
+        if kind == ESCALATE:
+            await self._escalate(alert_id, timer.payload)
+        else:
+            await self.resolve(alert_id, resolution="expired")
+
+    async def run_due(self) -> int:
+        """Fire every timer that has come due; returns how many fired"""
+        due = self.wheel.advance()
+        for timer in due:
+            try:
+                await self.fire(timer)
+            except Exception as e:
+                logger.error(f"SOS {timer.key[1]} timer failed for alert {timer.key[0]}: {str(e)}")
+                if timer.key not in self.wheel:
+                    self.wheel.schedule(timer.key, self.wheel.clock() + RETRY_DELAY, timer.payload)
+        return len(due)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            await self.run_due()
+
+    def metrics(self) -> Dict:
+        return {**self.stats, "pending_timers": len(self.wheel)}
@@ -0,0 +1,157 @@
+"""Filtered, keyset-paginated listing of SOS alerts.
+
+Pages are ordered by (created_at, id) descending and the cursor is the
+last row's sort key, so each page is one index range scan however deep
+the client pages. Active alerts have their own partial index, which stays
+the size of the active set as the resolved history grows.
+
+Proximity ordering computes distances in process over at most
+`scan_limit` of the most recent matching alerts; `location` is stored as
+plain lat/lng rather than GeoJSON, so `$geoNear` is not available.
+Both the proximity ordering and the bbox filter use an alert's latest
+known position: `last_location` while it streams, else `location`.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from geocoding import distance_meters
+
+RECENT_SORT = [("created_at", -1), ("id", -1)]
+
+
+class BBox(BaseModel):
+    min_lat: float
+    min_lng: float
+    max_lat: float
+    max_lng: float
+
+
+class AlertPage(BaseModel):
+    alerts: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+async def ensure_alert_indexes(collection):
+    await collection.create_index(
+        RECENT_SORT, name="active_recent", partialFilterExpression={"status": "active"}
+    )
+    await collection.create_index([("status", 1), ("created_at", -1), ("id", -1)], name="status_recent")
+
+
+def encode_cursor(key: List[Any]) -> str:
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != 2:
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def _aware(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _in_bbox(field: str, bbox: BBox) -> Dict[str, Any]:
+    query: Dict[str, Any] = {f"{field}.lat": {"$gte": bbox.min_lat, "$lte": bbox.max_lat}}
+    if bbox.min_lng <= bbox.max_lng:
+        query[f"{field}.lng"] = {"$gte": bbox.min_lng, "$lte": bbox.max_lng}
+    else:
+        # Box across the antimeridian
+        query["$or"] = [{f"{field}.lng": {"$gte": bbox.min_lng}}, {f"{field}.lng": {"$lte": bbox.max_lng}}]
+    return query
+
+
+def alert_filter(
+    status: Optional[str] = "active",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bbox: Optional[BBox] = None,
+    user_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Mongo query for the listing; `user_id` limits it to that user's own alerts"""
+    query: Dict[str, Any] = {}
+    if status:
+        query["status"] = status
+    if user_id:
+        query["user_id"] = user_id
+    if since or until:
+        query["created_at"] = {}
+        if since:
+            query["created_at"]["$gte"] = _aware(since)
+        if until:
+            query["created_at"]["$lt"] = _aware(until)
+    if bbox:
+        # Same position the nearest ordering ranks by: the live one, else where the alert was raised
+        query["$or"] = [
+            _in_bbox("last_location", bbox),
+            {"last_location": None, **_in_bbox("location", bbox)}
+        ]
+    return query
+
+
+async def recent_page(collection, query: Dict[str, Any], limit: int, cursor: Optional[str] = None) -> AlertPage:
+    """Newest first; the cursor resumes strictly after the last row returned"""
+    if cursor:
+        created_at, alert_id = decode_cursor(cursor)
+        try:
+            created_at = _aware(datetime.fromisoformat(created_at))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        after = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": alert_id}}
+        ]}
+        query = {"$and": [query, after]}
+    alerts = await collection.find(query, {"_id": 0}).sort(RECENT_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(alerts) > limit:
+        alerts = alerts[:limit]
+        next_cursor = encode_cursor([alerts[-1]["created_at"], alerts[-1]["id"]])
+    return AlertPage(alerts=alerts, next_cursor=next_cursor)
+
+
+def _distance_key(alert: Dict[str, Any], origin: Tuple[float, float]) -> Tuple[float, str]:
+    location = alert.get("last_location") or alert.get("location") or {}
+    if location.get("lat") is None or location.get("lng") is None:
+        return float("inf"), alert["id"]
+    return round(distance_meters(origin, (location["lat"], location["lng"])), 3), alert["id"]
+
+
+async def nearest_page(
+    collection,
+    query: Dict[str, Any],
+    origin: Tuple[float, float],
+    limit: int,
+    cursor: Optional[str] = None,
+    scan_limit: int = 2000
+) -> AlertPage:
+    """Closest first (by latest known position), over the `scan_limit` most recent matches"""
+    after = None
+    if cursor:
+        distance, alert_id = decode_cursor(cursor)
+        # A cursor from the recent ordering would not compare with distance keys
+        if isinstance(distance, bool) or not isinstance(distance, (int, float)) or not isinstance(alert_id, str):
+            raise ValueError("Invalid cursor")
+        after = (float(distance), alert_id)
+    candidates = await collection.find(query, {"_id": 0}).sort(RECENT_SORT).limit(scan_limit).to_list(scan_limit)
+    ranked = sorted(((_distance_key(alert, origin), alert) for alert in candidates), key=lambda item: item[0])
+    if after:
+        ranked = [item for item in ranked if item[0] > after]
+    page = ranked[:limit]
+    next_cursor = encode_cursor(list(page[-1][0])) if len(ranked) > limit else None
+    alerts = []
+    for (distance, _), alert in page:
+        alert["distance_m"] = None if distance == float("inf") else distance
+        alerts.append(alert)
+    return AlertPage(alerts=alerts, next_cursor=next_cursor)
@@ -0,0 +1,224 @@
+"""Live location streaming for active SOS alerts.
+
+Clients send a ping every few seconds over a WebSocket or the append
+endpoint. Every ping updates the alert's live position in memory, which is
+what responders read. Only a downsampled track is written to Mongo: a ping
+is kept when it is at least `min_interval` seconds after, or `min_distance`
+metres away from, the last kept ping of that alert.
+
+Kept pings are buffered and written by a single flusher task: one
+`insert_many` into the `sos_locations` time-series collection and one
+`bulk_write` of last positions into `sos_alerts` per flush, however many
+alerts are streaming. Per ping the event loop only does a dict update.
+"""
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class LocationPing(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    accuracy: Optional[float] = None  # metres
+    recorded_at: Optional[datetime] = None  # device time; server time when missing
+
+
+class LivePosition(BaseModel):
+    alert_id: str
+    lat: float
+    lng: float
+    accuracy: Optional[float] = None
+    at: datetime
+    pings: int = 0
+    stored: int = 0
+
+
+def distance_meters(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Equirectangular approximation; accurate to well under a metre at these ranges"""
+    lat1, lng1 = map(math.radians, a)
+    lat2, lng2 = map(math.radians, b)
+    x = (lng2 - lng1) * math.cos((lat1 + lat2) / 2)
+    return 6371000 * math.hypot(x, lat2 - lat1)
+
+
+async def ensure_timeseries(database, name: str = "sos_locations", expire_after: Optional[int] = None):
+    """Create the time-series collection (MongoDB 5.0+), or index a plain one on older servers"""
+    if name in await database.list_collection_names():
+        return
+    options = {"timeseries": {"timeField": "ts", "metaField": "meta", "granularity": "seconds"}}
+    if expire_after:
+        options["expireAfterSeconds"] = expire_after
+    try:
+        await database.create_collection(name, **options)
+    except Exception as e:
+        logger.warning(f"Time-series collections unavailable, using a plain {name} collection: {str(e)}")
+        await database[name].create_index([("meta.alert_id", 1), ("ts", 1)])
+
+
+class SOSTracker:
+    """Live positions in memory plus a batched, downsampled track in Mongo"""
+
+    def __init__(
+        self,
+        locations=None,
+        alerts=None,
+        flush_interval: float = 2.0,
+        min_interval: float = 15.0,
+        min_distance: float = 10.0,
+        max_pending: int = 5000
+    ):
+        self.locations = locations
+        self.alerts = alerts
+        self.flush_interval = flush_interval
+        self.min_interval = min_interval
+        self.min_distance = min_distance
+        self.max_pending = max_pending
+        self.live: Dict[str, LivePosition] = {}
+        # alert_id -> user_id for alerts allowed to stream
+        self.sessions: Dict[str, str] = {}
+        self._last_kept: Dict[str, Tuple[float, float, datetime]] = {}
+        self._pending: List[dict] = []
+        self._dirty: Dict[str, LivePosition] = {}
+        self._flush_now = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"pings": 0, "stored": 0, "flushes": 0, "dropped": 0}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def open_session(self, alert_id: str, user_id: str):
+        self.sessions[alert_id] = user_id
+
+    def close_session(self, alert_id: str):
+        """Stop streaming an alert, keeping its final position in the stored track"""
+        position = self.live.get(alert_id)
+        last = self._last_kept.get(alert_id)
+        if position and (last is None or last[2] < position.at):
+            self._keep(alert_id, position.lat, position.lng, position.accuracy, position.at)
+        self.sessions.pop(alert_id, None)
+        self.live.pop(alert_id, None)
+        self._last_kept.pop(alert_id, None)
+
+    def record(self, alert_id: str, ping: LocationPing) -> bool:
+        """Update the live position; returns whether the ping joins the stored track.
+
+        Pings for alerts without an open session are ignored, and device
+        times in the future are clamped to now so they cannot hold back
+        later pings as out of order.
+        """
+        if alert_id not in self.sessions:
+            return False
+        now = datetime.now(timezone.utc)
+        at = ping.recorded_at or now
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        at = min(at, now)
+        position = self.live.get(alert_id)
+        if position is None:
+            position = self.live[alert_id] = LivePosition(alert_id=alert_id, lat=ping.lat, lng=ping.lng, at=at)
+        elif at < position.at:
+            # Late, out-of-order ping: too old to be the live position or to store
+            position.pings += 1
+            self.stats["pings"] += 1
+            return False
+        position.lat, position.lng, position.accuracy, position.at = ping.lat, ping.lng, ping.accuracy, at
+        position.pings += 1
+        self.stats["pings"] += 1
+
+        last = self._last_kept.get(alert_id)
+        if last is not None:
+            elapsed = (at - last[2]).total_seconds()
+            if elapsed < self.min_interval and distance_meters(last[:2], (ping.lat, ping.lng)) < self.min_distance:
+                return False
+        self._keep(alert_id, ping.lat, ping.lng, ping.accuracy, at)
+        position.stored += 1
+        return True
+
+    def _keep(self, alert_id: str, lat: float, lng: float, accuracy: Optional[float], at: datetime):
+        self._last_kept[alert_id] = (lat, lng, at)
+        self._pending.append({
+            "ts": at,
+            "meta": {"alert_id": alert_id, "user_id": self.sessions.get(alert_id)},
+            "lat": lat,
+            "lng": lng,
+            "accuracy": accuracy
+        })
+        if alert_id in self.live:
+            self._dirty[alert_id] = self.live[alert_id]
+        if len(self._pending) >= self.max_pending // 2:
+            self._flush_now.set()
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered pings and last positions; returns the number of pings written"""
+        pending, self._pending = self._pending, []
+        dirty, self._dirty = self._dirty, {}
+        written = 0
+
+        if pending and self.locations is not None:
+            try:
+                await self.locations.insert_many(pending, ordered=False)
+                written = len(pending)
+            except Exception as e:
+                logger.error(f"Failed to store {len(pending)} SOS location pings: {str(e)}")
+                # Retry with the next flush, dropping the oldest pings past the cap
+                self._pending = pending + self._pending
+                overflow = len(self._pending) - self.max_pending
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    self.stats["dropped"] += overflow
+
+        if dirty and self.alerts is not None:
+            try:
+                await self.alerts.bulk_write([
+                    UpdateOne({"id": alert_id}, {"$set": {
+                        "last_location": {"lat": position.lat, "lng": position.lng, "accuracy": position.accuracy},
+                        "last_location_at": position.at
+                    }})
+                    for alert_id, position in dirty.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to update last SOS locations: {str(e)}")
+                self._dirty = {**dirty, **self._dirty}
+
+        if pending or dirty:
+            self.stats["stored"] += written
+            self.stats["flushes"] += 1
+        return written
+
+    async def track(self, alert_id: str, limit: int = 1000) -> List[dict]:
+        """Stored pings of an alert, oldest first"""
+        if self.locations is None:
+            return []
+        return await self.locations.find(
+            {"meta.alert_id": alert_id}, {"_id": 0, "meta": 0}
+        ).sort("ts", 1).limit(limit).to_list(limit)
+
+    def metrics(self) -> dict:
+        return {**self.stats, "sessions": len(self.sessions), "live": len(self.live), "pending": len(self._pending)}
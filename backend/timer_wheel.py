@@ -0,0 +1,113 @@
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class Timer:
+    __slots__ = ("key", "deadline", "payload", "tick")
+
+    def __init__(self, key: Hashable, deadline: float, payload: Any, tick: int):
+        self.key = key
+        self.deadline = deadline
+        self.payload = payload
+        self.tick = tick
+
+    def __repr__(self):
+        return f"Timer({self.key!r}, deadline={self.deadline})"
+
+
+class TimerWheel:
+    """Hierarchical timing wheel keyed by timer id.
+
+    Level 0 has `slots` buckets of one `tick` each; every higher level has
+    the same number of buckets, each spanning a whole turn of the level
+    below. A timer goes into the coarsest bucket its delay needs and moves
+    down a level as its bucket comes round, so `schedule` and `cancel` are
+    O(1) dict operations and `advance` only touches due buckets. With the
+    defaults (1 s ticks, 64 slots, 4 levels) deadlines up to ~194 days out
+    are placed directly; later ones are parked in the last bucket and
+    re-placed when it comes round.
+
+    Deadlines are wall-clock seconds (`time.time()` by default) so they can
+    be rebuilt from timestamps stored in Mongo.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, clock: Callable[[], float] = time.time):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.tick = tick
+        self.levels = levels
+        self.clock = clock
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._wheels: List[List[Dict[Hashable, Timer]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+        # Last tick whose level-0 bucket has been processed
+        self._now = self._tick_of(clock())
+
+    def _tick_of(self, deadline: float) -> int:
+        return math.floor(deadline / self.tick)
+
+    def schedule(self, key: Hashable, deadline: float, payload: Any = None) -> Timer:
+        """Add a timer, replacing any pending timer with the same key"""
+        self.cancel(key)
+        timer = Timer(key, deadline, payload, max(self._tick_of(deadline), self._now + 1))
+        self._place(timer)
+        return timer
+
+    def cancel(self, key: Hashable) -> bool:
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self._wheels[level][slot][key]
+        return True
+
+    def get(self, key: Hashable) -> Optional[Timer]:
+        where = self._where.get(key)
+        return self._wheels[where[0]][where[1]][key] if where else None
+
+    def _place(self, timer: Timer):
+        delay = timer.tick - self._now
+        level = 0
+        while level < self.levels - 1 and delay >> (self._bits * (level + 1)):
+            level += 1
+        if delay >> (self._bits * self.levels):
+            # Beyond the last level: park in its furthest bucket and re-place later
+            slot = ((self._now >> (self._bits * level)) - 1) & self._mask
+        else:
+            slot = (timer.tick >> (self._bits * level)) & self._mask
+        self._wheels[level][slot][timer.key] = timer
+        self._where[timer.key] = (level, slot)
+
+    def advance(self, now: Optional[float] = None) -> List[Timer]:
+        """Move the wheel up to `now` and return the timers that came due, in deadline order"""
+        target = self._tick_of(self.clock() if now is None else now)
+        due: List[Timer] = []
+        while self._now < target:
+            if not self._where:
+                self._now = target
+                break
+            self._now += 1
+            # Cascade every level whose bucket boundary this tick crosses
+            level = 1
+            while level < self.levels and not self._now & ((1 << (self._bits * level)) - 1):
+                bucket = self._wheels[level][(self._now >> (self._bits * level)) & self._mask]
+                self._wheels[level][(self._now >> (self._bits * level)) & self._mask] = {}
+                for timer in bucket.values():
+                    self._place(timer)
+                level += 1
+            bucket = self._wheels[0][self._now & self._mask]
+            if bucket:
+                self._wheels[0][self._now & self._mask] = {}
+                for key in bucket:
+                    del self._where[key]
+                due.extend(bucket.values())
+        due.sort(key=lambda timer: timer.deadline)
+        return due
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
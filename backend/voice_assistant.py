@@ -0,0 +1,363 @@
+import re
+from typing import Dict, List, Optional
+
+from intent_classifier import IntentResult
+from ttl_cache import TTLCache
+
+# System prompts for the Voice chatbot, per language preference
+SYSTEM_PROMPTS = {
+    "tamil_english": """You are Voice, Echo's campus safety assistant. You speak in friendly Tanglish style (mix Tamil words in English letters, casual and natural).
+
+LANGUAGE STYLE:
+- Use Tamil words written in English letters naturally mixed with English
+- Examples: "Enna problem bro?", "Naan help pannuren", "Map paakanum na?", "Report pannalam"
+- Be casual, friendly, and supportive
+- Use "da", "bro", "anna", "thangachi" appropriately
+
+CORE RULES:
+1. Keep responses SHORT (1-2 sentences max)
+2. Be direct and helpful - suggest specific actions
+3. Always end with a simple safety tip
+4. For app actions, be clear: "Report pannalam" or "Map paakalam"
+
+APP-AWARE ACTIONS:
+When user needs help with:
+- Reporting incidents → Suggest "Report pannalam?"
+- Viewing crime locations → Suggest "Map paakalam?"
+- Emergency help → Suggest "SOS use pannalam?"
+
+EMERGENCY: For serious situations: "Emergency na police ku call pannunga da - 100. Naan call panna mudiyathu."
+""",
+    "english": """You are Voice, Echo's friendly campus safety assistant. You help students with short, natural responses.
+
+CORE RULES:
+1. Keep responses SHORT (1-2 sentences max)
+2. Be direct and helpful - suggest specific actions
+3. Always end with a simple safety tip
+4. For app actions, be clear: "Let's report this" or "Check the map"
+
+APP-AWARE ACTIONS:
+When user needs help with:
+- Reporting incidents → Suggest "Let's report this?"
+- Viewing crime locations → Suggest "Check the map?"
+- Emergency help → Suggest "Use SOS feature?"
+
+EMERGENCY: For serious situations: "Call police immediately at 100. I can't make calls for you."
+""",
+}
+
+# App-aware quick buttons per intent; "general" intentionally has none
+QUICK_BUTTONS = {
+    "theft_report": [
+        {"text": "Report Incident", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Open Report Incident page?"},
+        {"text": "View Map", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Check crime locations on map?"},
+        {"text": "Call Security", "action": "call", "value": "security"}
+    ],
+    "harassment_report": [
+        {"text": "Report Now", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Report this incident now?"},
+        {"text": "Emergency Call", "action": "call", "value": "emergency"},
+        {"text": "SOS Help", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Use SOS feature?"}
+    ],
+    "emergency": [
+        {"text": "Call 100", "action": "call", "value": "emergency"},
+        {"text": "SOS Alert", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Trigger SOS alert?"}
+    ],
+    "map_help": [
+        {"text": "View Map", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Open crime map?"}
+    ],
+    "report_help": [
+        {"text": "Report Incident", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Open report form?"}
+    ],
+    "sos_help": [
+        {"text": "SOS/Helplines", "action": "confirm_navigate", "value": "/dashboard", "confirm_message": "Access SOS and helpline numbers?"}
+    ],
+    "account_help": [
+        {"text": "Sign Up", "action": "navigate", "value": "/signup"},
+        {"text": "Sign In", "action": "navigate", "value": "/signin"}
+    ],
+    "signin_help": [
+        {"text": "Sign In", "action": "navigate", "value": "/signin"},
+        {"text": "Reset Password", "action": "navigate", "value": "/forgot-password"}
+    ],
+}
+
+SAFETY_TIPS = {
+    "tamil_english": [
+        "💡 Oru tip: rathri time la group la travel pannunga da, safe ah irukum!",
+        "🔒 Phone la emergency contacts ready ah vekkunga bro!",
+        "🗺️ Puthiya area ku pogumbothu crime map check pannunnga!",
+        "🚨 Suspicious activity patheenga na campus security ku immediately call pannunga!",
+        "💪 Self defense class join pannunnga if possible, useful ah irukum!"
+    ],
+    "english": [
+        "💡 Safety tip: Travel in groups during late hours for better security!",
+        "🔒 Keep emergency contacts easily accessible on your phone!",
+        "🗺️ Check the crime map before visiting unfamiliar areas on campus!",
+        "🚨 Report any suspicious activity to campus security immediately!",
+        "💪 Consider joining self-defense classes for personal safety!"
+    ],
+}
+
+FALLBACK_RESPONSES = {
+    "tamil_english": (
+        "Sorry bro, konjam problem irukku. Emergency na police ku call pannunga - 100. Campus security um available ah irukku!",
+        "🔒 Safe ah irukka emergency contacts ready ah vekkunga!"
+    ),
+    "english": (
+        "I'm having trouble right now. For emergencies, call police at 100. Campus security is also available!",
+        "🔒 Always keep emergency contacts readily available!"
+    ),
+}
+
+FALLBACK_BUTTONS = [
+    {"text": "Call Emergency", "action": "call", "value": "emergency"},
+    {"text": "Try Again", "action": "retry", "value": "true"}
+]
+
+
+def system_prompt_for(language: str) -> str:
+    return SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["english"])
+
+
+def quick_buttons_for(intent: str) -> List[Dict[str, str]]:
+    # Action buttons only appear when contextually appropriate
+    return [dict(button) for button in QUICK_BUTTONS.get(intent, [])]
+
+
+def safety_tip_for(language: str, session_id: str) -> str:
+    tips = SAFETY_TIPS.get(language, SAFETY_TIPS["english"])
+    return tips[hash(session_id) % len(tips)]
+
+
+# Templated answers for intents whose reply is always the same app guidance
+RESPONSE_TEMPLATES = {
+    "account_help": {
+        "english": [
+            "You can create your Echo account from the Sign Up page with your SRM email and roll number. Already registered? Just sign in.",
+            "Sign up takes a minute: add your SRM email, roll number and up to two trusted contacts, and you're set.",
+        ],
+        "tamil_english": [
+            "Sign Up page la SRM email and roll number kuduthu account create pannalam bro. Already account irundha Sign In pannunga!",
+            "Account create panna oru nimisham dhaan da: SRM email, roll number, trusted contacts add pannunga, mudinjudhu!",
+        ],
+    },
+    "signin_help": {
+        "english": [
+            "Sign in with your SRM email or roll number and password. Forgot it? Use Reset Password to get back in.",
+            "Use your email or roll number to sign in. If the password isn't working, tap Reset Password.",
+        ],
+        "tamil_english": [
+            "SRM email illa roll number and password use panni Sign In pannunga. Password marandhuteenga na Reset Password pannalam!",
+            "Email or roll number vechu login pannunga bro. Password work aagala na Reset Password click pannunga.",
+        ],
+    },
+    "sos_help": {
+        "english": [
+            "The SOS and helpline numbers are on your dashboard. One tap sends an alert with your location to your trusted contacts.",
+            "Open SOS on the dashboard for helplines and a one-tap alert to your trusted contacts. Police: 100.",
+        ],
+        "tamil_english": [
+            "SOS and helpline numbers ellam dashboard la irukku. Oru tap la unga location trusted contacts ku alert pogum!",
+            "Dashboard la SOS open pannunga - helplines um irukku, one tap alert um irukku. Police: 100.",
+        ],
+    },
+    "map_help": {
+        "english": [
+            "Check the crime map on your dashboard to see reported incidents around campus before you head out.",
+            "The crime map on the dashboard shows recent incidents near you. Take a look before visiting unfamiliar spots.",
+        ],
+        "tamil_english": [
+            "Dashboard la crime map paakalam - campus around enna nadakudhu nu theriyum. Poradhuku munnadi check pannunga!",
+            "Crime map la recent incidents ellam kaatum bro. Puthu area ku pogumbothu oru thadava paarunga.",
+        ],
+    },
+    "report_help": {
+        "english": [
+            "Let's report this. Open the report form on your dashboard, add what happened and where, and you can stay anonymous.",
+            "You can file a report from the dashboard in under a minute, with the option to stay anonymous.",
+        ],
+        "tamil_english": [
+            "Report pannalam! Dashboard la report form open panni, enna nadandhuchu, enga nu podunga - anonymous ah kooda pannalam.",
+            "Dashboard la oru nimisham la report pannalam bro, anonymous option um irukku.",
+        ],
+    },
+    # The intents below are only answered from templates when the LLM misses its deadline
+    "emergency": {
+        "english": [
+            "If you are in danger, call police at 100 right now and press SOS on your dashboard to alert your trusted contacts.",
+        ],
+        "tamil_english": [
+            "Aabathu na ippove police ku 100 call pannunga, dashboard la SOS press panni trusted contacts ku alert anuppunga!",
+        ],
+    },
+    "harassment_report": {
+        "english": [
+            "I'm sorry you're dealing with this. Move somewhere public, call campus security or 100 if you feel unsafe, and report it from your dashboard.",
+        ],
+        "tamil_english": [
+            "Sorry da, idhu nadakka koodadhu. Aalunga irukura edathuku ponga, unsafe ah irundha security illa 100 call pannunga, apram dashboard la report pannalam.",
+        ],
+    },
+    "theft_report": {
+        "english": [
+            "Sorry about that. Report the theft from your dashboard with the time and place, and inform campus security so they can check nearby cameras.",
+        ],
+        "tamil_english": [
+            "Aiyo, sorry bro. Dashboard la time and place oda report pannunga, campus security kitta um sollunga - camera check pannuvanga.",
+        ],
+    },
+    "general": {
+        "english": [
+            "I can help you report incidents, check the crime map, or reach SOS and helplines. What do you need?",
+        ],
+        "tamil_english": [
+            "Report pannanum, crime map paakanum, illa SOS/helpline venum - edhuku help venum sollunga bro?",
+        ],
+    },
+}
+
+# Intents answered from RESPONSE_TEMPLATES when they are the only match
+FAST_PATH_INTENTS = {"account_help", "signin_help", "sos_help", "map_help", "report_help"}
+
+# Longer messages are treated as free-form and always go to the LLM
+FAST_PATH_MAX_WORDS = 12
+
+# A single generic word ("where", "area", "account") scores 1; a template
+# needs a specific word or phrase
+FAST_PATH_MIN_SCORE = 2
+
+# Messages with any of these words may describe someone in trouble and are
+# never answered from a template, whatever intent they match
+DISTRESS_WORDS = {
+    "help", "hit", "hits", "hitting", "beat", "beating", "beaten", "grab", "grabbed", "grabbing",
+    "attack", "attacked", "attacking", "hurt", "hurting", "hurts", "kill", "killing", "rape", "raped",
+    "molest", "molested", "assault", "assaulted", "abuse", "abused", "kidnap", "kidnapped",
+    "chasing", "chased", "following", "stalking", "touched", "knife", "gun", "weapon", "bleeding",
+    "injured", "scared", "afraid", "danger", "stole", "stolen", "steal", "robbed", "snatched",
+    # Tanglish
+    "adikiranga", "adichanga", "kaapathunga", "kapathunga", "bayama", "payama",
+}
+_DISTRESS_PATTERN = re.compile(r"\b(" + "|".join(sorted(DISTRESS_WORDS, key=len, reverse=True)) + r")\b")
+
+
+def is_distress(message: str) -> bool:
+    return _DISTRESS_PATTERN.search(message.lower()) is not None
+
+# Seconds the chatbot waits for the LLM before answering from templates;
+# emergencies get the tightest budget
+LLM_DEADLINES = {
+    "emergency": 2.0,
+    "harassment_report": 3.0,
+    "theft_report": 4.0,
+}
+DEFAULT_LLM_DEADLINE = 6.0
+
+
+def llm_deadline_for(intent: str) -> float:
+    return LLM_DEADLINES.get(intent, DEFAULT_LLM_DEADLINE)
+
+
+def templated_response(intent: str, language: str, session_id: str):
+    """Template answer for an intent, or None when the intent has no templates"""
+    templates = RESPONSE_TEMPLATES.get(intent, {})
+    options = templates.get(language) or templates.get("english")
+    if not options:
+        return None
+    return options[hash(session_id) % len(options)]
+
+
+def fast_path_response(user_input: str, result: IntentResult, language: str, session_id: str):
+    """Templated answer when a short message clearly and only asks for a fast-path intent"""
+    if not result.is_unambiguous or result.intent not in FAST_PATH_INTENTS:
+        return None
+    if result.score < FAST_PATH_MIN_SCORE or len(user_input.split()) > FAST_PATH_MAX_WORDS:
+        return None
+    if is_distress(user_input):
+        return None
+    return templated_response(result.intent, language, session_id)
+
+
+class FastPathStats:
+    """Per-intent counts of how each answer was produced.
+
+    Sources are "fast_path" (template), "cache" (response cache), "llm",
+    "deadline" (template sent because the LLM was too slow) and "llm_error"
+    (template sent because the LLM call failed or was shed); `hit_rate` is
+    the share of answers served from templates or the cache up front.
+    """
+
+    SOURCES = ("fast_path", "cache", "llm", "deadline", "llm_error")
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, intent: str, source: str):
+        counts = self.counts.setdefault(intent, {name: 0 for name in self.SOURCES})
+        counts[source] += 1
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for intent, counts in self.counts.items():
+            total = sum(counts.values())
+            report[intent] = {
+                **counts,
+                "fast_path_rate": round(counts["fast_path"] / total, 3) if total else 0.0,
+                "hit_rate": round((counts["fast_path"] + counts["cache"]) / total, 3) if total else 0.0,
+                "deadline_rate": round(counts["deadline"] / total, 3) if total else 0.0,
+            }
+        return report
+
+
+# Intents that always get a fresh answer
+EMERGENCY_INTENTS = {"emergency", "harassment_report"}
+
+STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "you", "your", "is", "am", "are", "was", "be",
+    "do", "does", "did", "can", "could", "would", "should", "will", "to", "of", "in", "on",
+    "at", "for", "it", "this", "that", "please", "pls", "plz", "hi", "hey", "hello",
+    "how", "what", "just", "so", "and", "or", "bro", "da", "na", "ah", "pa",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, strip punctuation and stopwords so near-identical questions share a key"""
+    words = _PUNCTUATION.sub(" ", message.lower()).split()
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+class VoiceResponseCache:
+    """TTL/LRU cache of LLM replies keyed by language, intent and normalized message.
+
+    Emergencies and messages with distress words always get a fresh answer.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 3600.0):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key(language: str, intent: str, message: str) -> Optional[tuple]:
+        if intent in EMERGENCY_INTENTS or is_distress(message):
+            return None
+        normalized = normalize_message(message)
+        if not normalized:
+            return None
+        return (language, intent, normalized)
+
+    def get(self, language: str, intent: str, message: str) -> Optional[str]:
+        key = self.key(language, intent, message)
+        return self.cache.get(key) if key else None
+
+    def set(self, language: str, intent: str, message: str, response: str):
+        key = self.key(language, intent, message)
+        if key:
+            self.cache.set(key, response)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+def fallback_response(language: str):
+    """(response, safety_tip) used when the LLM cannot answer"""
+    return FALLBACK_RESPONSES.get(language, FALLBACK_RESPONSES["english"])
@@ -331,7 +331,7 @@ class CampusSafetyAPITester:
         """Test getting SOS alerts"""
         print("\n🔍 Testing Get SOS Alerts...")
         
-        response = self.make_request('GET', 'sos/alerts')
+        response = self.make_request('GET', 'sos/alerts', auth_required=True)
         
         if response and response.status_code == 200:
             try:
@@ -194,16 +194,13 @@ const Dashboard = () => {
   };
 
   const reverseGeocode = async (lat, lng) => {
-    const MAPBOX_TOKEN = 'pk.eyJ1IjoidGFubWF5eXl5eSIsImEiOiJjbWY0NHdkODgwMW10MmlzaDljNThmbjkzIn0.htjxLePu6Z7UXOKU3ltpIg';
     try {
-      const response = await fetch(
-        `https://api.mapbox.com/geocoding/v5/mapbox.places/${lng},${lat}.json?access_token=${MAPBOX_TOKEN}&types=address,poi`
-      );
-      const data = await response.json();
-      if (data.features && data.features.length > 0) {
-        return data.features[0].place_name;
-      }
-      return `${lat.toFixed(4)}, ${lng.toFixed(4)}`;
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${API}/geo/reverse`, {
+        params: { lat, lng },
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      return response.data.place_name;
     } catch (error) {
       return `${lat.toFixed(4)}, ${lng.toFixed(4)}`;
     }
@@ -216,24 +213,24 @@ const Dashboard = () => {
     }
 
     setLocationLoading(true);
-    const MAPBOX_TOKEN = 'pk.eyJ1IjoidGFubWF5eXl5eSIsImEiOiJjbWY0NHdkODgwMW10MmlzaDljNThmbjkzIn0.htjxLePu6Z7UXOKU3ltpIg';
     
     try {
-      const response = await fetch(
-        `https://api.mapbox.com/geocoding/v5/mapbox.places/${encodeURIComponent(addressSearch)}.json?access_token=${MAPBOX_TOKEN}&proximity=80.0452,12.8236&types=address,poi`
-      );
-      const data = await response.json();
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${API}/geo/search`, {
+        params: { q: addressSearch, limit: 1 },
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      const results = response.data.results || [];
       
-      if (data.features && data.features.length > 0) {
-        const feature = data.features[0];
-        const [lng, lat] = feature.center;
+      if (results.length > 0) {
+        const result = results[0];
         
         setReportForm(prev => ({
           ...prev,
           location: {
-            lat: lat,
-            lng: lng,
-            address: feature.place_name,
+            lat: result.latitude,
+            lng: result.longitude,
+            address: result.place_name,
             source: 'search'
           }
         }));
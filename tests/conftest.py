@@ -0,0 +1,77 @@
+import asyncio
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Backend modules import each other by bare name (as when run from backend/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from news_fetcher import newsapi_dependency  # noqa: E402
+
+
+def _hours_ago(hours: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+NEWS_ARTICLES = [
+    {
+        "title": "Student robbed near campus gate, police arrest suspect",
+        "description": "A theft and robbery case near the university campus.",
+        "content": None,
+        "url": "https://example.com/robbery",
+        "urlToImage": None,
+        "publishedAt": _hours_ago(2),
+        "source": {"id": None, "name": "Example News"},
+        "author": None,
+    },
+    {
+        "title": "Campus security warns of phone theft in dormitory",
+        "description": "Stolen phones reported to campus police.",
+        "content": None,
+        "url": "https://example.com/dorm-theft",
+        "urlToImage": None,
+        "publishedAt": _hours_ago(30),
+        "source": {"id": None, "name": "Campus Daily"},
+        "author": None,
+    },
+]
+
+
+@pytest.fixture
+def news_articles():
+    """Raw NewsAPI articles served by the `newsapi` fixture"""
+    return NEWS_ARTICLES
+
+
+@pytest.fixture
+def newsapi(monkeypatch, news_articles):
+    """Route NewsAPI requests to an in-memory handler that honours `from`/`to` and paging, and record them"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        articles = [
+            article for article in news_articles
+            if request.url.params.get("from", "") <= article["publishedAt"][:19] < request.url.params.get("to", "~")
+        ]
+        page, page_size = int(request.url.params.get("page", 1)), int(request.url.params.get("pageSize", 100))
+        return httpx.Response(200, json={
+            "status": "ok",
+            "totalResults": len(articles),
+            "articles": articles[(page - 1) * page_size:page * page_size]
+        })
+
+    original_init = httpx.AsyncClient.__init__
+
+    def init(self, *args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        original_init(self, *args, **kwargs)
+
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(httpx.AsyncClient, "__init__", init)
+    monkeypatch.setattr(asyncio, "sleep", lambda _: real_sleep(0))
+    newsapi_dependency.breaker.reset()
+    return requests
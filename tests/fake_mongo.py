@@ -0,0 +1,252 @@
+"""Minimal in-memory stand-in for the motor collection methods the backend uses.
+
+Supports equality and $in/$nin/$ne/$lt/$lte/$gt/$gte/$exists filters (dotted
+paths and array fields included), $or/$and, and $set/$setOnInsert/$inc/
+$push/$addToSet/$unset updates.
+"""
+import copy
+from types import SimpleNamespace
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, list):
+            if part.isdigit():
+                value = value[int(part)] if int(part) < len(value) else _MISSING
+            else:
+                values = [item.get(part, _MISSING) for item in value if isinstance(item, dict)]
+                value = [v for v in values if v is not _MISSING] or _MISSING
+        elif isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _compare(value, op, operand):
+    candidates = value if isinstance(value, list) else [value]
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$ne":
+        return operand not in candidates
+    if op == "$nin":
+        return not any(c in operand for c in candidates)
+    if value is _MISSING:
+        return op == "$in" and None in operand
+    if op == "$in":
+        return any(c in operand for c in candidates)
+    checks = {
+        "$lt": lambda c: c < operand, "$lte": lambda c: c <= operand,
+        "$gt": lambda c: c > operand, "$gte": lambda c: c >= operand,
+    }
+    return any(c is not None and checks[op](c) for c in candidates)
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif isinstance(value, list) and not isinstance(condition, list):
+            if condition not in value:
+                return False
+        elif (None if value is _MISSING else value) != condition:
+            return False
+    return True
+
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def apply_update(doc, update, inserting=False):
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                _set(doc, path, copy.deepcopy(value))
+            elif op == "$inc":
+                _set(doc, path, (doc.get(path) or 0) + value)
+            elif op == "$push":
+                doc.setdefault(path, []).append(copy.deepcopy(value))
+            elif op == "$addToSet":
+                if value not in doc.setdefault(path, []):
+                    doc[path].append(value)
+            elif op == "$unset":
+                doc.pop(path, None)
+            else:
+                raise NotImplementedError(op)
+
+
+def _sorted(docs, sort):
+    """Stable multi-key sort; missing and None values sort lowest, as in Mongo"""
+    docs = list(docs)
+    for field, direction in reversed(sort):
+        def key(doc, field=field):
+            value = _get(doc, field)
+            return (0, 0) if value is _MISSING or value is None else (1, value)
+        docs.sort(key=key, reverse=direction < 0)
+    return docs
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    included = {k for k, v in projection.items() if v}
+    if included:
+        result = {k: copy.deepcopy(v) for k, v in doc.items() if k in included}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k not in projection}
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=None):
+        sort = [(key, direction or 1)] if isinstance(key, str) else key
+        self._docs = _sorted(self._docs, sort)
+        return self
+
+    def limit(self, count):
+        if count:
+            self._docs = self._docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self._docs if length is None else self._docs[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.indexes = []
+        self._next_id = 0
+        self.insert_manys = 0
+        self.bulk_writes = 0
+
+    async def create_index(self, keys, **options):
+        self.indexes.append((keys, options))
+
+    async def insert_one(self, doc):
+        if "_id" not in doc:
+            self._next_id += 1
+            doc["_id"] = self._next_id
+        elif any(existing["_id"] == doc["_id"] for existing in self.docs):
+            raise DuplicateKeyError(f"duplicate _id {doc['_id']!r}")
+        self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        self.insert_manys += 1
+        for doc in docs:
+            await self.insert_one(doc)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([_project(d, projection) for d in self.docs if matches(d, query or {})])
+
+    async def find_one(self, query=None, projection=None):
+        for doc in self.docs:
+            if matches(doc, query or {}):
+                return _project(doc, projection)
+        return None
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        apply_update(doc, update, inserting=True)
+        await self.insert_one(doc)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+
+    async def replace_one(self, query, replacement, upsert=False):
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                self.docs[i] = copy.deepcopy({"_id": doc["_id"], **replacement})
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        result = await self.insert_one(dict(replacement))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=result.inserted_id)
+
+    async def update_many(self, query, update):
+        matched = [doc for doc in self.docs if matches(doc, query)]
+        for doc in matched:
+            apply_update(doc, update)
+        return SimpleNamespace(matched_count=len(matched), modified_count=len(matched))
+
+    async def bulk_write(self, requests, ordered=True):
+        """Applies pymongo UpdateOne requests"""
+        self.bulk_writes += 1
+        matched = 0
+        for request in requests:
+            result = await self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+            matched += result.matched_count
+        return SimpleNamespace(matched_count=matched, modified_count=matched)
+
+    async def find_one_and_update(self, query, update, sort=None, upsert=False, return_document=ReturnDocument.BEFORE, projection=None):
+        candidates = [doc for doc in self.docs if matches(doc, query)]
+        if sort:
+            candidates = _sorted(candidates, sort)
+        if not candidates:
+            if not upsert:
+                return None
+            await self.update_one(query, update, upsert=True)
+            return _project(self.docs[-1], projection) if return_document == ReturnDocument.AFTER else None
+        doc = candidates[0]
+        before = _project(doc, projection)
+        apply_update(doc, update)
+        return _project(doc, projection) if return_document == ReturnDocument.AFTER else before
+
+    async def delete_one(self, query):
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[i]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def delete_many(self, query):
+        kept = [doc for doc in self.docs if not matches(doc, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return SimpleNamespace(deleted_count=deleted)
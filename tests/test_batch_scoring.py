@@ -0,0 +1,35 @@
+from batch_scoring import BatchScorer, KeywordMatrixScorer, synthetic_articles
+from news_fetcher import CrimeContentFilter
+
+
+def test_batch_analysis_matches_per_article_filter():
+    crime_filter = CrimeContentFilter()
+    articles = synthetic_articles(300) + [
+        ("Burglary at hostel", "", ""),  # "burglary" is listed under two categories
+        ("Police", "ARREST made", "after a robbery"),
+        ("", "", ""),
+        ("Campus fest", "Students celebrate", "No incidents"),
+    ]
+
+    analyses = KeywordMatrixScorer(crime_filter).analyze(articles, threshold=1.5, crime_filter=crime_filter)
+
+    for (title, description, content), analysis in zip(articles, analyses):
+        is_crime, score, expected = crime_filter.is_crime_related(title, description, content, threshold=1.5)
+        assert analysis["is_crime_related"] == is_crime
+        assert analysis["total_score"] == score
+        for field in ("title_score", "description_score", "content_score", "confidence_level"):
+            assert analysis[field] == expected[field]
+        assert analysis["locations"] == crime_filter.extract_location_info(f"{title} {description}")
+
+
+def test_parallel_chunks_preserve_input_order():
+    articles = synthetic_articles(40, seed=3)
+    serial = BatchScorer(workers=1).analyze(articles, with_locations=False)
+
+    scorer = BatchScorer(workers=2, parallel_threshold=1, chunks_per_worker=3)
+    try:
+        parallel = scorer.analyze(articles, with_locations=False)
+    finally:
+        scorer.close()
+
+    assert parallel == serial
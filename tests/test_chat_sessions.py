@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+from chat_sessions import ChatSession, ChatSessionStore
+from tests.fake_mongo import FakeCollection
+
+
+def test_prompt_context_stays_bounded_over_a_long_session():
+    store = ChatSessionStore(max_turns=6, keep_turns=4, summary_chars=400, turn_chars=300)
+    session = ChatSession(session_id="s1")
+    sizes = []
+    for i in range(200):
+        store.record_turn(session, f"question {i} " + "x" * 400, "safety_tips", "answer " + "y" * 400)
+        sizes.append(len(session.prompt_context()))
+
+    # Verbatim turns are capped at max_turns and truncated; the summary has its own budget
+    budget = len("Earlier in this conversation the user ") + 400 + 6 * 2 * (300 + len("User (safety_tips): "))
+    assert max(sizes) <= budget
+    assert max(sizes[100:]) <= max(sizes[:20])
+    assert len(session.turns) <= 6 and len(session.summary) <= 400
+    assert session.interaction_count == 200 and session.intent_counts == {"safety_tips": 200}
+    # The most recent folded turns survive in the summary, the oldest are dropped
+    assert "question 194 " in session.summary and "question 0 " not in session.summary
+    assert session.turns[-1].message.startswith("question 199")
+
+
+def test_sessions_pushed_out_of_memory_are_spilled_and_reloaded():
+    collection = FakeCollection()
+    store = ChatSessionStore(collection, memory_size=2)
+
+    async def run():
+        first = await store.get("a")
+        store.record_turn(first, "is the library open late", "campus_info", "Until midnight")
+        await store.get("b")
+        await store.get("c")  # evicts "a"
+        await asyncio.sleep(0)
+        assert [doc["_id"] for doc in collection.docs] == ["a"]
+        return await store.get("a")
+
+    reloaded = asyncio.run(run())
+    assert reloaded.turns[0].reply == "Until midnight" and reloaded.interaction_count == 1
+    assert collection.docs[0]["expires_at"] > datetime.now(timezone.utc)
+
+
+def test_expired_spilled_sessions_start_fresh():
+    collection = FakeCollection()
+    store = ChatSessionStore(collection)
+    stale = ChatSession(session_id="a", interaction_count=3).dict()
+    asyncio.run(collection.insert_one({**stale, "_id": "a", "expires_at": datetime.now(timezone.utc) - timedelta(minutes=1)}))
+
+    session = asyncio.run(store.get("a"))
+    assert session.interaction_count == 0 and session.turns == []
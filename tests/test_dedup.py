@@ -0,0 +1,49 @@
+from dedup import NearDuplicateIndex, article_text, hamming_distance, simhash
+
+STORY = (
+    "Student robbed near SRM campus gate, police arrest suspect",
+    "A student was robbed near the campus gate on Tuesday night; police have arrested a suspect.",
+)
+
+
+def test_syndicated_copies_are_near_duplicates():
+    original = simhash(article_text(*STORY))
+    with_outlet = simhash(article_text(STORY[0] + " - The Hindu", STORY[1]))
+    reworded = simhash(article_text(
+        "Student robbed near SRM campus gate; police arrest suspect",
+        "A student was robbed near the campus gate Tuesday night, police arrested a suspect.",
+    ))
+    assert hamming_distance(original, with_outlet) <= 3
+    assert hamming_distance(original, reworded) <= 3
+
+
+def test_different_stories_are_far_apart():
+    other = simhash(article_text(
+        "Man arrested for stealing laptops from SRM hostel",
+        "Police arrested a man for stealing laptops from the SRM hostel.",
+    ))
+    assert hamming_distance(simhash(article_text(*STORY)), other) > 10
+
+
+def test_index_returns_first_seen_key():
+    index = NearDuplicateIndex()
+    assert index.check_and_add("a", article_text(*STORY)) is None
+    assert index.check_and_add("b", article_text(STORY[0] + " | NDTV", STORY[1])) == "a"
+    assert index.check_and_add("c", article_text("Phone theft in hostel", "Phones stolen from rooms.")) is None
+    assert index.size == 2
+
+
+def test_band_lookup_finds_every_fingerprint_within_max_distance():
+    index = NearDuplicateIndex(max_distance=3)
+    base = 0x0123456789ABCDEF
+    index.add("base", base)
+    # Flip three bits spread across different bands
+    assert index.find(base ^ (1 << 0) ^ (1 << 20) ^ (1 << 40)) == "base"
+    assert index.find(base ^ (1 << 0) ^ (1 << 20) ^ (1 << 40) ^ (1 << 60)) is None
+
+
+def test_empty_text_is_never_a_duplicate():
+    index = NearDuplicateIndex()
+    assert index.check_and_add("a", "") is None
+    assert index.check_and_add("b", "the of and") is None
+    assert index.size == 0
@@ -0,0 +1,77 @@
+import asyncio
+
+from geocoding import GazetteerGeocoder, GeocodeResult, GeocodingProvider, GeocodingService
+
+
+class CountingProvider(GeocodingProvider):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    async def reverse(self, latitude, longitude):
+        self.calls.append(("reverse", latitude, longitude))
+        await asyncio.sleep(0)
+        return GeocodeResult(place_name=f"near {latitude},{longitude}", latitude=latitude, longitude=longitude, source=self.name)
+
+    async def search(self, query, limit=5):
+        self.calls.append(("search", query))
+        return []
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        return doc if doc and doc["expires_at"] > query["expires_at"]["$gt"] else None
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = doc
+
+
+def test_positions_in_one_bucket_share_a_single_provider_call():
+    provider = CountingProvider()
+    service = GeocodingService(provider)
+
+    async def run():
+        # The first two coalesce while in flight; the third hits memory
+        first, second = await asyncio.gather(service.reverse(12.82311, 80.04419), service.reverse(12.82309, 80.04421))
+        third = await service.reverse(12.823104, 80.044196)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert provider.calls == [("reverse", 12.8231, 80.0442)]
+    assert first == second == third
+    assert service.counts["coalesced"] == 1
+
+
+def test_mongo_tier_survives_a_restart_and_empty_answers_are_not_memoized():
+    collection = FakeCollection()
+    asyncio.run(GeocodingService(CountingProvider(), collection).reverse(12.8249, 80.0468))
+
+    provider = CountingProvider()
+    restarted = GeocodingService(provider, collection)
+    assert asyncio.run(restarted.reverse(12.8249, 80.0468)).place_name == "near 12.8249,80.0468"
+    assert provider.calls == []
+    assert restarted.counts["mongo_hits"] == 1
+
+    assert asyncio.run(restarted.search("somewhere unknown")) == []
+    assert asyncio.run(restarted.search("Somewhere   UNKNOWN")) == []
+    assert provider.calls == [("search", "somewhere unknown")]
+    assert restarted.counts["mongo_hits"] == 2
+
+
+def test_gazetteer_names_skip_the_provider():
+    provider = CountingProvider()
+    service = GeocodingService(provider)
+    [result] = asyncio.run(service.search("paari  hostel"))
+    assert (result.place_id, result.latitude, result.longitude) == ("paari-hostel", 12.8249, 80.0468)
+    assert provider.calls == []
+
+
+def test_gazetteer_provider_reverse_geocodes_nearby_places_only():
+    geocoder = GazetteerGeocoder()
+    assert asyncio.run(geocoder.reverse(12.8250, 80.0469)).place_id == "paari-hostel"
+    assert asyncio.run(geocoder.reverse(13.0827, 80.2707)) is None
@@ -0,0 +1,37 @@
+import json
+import random
+
+from geofence import DEFAULT_ZONES, ZoneIndex, campus_zones, load_zones, point_in_polygon
+
+
+def test_grid_lookup_matches_exact_polygon_tests():
+    rng = random.Random(5)
+    for _ in range(5000):
+        latitude, longitude = rng.uniform(12.816, 12.829), rng.uniform(80.037, 80.052)
+        expected = [zone.zone_id for zone in campus_zones.zones if point_in_polygon(longitude, latitude, zone.polygon)]
+        assert [zone.zone_id for zone in campus_zones.zones_at(latitude, longitude)] == expected
+
+
+def test_classify_tags_the_most_specific_zone_first():
+    match = campus_zones.classify(12.8249, 80.0468)
+    assert match.zone_id == "boys-hostels"
+    assert match.zone_ids == ["boys-hostels", "srm-ktr"]
+    assert match.on_campus
+
+    outside = campus_zones.classify(13.0827, 80.2707)
+    assert (outside.zone_id, outside.zone_ids, outside.on_campus) == (None, [], False)
+
+
+def test_zones_load_from_geojson(tmp_path):
+    square = [[80.0, 12.0], [80.1, 12.0], [80.1, 12.1], [80.0, 12.1], [80.0, 12.0]]
+    path = tmp_path / "zones.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [{
+        "type": "Feature",
+        "properties": {"zone_id": "lot-a", "name": "Lot A", "kind": "parking"},
+        "geometry": {"type": "Polygon", "coordinates": [square]}
+    }]}))
+
+    [zone] = load_zones(str(path))
+    assert (zone.zone_id, zone.kind, len(zone.polygon)) == ("lot-a", "parking", 4)
+    index = ZoneIndex([zone] + DEFAULT_ZONES)
+    assert index.classify(12.05, 80.05).zone_ids == ["lot-a"]
@@ -0,0 +1,37 @@
+import pytest
+
+from intent_classifier import EVALUATION_SET, classify_intent, evaluate
+
+
+def test_evaluation_set_accuracy():
+    report = evaluate()
+    assert report["accuracy"] >= 0.95, report["errors"]
+
+
+@pytest.mark.parametrize("message,expected", EVALUATION_SET)
+def test_labeled_examples(message, expected):
+    assert classify_intent(message).intent == expected
+
+
+def test_returns_all_matching_intents_with_scores():
+    result = classify_intent("I want to report my stolen phone")
+    assert result.intent == "theft_report"
+    assert set(result.intents) == {"theft_report", "report_help"}
+    assert not result.is_unambiguous
+
+
+def test_longer_phrase_wins_over_prefix():
+    # "emergency number" is a helpline request, not an emergency
+    result = classify_intent("give me the emergency number")
+    assert result.scores == {"sos_help": 3}
+
+
+def test_matches_start_at_word_boundaries():
+    assert classify_intent("tell me about my career").intent == "general"
+    assert classify_intent("I reported it yesterday").intent == "report_help"
+
+
+def test_phrases_match_whole_words_only():
+    assert "account_help" not in classify_intent("my accountant stole money").scores
+    assert classify_intent("my accountant stole money").intent == "theft_report"
+    assert classify_intent("someone is hitting me").intent == "emergency"
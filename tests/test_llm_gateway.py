@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+# llm_gateway wraps the emergentintegrations client
+pytest.importorskip("emergentintegrations")
+
+import llm_gateway  # noqa: E402
+from llm_gateway import AIMDLimiter, LLMGateway, LLMOverloaded  # noqa: E402
+
+
+class FakeChat:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.prompts = []
+
+    async def send_message(self, message):
+        self.prompts.append(message.text)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"reply to {message.text}"
+
+
+@pytest.fixture
+def gateway():
+    gateway = LLMGateway("test-key", max_concurrency=8)
+    gateway.dependency.breaker.reset()
+    yield gateway
+    gateway.dependency.breaker.reset()
+
+
+def test_limit_grows_additively_on_fast_calls_and_shrinks_on_errors(gateway):
+    chat = FakeChat()
+    gateway._client = lambda session_id, system_message: chat
+    limiter = gateway.limiter("predictor")
+    start = limiter.limit
+
+    assert asyncio.run(gateway.complete("predictor", "system", "hello", "s1")) == "reply to hello"
+    assert limiter.limit == pytest.approx(start + 1 / start)
+
+    chat.error = RuntimeError("HTTP 529 overloaded")
+    grown = limiter.limit
+    with pytest.raises(RuntimeError):
+        asyncio.run(gateway.complete("predictor", "system", "again", "s1"))
+    assert limiter.limit == pytest.approx(max(limiter.min_limit, grown * limiter.backoff_ratio))
+    assert (limiter.completed, limiter.failed, limiter.in_flight) == (1, 1, 0)
+
+
+def test_slow_calls_count_as_congestion():
+    limiter = AIMDLimiter("test", initial_limit=10, latency_target=1.0)
+    limiter.in_flight = 1
+    limiter.release(latency=2.5, ok=True)
+    assert limiter.limit == pytest.approx(7.0) and limiter.completed == 1
+
+
+def test_waiters_are_served_in_arrival_order():
+    async def run():
+        limiter = AIMDLimiter("test", initial_limit=1, max_wait=1.0)
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(wait(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        assert limiter.metrics()["queued"] == 3
+        for _ in tasks:
+            limiter.release(0.01, True)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+
+def test_requests_are_shed_after_max_wait_or_when_the_queue_is_full():
+    async def run():
+        limiter = AIMDLimiter("test", initial_limit=1, max_queue=1, max_wait=0.05)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloaded, match="queue full"):
+            await limiter.acquire()
+        with pytest.raises(LLMOverloaded, match="waited"):
+            await waiter
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.shed == 2 and limiter.in_flight == 1 and limiter.metrics()["queued"] == 0
+
+
+def test_shed_requests_do_not_trip_the_breaker(gateway):
+    async def run():
+        gateway._client = lambda session_id, system_message: FakeChat(delay=0.2)
+        limiter = gateway.limiter("voice")
+        limiter.limit, limiter.max_wait = 1, 0.01
+        busy = asyncio.create_task(gateway.complete("voice", "system", "first", "s1"))
+        await asyncio.sleep(0)
+        for _ in range(gateway.dependency.breaker.failure_threshold):
+            with pytest.raises(LLMOverloaded):
+                await gateway.complete("voice", "system", "shed", "s2")
+        return await busy
+
+    assert asyncio.run(run()) == "reply to first"
+    assert gateway.dependency.breaker.state == "closed"
+    assert gateway.global_limiter.in_flight == 0
+
+
+def test_each_call_gets_a_fresh_client_without_earlier_history(gateway, monkeypatch):
+    class RecordingChat(FakeChat):
+        instances = []
+
+        def __init__(self, api_key, session_id, system_message):
+            super().__init__()
+            self.session_id = session_id
+            RecordingChat.instances.append(self)
+
+        def with_model(self, provider, model):
+            return self
+
+    monkeypatch.setattr(llm_gateway, "LlmChat", RecordingChat)
+    asyncio.run(gateway.complete("voice", "system", "first", "s1"))
+    asyncio.run(gateway.complete("voice", "system", "second", "s1"))
+
+    assert [chat.prompts for chat in RecordingChat.instances] == [["first"], ["second"]]
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import pytest
+
+from local_predictor import LocalCrimePredictor, area_from_location
+
+NOW = datetime(2026, 3, 30, 12, 0, tzinfo=timezone.utc)
+
+
+def _reports(crime_type, address, weekly_counts, hour=22):
+    """`weekly_counts[0]` is the oldest week of a len(weekly_counts)-week window"""
+    weeks = len(weekly_counts)
+    reports = []
+    for week, count in enumerate(weekly_counts):
+        created_at = (NOW - timedelta(weeks=weeks - 1 - week, days=1)).replace(hour=hour)
+        reports += [{
+            "crime_type": crime_type,
+            "severity": "high",
+            "location": {"lat": 12.82, "lng": 80.04, "address": address},
+            "created_at": created_at,
+        }] * count
+    return reports
+
+
+def test_area_from_location_prefers_gazetteer_names():
+    assert area_from_location({"address": "Near paari block, SRM Nagar"}) == "Paari Hostel"
+    assert area_from_location({"address": "12 Lake View Street, Chennai"}) == "12 Lake View Street"
+    assert area_from_location({"address": ""}) == "Campus Area"
+    assert area_from_location(None) == "Campus Area"
+
+
+def test_fit_computes_poisson_rates_trends_and_peaks():
+    predictor = LocalCrimePredictor(lookback_weeks=4, horizon_days=7)
+    reports = _reports("theft", "SRM Tech Park", [1, 2, 3, 4]) + _reports("drugs", "Paari Hostel", [2, 0, 0, 0], hour=1)
+    # Outside the lookback window, so ignored
+    reports += [dict(reports[0], created_at=NOW - timedelta(weeks=10))]
+
+    table = predictor.fit(reports, now=NOW).set_index(["area", "crime_type"])
+    theft = table.loc[("SRM Tech Park", "property")]
+    assert theft["count"] == 10
+    assert theft["weekly_rate"] == pytest.approx(2.5)
+    assert theft["trend_slope"] == pytest.approx(1.0)
+    # Fitted line projected one week past the window: 2.5 + 1.0 * 2.5
+    assert theft["expected"] == pytest.approx(5.0)
+    assert theft["probability"] == pytest.approx(1 - np.exp(-5.0))
+    # Reports at Sunday 22:00 UTC peak on Monday 03:00-04:00 campus (IST) time
+    assert theft["peak_hour_of_week"] == 3
+
+    drugs = table.loc[("Paari Hostel", "drug")]
+    assert drugs["trend_slope"] == pytest.approx(-0.6)
+    # A falling trend is floored at a quarter of the mean rate
+    assert drugs["expected"] == pytest.approx(0.125)
+
+
+def test_predict_ranks_by_expected_severity_weighted_risk():
+    predictor = LocalCrimePredictor(lookback_weeks=4, horizon_days=7)
+    reports = _reports("theft", "SRM Tech Park", [1, 2, 3, 4]) + _reports("drugs", "Paari Hostel", [2, 0, 0, 0])
+
+    first, second = predictor.predict(reports, top_n=2, now=NOW)
+    assert (first.crime_type, first.location_area, first.confidence_level) == ("property", "SRM Tech Park", "high")
+    assert "rising" in first.prediction_text and "99%" in first.prediction_text
+    assert (second.crime_type, second.confidence_level) == ("drug", "low")
+    assert "easing" in second.prediction_text
+    assert "Mondays around 03:00-04:00" in first.prediction_text
+    assert first.valid_until == NOW + timedelta(days=7)
+    assert predictor.summary()["total_reports"] == 12
+    assert predictor.predict([], now=NOW) == []
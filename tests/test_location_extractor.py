@@ -0,0 +1,41 @@
+from location_extractor import CAMPUS_GAZETTEER, LocationExtractor, Place, location_extractor
+
+
+def test_gazetteer_matches_are_longest_first_and_geocoded():
+    text = "Laptop stolen in Paari hostel; suspect seen near Potheri railway station and SRM University"
+    locations = {location.name: location for location in location_extractor.extract(text)}
+
+    assert set(locations) == {"Paari Hostel", "Potheri Railway Station", "SRM KTR Campus"}
+    station = locations["Potheri Railway Station"]
+    assert station.text == "Potheri railway station"
+    assert text[station.start:station.end] == station.text
+    assert (station.latitude, station.longitude) == (12.8237, 80.0376)
+    # "SRM University" is a gazetteer alias, not a generic "X University" mention
+    assert locations["SRM KTR Campus"].kind == "campus"
+
+
+def test_generic_patterns_still_extracted_as_names():
+    names = location_extractor.extract_names("Chain snatching on Anna Road near Anna University, downtown Chennai")
+    assert names == ["Anna Road", "Anna University", "downtown"]
+    assert location_extractor.extract("") == []
+
+
+def test_match_cost_does_not_depend_on_other_places():
+    places = CAMPUS_GAZETTEER + [
+        Place(place_id=f"p{i}", name=f"Block {i} Annex", kind="building", latitude=0, longitude=0)
+        for i in range(2000)
+    ]
+    extractor = LocationExtractor(places)
+    assert extractor.trie.depth == location_extractor.trie.depth
+    assert [p.place_id for p in extractor.places_in("fight at block 1999 annex near Oori block")] == ["p1999", "oori-hostel"]
+
+
+def test_best_place_prefers_the_most_specific_kind():
+    assert location_extractor.best_place("SRM Nagar, Kaari Block, Potheri").name == "Kaari Hostel"
+    assert location_extractor.best_place("12 Anna Street, Chennai") is None
+
+
+def test_other_srm_campuses_are_not_placed_at_ktr():
+    for text in ("Theft reported at SRM Ramapuram", "Chain snatching near SRM Vadapalani", "Fight in SRM Nagar"):
+        assert "srm-ktr" not in [place.place_id for place in location_extractor.places_in(text)]
+    assert location_extractor.best_place("Near SRM Kattankulathur").place_id == "srm-ktr"
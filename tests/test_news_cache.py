@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from news_cache import NewsCacheMiss, NewsResponseCache, news_cache_key
+from news_fetcher import fetch_crime_news
+
+def test_key_normalizes_whitespace_and_ignores_dates_when_asked():
+    params = {"q": "crime  AND campus", "from": "2024-03-01", "page": 1}
+    assert news_cache_key("everything", params) == news_cache_key("/everything", {"q": "crime AND campus", "from": "2024-03-01", "page": "1"})
+    assert news_cache_key("everything", params) != news_cache_key("everything", {**params, "from": "2024-03-02"})
+    assert news_cache_key("everything", params, ignore_dates=True) == news_cache_key(
+        "everything", {**params, "from": "2024-03-02"}, ignore_dates=True
+    )
+
+
+def test_live_mode_serves_repeat_refreshes_from_cache(tmp_path, newsapi):
+    cache = NewsResponseCache(mode="live", directory=str(tmp_path))
+    first = asyncio.run(fetch_crime_news("key", cache=cache))
+    network_calls = len(newsapi)
+    second = asyncio.run(fetch_crime_news("key", cache=cache))
+
+    assert network_calls == 5
+    assert len(newsapi) == network_calls
+    assert [a.url for a in first] == [a.url for a in second]
+
+
+def test_replay_runs_pipeline_offline_from_recorded_fixtures(tmp_path, newsapi):
+    recorded = asyncio.run(fetch_crime_news("key", cache=NewsResponseCache(mode="record", directory=str(tmp_path))))
+    newsapi.clear()
+
+    replay = NewsResponseCache(mode="replay", directory=str(tmp_path))
+    replayed = asyncio.run(fetch_crime_news("key", cache=replay))
+
+    assert newsapi == []
+    assert replayed == recorded
+    assert replay.stats()["hits"] == 5
+
+
+def test_replay_raises_for_unrecorded_requests(tmp_path):
+    replay = NewsResponseCache(mode="replay", directory=str(tmp_path))
+    with pytest.raises(NewsCacheMiss):
+        asyncio.run(replay.get("everything", {"q": "never recorded"}))
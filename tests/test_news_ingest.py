@@ -0,0 +1,100 @@
+import asyncio
+import random
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import news_fetcher
+from news_fetcher import fetch_crime_news
+from news_ingest import NewsIngestState
+
+
+def test_second_cycle_requests_only_articles_after_the_watermark(newsapi, news_articles):
+    ingest = NewsIngestState()
+    first = asyncio.run(fetch_crime_news("key", ingest=ingest))
+    asyncio.run(ingest.commit())
+
+    assert {a.url for a in first} == {article["url"] for article in news_articles}
+    newest = max(datetime.fromisoformat(a["publishedAt"].replace("Z", "+00:00")) for a in news_articles)
+    assert set(ingest.watermarks.values()) == {newest}
+
+    newsapi.clear()
+    second = asyncio.run(fetch_crime_news("key", ingest=ingest))
+
+    assert second == []
+    assert all(request.url.params["from"] == newest.strftime('%Y-%m-%dT%H:%M:%S') for request in newsapi)
+
+
+def test_stored_urls_are_skipped_before_scoring(newsapi, news_articles):
+    ingest = NewsIngestState()
+    ingest.seen_urls.add(news_articles[0]["url"])
+
+    articles = asyncio.run(fetch_crime_news("key", ingest=ingest))
+
+    assert [a.url for a in articles] == [news_articles[1]["url"]]
+
+
+def test_watermark_is_clamped_to_the_lookback_window():
+    ingest = NewsIngestState(lookback=timedelta(days=7))
+    ingest.watermarks["q"] = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    floor = (datetime.now(timezone.utc) - timedelta(days=7)).strftime('%Y-%m-%dT00:00:00')
+    assert ingest.from_date("q") == floor
+    # Without a watermark the window starts at midnight, so cache keys repeat within a day
+    assert ingest.from_date("other") == floor
+
+
+def test_uncommitted_watermarks_do_not_persist(newsapi):
+    ingest = NewsIngestState()
+    asyncio.run(fetch_crime_news("key", ingest=ingest))
+    assert ingest.watermarks == {}
+
+
+
+def _many_articles(count):
+    now = datetime.now(timezone.utc)
+    rng = random.Random(5)
+    places = ["hostel", "library", "canteen", "gate", "station", "market", "parking", "stadium", "bus stop", "lab"]
+    words = ["student", "phone", "bike", "laptop", "wallet", "night", "morning", "guard", "camera", "complaint",
+             "witness", "van", "bag", "jewellery", "cash", "shop", "road", "lane", "block", "festival"]
+    return [{
+        "title": f"Theft reported near campus {rng.choice(places)}: " + " ".join(rng.sample(words, 6)),
+        "description": "Police arrest suspect in robbery case near the university. " + " ".join(rng.sample(words, 8)),
+        "content": None,
+        "url": f"https://example.com/theft-{i}",
+        "urlToImage": None,
+        "publishedAt": (now - timedelta(minutes=10 * i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "source": {"id": None, "name": "Example News"},
+        "author": None,
+    } for i in range(count)]
+
+
+MANY_ARTICLES = _many_articles(150)
+
+
+def _cycle(ingest):
+    articles = asyncio.run(fetch_crime_news("key", max_articles=1000, ingest=ingest))
+    asyncio.run(ingest.commit())
+    return articles
+
+
+@pytest.mark.parametrize("news_articles", [MANY_ARTICLES], ids=["150 articles"])
+def test_a_window_larger_than_a_page_is_paged_down_to_the_watermark(newsapi, news_articles, monkeypatch):
+    monkeypatch.setattr(news_fetcher, "NEWSAPI_MAX_RESULTS", 1000)
+    ingest = NewsIngestState()
+
+    assert len(_cycle(ingest)) == 150
+    assert {request.url.params["page"] for request in newsapi} == {"1", "2"}
+    newest = datetime.fromisoformat(MANY_ARTICLES[0]["publishedAt"].replace("Z", "+00:00"))
+    assert set(ingest.watermarks.values()) == {newest}
+
+
+@pytest.mark.parametrize("news_articles", [MANY_ARTICLES], ids=["150 articles"])
+def test_results_past_the_newsapi_cap_do_not_stall_the_watermark(newsapi, news_articles):
+    ingest = NewsIngestState()
+
+    assert len(_cycle(ingest)) == 100
+    assert {request.url.params["page"] for request in newsapi} == {"1"}
+    assert len(ingest.watermarks) == len(news_fetcher.CRIME_QUERY_TERMS)
+
+    newsapi.clear()
+    assert _cycle(ingest) == []
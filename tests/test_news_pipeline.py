@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from batch_scoring import BatchScorer
+from news_pipeline import plan_slices, run_backfill
+
+QUERIES = ["crime AND campus", "theft AND campus"]
+# The shared fixture's articles are 2h and 30h old, so they land in different day windows
+END = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+class MemoryCheckpoints:
+    backfill_id = "test"
+
+    def __init__(self):
+        self.done = set()
+        self.status = None
+
+    async def start(self, params):
+        self.status = "running"
+        return set(self.done)
+
+    async def mark_done(self, slice_key, stored):
+        self.done.add(slice_key)
+
+    async def finish(self, status):
+        self.status = status
+
+
+def test_plan_slices_covers_range_per_query_newest_first():
+    slices = plan_slices(QUERIES, END - timedelta(days=3), END)
+    assert len(slices) == 6
+    assert slices[0].to_date == END
+    assert slices[-1].from_date == END - timedelta(days=3)
+
+
+def test_backfill_stores_every_article_once_and_checkpoints_slices(newsapi, news_articles):
+    stored = []
+
+    async def store(batch):
+        stored.extend(batch)
+
+    checkpoints = MemoryCheckpoints()
+    stats = asyncio.run(run_backfill(
+        "key", QUERIES, 3, checkpoints, store, end=END, requests_per_second=0
+    ))
+
+    assert sorted(a.url for a in stored) == sorted(a["url"] for a in news_articles)
+    assert len(checkpoints.done) == stats["slices_total"] == 6
+    assert checkpoints.status == "completed"
+
+
+def test_backfill_resumes_from_checkpoints_after_a_crash(newsapi):
+    checkpoints = MemoryCheckpoints()
+    calls = 0
+
+    async def crashing_store(batch):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_backfill(
+            "key", QUERIES, 3, checkpoints, crashing_store, end=END, requests_per_second=0, concurrency=1
+        ))
+    assert checkpoints.status == "interrupted"
+    assert len(checkpoints.done) == 2
+
+    async def store(batch):
+        pass
+
+    newsapi.clear()
+    stats = asyncio.run(run_backfill(
+        "key", QUERIES, 3, checkpoints, store, end=END, requests_per_second=0
+    ))
+    assert stats["slices_skipped"] == 2
+    assert len(newsapi) == 4
+    assert len(checkpoints.done) == 6
+
+
+class RecordingScorer(BatchScorer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    async def analyze_async(self, articles, threshold=2.0, with_locations=True):
+        articles = list(articles)
+        self.batches.append((len(articles), self._parallel(articles)))
+        return await super().analyze_async(articles, threshold, with_locations)
+
+
+def test_backfill_scores_pages_together_on_the_process_pool(newsapi, news_articles):
+    stored = []
+
+    async def store(batch):
+        stored.extend(batch)
+
+    # Every slice page holds at most one new article; only batching across pages reaches the threshold
+    scorer = RecordingScorer(workers=2, parallel_threshold=len(news_articles))
+    try:
+        asyncio.run(run_backfill(
+            "key", QUERIES, 3, MemoryCheckpoints(), store, end=END, requests_per_second=0,
+            scorer=scorer, score_linger=60
+        ))
+    finally:
+        scorer.close()
+
+    assert scorer.batches == [(len(news_articles), True)]
+    assert len(stored) == len(news_articles)
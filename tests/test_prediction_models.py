@@ -0,0 +1,33 @@
+from datetime import datetime, timezone, timedelta
+
+from prediction_models import TrendState
+
+
+def _entry(url, days_old):
+    return {
+        "url": url,
+        "category": "theft",
+        "crime_score": 2.0,
+        "published_at": datetime.now(timezone.utc) - timedelta(days=days_old),
+        "source": "The Hindu",
+    }
+
+
+def test_trend_state_stores_articles_without_urls_as_field_names():
+    state = TrendState(articles=[_entry("https://news.example.com/a.html?id=1", 1)])
+    stored = state.dict()
+    assert stored["articles"][0]["url"] == "https://news.example.com/a.html?id=1"
+    assert TrendState(**stored).urls() == {"https://news.example.com/a.html?id=1"}
+
+
+def test_trend_state_reads_url_keyed_documents_saved_before():
+    entry = _entry("https://news.example.com/b.html", 2)
+    url = entry.pop("url")
+    state = TrendState(articles={url: entry})
+    assert state.articles == [{"url": url, **entry}]
+
+
+def test_prune_keeps_the_newest_articles_in_the_window():
+    state = TrendState(articles=[_entry("old", 10), _entry("older", 3), _entry("new", 1), _entry("newer", 0)])
+    state.prune(window_days=7, max_articles=2)
+    assert [entry["url"] for entry in state.articles] == ["newer", "new"]
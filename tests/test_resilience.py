@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import resilience
+from resilience import Bulkhead, BulkheadFull, CircuitBreaker, CircuitOpenError, Dependency
+
+
+class Overloaded(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.allow()
+        breaker.record_failure(RuntimeError("HTTP 503"))
+
+
+def test_breaker_opens_probes_half_open_and_closes(clock):
+    breaker = CircuitBreaker("api", failure_threshold=3, recovery_timeout=30)
+    _trip(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    clock[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.allow()  # the one probe
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.consecutive_failures == 0
+
+
+def test_failed_probe_reopens_for_a_full_recovery_timeout(clock):
+    breaker = CircuitBreaker("api", failure_threshold=3, recovery_timeout=30)
+    _trip(breaker)
+    clock[0] += 30
+    breaker.allow()
+    breaker.record_failure(RuntimeError("still down"))
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 29
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.status()["last_error"] == "still down"
+
+
+def test_late_success_from_before_the_trip_does_not_close_the_breaker(clock):
+    breaker = CircuitBreaker("api", failure_threshold=3, recovery_timeout=30)
+    breaker.allow()  # slow call starts while closed
+    _trip(breaker)
+    breaker.record_success()  # ...and finishes after the breaker opened
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    breaker.record_success()  # no probe outstanding yet
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_ignored_calls_give_the_half_open_probe_back(clock):
+    dependency = Dependency("llm", CircuitBreaker("llm", failure_threshold=1, recovery_timeout=30, ignore=(Overloaded,)))
+    _trip(dependency.breaker)
+    clock[0] += 30
+
+    async def shed():
+        async with dependency.guard():
+            raise Overloaded()
+
+    with pytest.raises(Overloaded):
+        asyncio.run(shed())
+    assert dependency.breaker.state == CircuitBreaker.HALF_OPEN
+    dependency.breaker.allow()  # the probe is available again
+
+
+def test_bulkhead_rejects_calls_beyond_its_limit():
+    bulkhead = Bulkhead("news", max_concurrent=1)
+    dependency = Dependency("news", CircuitBreaker("news", failure_threshold=1), bulkhead)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            async with dependency.guard():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(BulkheadFull):
+            async with dependency.guard():
+                pass
+        release.set()
+        await holder
+
+    asyncio.run(run())
+    assert bulkhead.rejected == 1 and bulkhead.in_flight == 0
+    # A full bulkhead is not a dependency failure
+    assert dependency.breaker.state == CircuitBreaker.CLOSED
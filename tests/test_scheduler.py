@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from scheduler import LeaseLost, MongoLease
+from tests.fake_mongo import FakeCollection
+
+
+def test_lease_excludes_other_holders_until_released_or_expired():
+    leases = FakeCollection()
+    first = MongoLease(leases, "news_backfill_20260301_14d", ttl=timedelta(minutes=2), holder="worker-a")
+    second = MongoLease(leases, "news_backfill_20260301_14d", ttl=timedelta(minutes=2), holder="worker-b")
+
+    assert asyncio.run(first.acquire())
+    assert not asyncio.run(second.acquire())
+    assert asyncio.run(first.acquire())  # renewal by the holder
+
+    leases.docs[0]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    assert asyncio.run(second.acquire())
+    assert not asyncio.run(first.acquire())
+
+
+def test_hold_renews_while_running_and_releases_after():
+    leases = FakeCollection()
+    lease = MongoLease(leases, "backfill", ttl=timedelta(seconds=0.06), holder="worker-a")
+    other = MongoLease(leases, "backfill", ttl=timedelta(seconds=0.06), holder="worker-b")
+
+    async def run():
+        assert await lease.acquire()
+        async with lease.hold():
+            await asyncio.sleep(0.15)  # longer than the ttl
+            assert not await other.acquire()
+        return await other.acquire()
+
+    assert asyncio.run(run())
+    assert leases.docs[0]["holder"] == "worker-b"
+
+
+def test_hold_cancels_the_body_when_the_lease_is_taken_over():
+    leases = FakeCollection()
+    lease = MongoLease(leases, "backfill", ttl=timedelta(seconds=0.06), holder="worker-a")
+    finished = []
+
+    async def run():
+        assert await lease.acquire()
+        async with lease.hold():
+            # Another worker takes over, e.g. after this one stalled past the ttl
+            leases.docs[0].update(holder="worker-b", expires_at=datetime.now(timezone.utc) + timedelta(minutes=1))
+            await asyncio.sleep(1)
+            finished.append(True)
+
+    with pytest.raises(LeaseLost):
+        asyncio.run(run())
+    assert finished == []
+    assert leases.docs[0]["holder"] == "worker-b"
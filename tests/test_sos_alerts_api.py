@@ -0,0 +1,60 @@
+import asyncio
+import collections
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+# server wires the emergentintegrations client in at import time
+pytest.importorskip("emergentintegrations")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "echo_safety_test")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+from tests.fake_mongo import FakeCollection  # noqa: E402
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = collections.defaultdict(FakeCollection)
+
+    def __getattr__(self, name):
+        return self.collections[name]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "SOS_RESPONDER_USER_IDS", {"guard"})
+    now = datetime.now(timezone.utc)
+    for user_id in ("priya", "ravi", "guard"):
+        asyncio.run(database.users.insert_one({
+            "id": user_id, "name": user_id, "email": f"{user_id}@srmist.edu.in", "phone": "+911111111111",
+            "srm_roll_number": "RA0000000000000", "password_hash": "x", "created_at": now
+        }))
+    for alert_id, user_id in (("alert-priya", "priya"), ("alert-ravi", "ravi")):
+        asyncio.run(database.sos_alerts.insert_one({
+            "id": alert_id, "user_id": user_id, "status": "active", "created_at": now,
+            "location": {"lat": 12.8231, "lng": 80.0442, "address": "Tech Park"},
+            "trusted_contacts_notified": ["+912222222222"]
+        }))
+    return TestClient(server.app)
+
+
+def _listed(client, user_id):
+    token = server.create_access_token({"sub": user_id})
+    response = client.get("/api/sos/alerts", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    return sorted(alert["id"] for alert in response.json())
+
+
+def test_users_list_only_their_own_alerts(client):
+    assert _listed(client, "priya") == ["alert-priya"]
+    assert _listed(client, "ravi") == ["alert-ravi"]
+
+
+def test_responders_list_every_alert(client):
+    assert _listed(client, "guard") == ["alert-priya", "alert-ravi"]
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+from sos_dispatch import (
+    DeliveryError, DispatchJob, DispatchQueue, DispatchWorkers, PRIORITY_SOS, StubDeliveryProvider, sos_dispatch_jobs
+)
+from tests.fake_mongo import FakeCollection
+
+ALERT = {
+    "id": "alert-1",
+    "emergency_type": "security",
+    "location": {"lat": 12.8249, "lng": 80.0468, "address": "Paari Hostel"},
+}
+CONTACTS = [{"name": "Asha", "phone": "+911111111111"}, {"name": "Ravi", "phone": "+912222222222"}]
+
+
+class FlakyProvider(StubDeliveryProvider):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = list(failures)
+
+    async def send(self, job):
+        if self.failures:
+            raise self.failures.pop(0)
+        return await super().send(job)
+
+
+def _setup(provider):
+    jobs, alerts = FakeCollection(), FakeCollection()
+    asyncio.run(alerts.insert_one({"id": "alert-1", "trusted_contacts_notified": [], "dispatch_receipts": []}))
+    queue = DispatchQueue(jobs)
+    workers = DispatchWorkers(queue, provider, receipts=alerts, base_backoff=0.0)
+    return jobs, alerts, queue, workers
+
+
+def _drain(workers):
+    async def run():
+        while await workers.run_once():
+            pass
+    asyncio.run(run())
+
+
+def test_enqueue_is_idempotent_and_receipts_reach_the_alert():
+    provider = StubDeliveryProvider()
+    jobs, alerts, queue, workers = _setup(provider)
+
+    assert asyncio.run(queue.enqueue(sos_dispatch_jobs(ALERT, "Priya", CONTACTS))) == 2
+    assert asyncio.run(queue.enqueue(sos_dispatch_jobs(ALERT, "Priya", CONTACTS))) == 0
+    _drain(workers)
+
+    assert sorted(job.recipient for job in provider.sent) == ["+911111111111", "+912222222222"]
+    assert "Paari Hostel" in provider.sent[0].message
+    alert = alerts.docs[0]
+    assert sorted(alert["trusted_contacts_notified"]) == ["+911111111111", "+912222222222"]
+    assert [r["status"] for r in alert["dispatch_receipts"]] == ["delivered", "delivered"]
+
+
+def test_sos_jobs_are_claimed_before_older_lower_priority_jobs():
+    provider = StubDeliveryProvider()
+    jobs, alerts, queue, workers = _setup(provider)
+    earlier = datetime.now(timezone.utc) - timedelta(minutes=5)
+    routine = DispatchJob(id="digest", alert_id="none", channel="sms", recipient="+913333333333", message="digest", available_at=earlier)
+
+    asyncio.run(queue.enqueue([routine]))
+    asyncio.run(queue.enqueue(sos_dispatch_jobs(ALERT, "Priya", CONTACTS[:1])))
+    _drain(workers)
+
+    assert [job.priority for job in provider.sent] == [PRIORITY_SOS, routine.priority]
+
+
+def test_transient_failures_retry_and_permanent_ones_fail_with_a_receipt():
+    provider = FlakyProvider([DeliveryError("HTTP 503"), DeliveryError("HTTP 400: invalid number", retryable=False)])
+    jobs, alerts, queue, workers = _setup(provider)
+    asyncio.run(queue.enqueue(sos_dispatch_jobs(ALERT, "Priya", CONTACTS[:1])))
+
+    asyncio.run(workers.run_once())  # 503, requeued with backoff
+    assert jobs.docs[0]["status"] == "queued" and jobs.docs[0]["attempts"] == 1
+    asyncio.run(workers.run_once())  # 400, not worth retrying
+
+    assert jobs.docs[0]["status"] == "failed"
+    [receipt] = alerts.docs[0]["dispatch_receipts"]
+    assert (receipt["status"], receipt["attempts"]) == ("failed", 2)
+    assert alerts.docs[0]["trusted_contacts_notified"] == []
+
+
+def test_jobs_with_an_expired_lease_are_claimed_again():
+    jobs, alerts, queue, workers = _setup(StubDeliveryProvider())
+    asyncio.run(queue.enqueue(sos_dispatch_jobs(ALERT, "Priya", CONTACTS[:1])))
+    claimed = asyncio.run(queue.claim("crashed-worker"))
+    assert asyncio.run(queue.claim("other")) is None
+
+    jobs.docs[0]["lease_until"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    reclaimed = asyncio.run(queue.claim("other"))
+    assert reclaimed.id == claimed.id and reclaimed.attempts == 2
+
+
+def test_a_worker_whose_lease_expired_cannot_overwrite_the_new_claim():
+    jobs, alerts, queue, workers = _setup(StubDeliveryProvider())
+    asyncio.run(queue.enqueue(sos_dispatch_jobs(ALERT, "Priya", CONTACTS[:1])))
+    stale = asyncio.run(queue.claim("slow-worker"))
+    jobs.docs[0]["lease_until"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    current = asyncio.run(queue.claim("other"))
+
+    assert asyncio.run(queue.fail(stale, "timed out")) is False
+    assert asyncio.run(queue.complete(stale, "SM-stale")) is False
+    assert (jobs.docs[0]["status"], jobs.docs[0]["worker"]) == ("sending", "other")
+
+    assert asyncio.run(queue.complete(current, "SM-current")) is True
+    assert (jobs.docs[0]["status"], jobs.docs[0]["provider_message_id"]) == ("delivered", "SM-current")
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+from sos_escalation import EscalationPolicy, SOSEscalator
+from tests.fake_mongo import FakeCollection
+from timer_wheel import TimerWheel
+
+START = datetime(2026, 3, 1, 21, 0, tzinfo=timezone.utc)
+POLICY = EscalationPolicy(escalate_after=120, escalate_every=300, max_level=2, expire_after=3600)
+
+
+def _escalator(*alerts):
+    clock = [START.timestamp()]
+    collection = FakeCollection()
+    escalated, resolved = [], []
+
+    async def on_escalate(alert, level):
+        escalated.append((alert["id"], level))
+
+    async def on_resolve(alert):
+        resolved.append((alert["id"], alert["resolution"]))
+
+    for alert in alerts:
+        asyncio.run(collection.insert_one(alert))
+    escalator = SOSEscalator(collection, POLICY, on_escalate, on_resolve, wheel=TimerWheel(clock=lambda: clock[0]))
+
+    def run_at(seconds):
+        clock[0] = START.timestamp() + seconds
+        return asyncio.run(escalator.run_due())
+    return escalator, collection, escalated, resolved, run_at
+
+
+def _alert(alert_id, **fields):
+    return {"id": alert_id, "user_id": "user-1", "status": "active", "created_at": START, **fields}
+
+
+def test_unacknowledged_alerts_escalate_until_the_limit_then_expire():
+    escalator, alerts, escalated, resolved, run_at = _escalator(_alert("a1"))
+    assert asyncio.run(escalator.rebuild()) == 1
+
+    run_at(119)
+    assert escalated == []
+    run_at(121)
+    assert escalated == [("a1", 1)]
+    # Follow-ups are scheduled from when the escalation ran
+    assert alerts.docs[0]["escalate_at"] == START + timedelta(seconds=121 + 300)
+    run_at(422)
+    assert escalated == [("a1", 1), ("a1", 2)]
+    assert alerts.docs[0]["escalate_at"] is None
+
+    run_at(3601)
+    assert resolved == [("a1", "expired")]
+    assert alerts.docs[0]["status"] == "resolved" and len(escalator.wheel) == 0
+
+
+def test_acknowledging_stops_escalation_and_resolving_cancels_expiry():
+    escalator, alerts, escalated, resolved, run_at = _escalator(_alert("a1"), _alert("a2"))
+    asyncio.run(escalator.rebuild())
+
+    assert asyncio.run(escalator.acknowledge("a1", "responder"))["acknowledged_by"] == "responder"
+    assert asyncio.run(escalator.acknowledge("a1", "someone-else")) is None
+    run_at(121)
+    assert escalated == [("a2", 1)]
+
+    asyncio.run(escalator.resolve("a1", "responder"))
+    assert resolved == [("a1", "resolved")]
+    assert escalator.metrics()["pending_timers"] == 2  # a2: next escalation and expiry
+
+
+def test_rebuild_fires_overdue_timers_of_alerts_stored_before_a_restart():
+    stored = _alert("old", created_at=START - timedelta(hours=2))
+    acknowledged = _alert("seen", acknowledged_at=START, escalation_level=0)
+    escalator, alerts, escalated, resolved, run_at = _escalator(stored, acknowledged)
+
+    assert asyncio.run(escalator.rebuild()) == 2
+    run_at(1)
+    assert escalated == [] and resolved == [("old", "expired")]
+    assert ("seen", "escalate") not in escalator.wheel
+
+
+def test_a_failed_escalation_notice_is_retried_at_the_same_level():
+    escalator, alerts, escalated, resolved, run_at = _escalator(_alert("a1"))
+    asyncio.run(escalator.rebuild())
+    notify = escalator.on_escalate
+
+    async def unavailable(alert, level):
+        raise ConnectionError("dispatch queue down")
+    escalator.on_escalate = unavailable
+
+    run_at(121)
+    assert alerts.docs[0].get("escalation_level") is None and "escalations" not in alerts.docs[0]
+    assert escalator.stats["escalated"] == 0
+
+    escalator.on_escalate = notify
+    run_at(121 + 31)  # RETRY_DELAY later
+    assert escalated == [("a1", 1)]
+    assert alerts.docs[0]["escalation_level"] == 1
+    assert alerts.docs[0]["escalate_at"] == START + timedelta(seconds=152 + 300)
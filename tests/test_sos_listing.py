@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from sos_listing import BBox, alert_filter, decode_cursor, ensure_alert_indexes, nearest_page, recent_page
+from tests.fake_mongo import FakeCollection
+
+START = datetime(2026, 3, 1, 21, 0, tzinfo=timezone.utc)
+
+
+def _alerts():
+    collection = FakeCollection()
+    for i in range(12):
+        asyncio.run(collection.insert_one({
+            "id": f"alert-{i:02d}",
+            "status": "resolved" if i % 3 == 0 else "active",
+            # Pairs share a timestamp so the id tie-breaker matters
+            "created_at": START + timedelta(minutes=i // 2),
+            "location": {"lat": 12.82 + i * 0.001, "lng": 80.04}
+        }))
+    return collection
+
+
+def _pages(fetch):
+    ids, cursor = [], None
+    while True:
+        page = asyncio.run(fetch(cursor))
+        ids.extend(alert["id"] for alert in page.alerts)
+        if not page.next_cursor:
+            return ids
+        cursor = page.next_cursor
+
+
+def test_keyset_pages_cover_each_active_alert_once_newest_first():
+    collection = _alerts()
+    query = alert_filter("active")
+    ids = _pages(lambda cursor: recent_page(collection, query, 3, cursor))
+
+    expected = [f"alert-{i:02d}" for i in reversed(range(12)) if i % 3]
+    assert ids == expected
+
+
+def test_filters_combine_time_and_bbox():
+    collection = _alerts()
+    query = alert_filter(
+        None, since=START + timedelta(minutes=1), until=START + timedelta(minutes=5),
+        bbox=BBox(min_lat=12.823, min_lng=80.0, max_lat=12.826, max_lng=80.1)
+    )
+    page = asyncio.run(recent_page(collection, query, 50))
+    assert [alert["id"] for alert in page.alerts] == ["alert-06", "alert-05", "alert-04", "alert-03"]
+    assert page.next_cursor is None
+
+
+def test_nearest_pages_by_distance_from_the_responder():
+    collection = _alerts()
+    origin = (12.8256, 80.04)  # nearest active: 05, then 07 (06 is resolved)
+    ids = _pages(lambda cursor: nearest_page(collection, alert_filter("active"), origin, 2, cursor))
+
+    assert ids[:2] == ["alert-05", "alert-07"]
+    assert sorted(ids) == sorted(f"alert-{i:02d}" for i in range(12) if i % 3)
+
+
+def test_active_index_is_partial_and_bad_cursors_are_rejected():
+    collection = FakeCollection()
+    asyncio.run(ensure_alert_indexes(collection))
+    assert collection.indexes[0][1]["partialFilterExpression"] == {"status": "active"}
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+
+def test_nearest_rejects_a_cursor_from_the_recent_ordering():
+    collection = _alerts()
+    query = alert_filter("active")
+    recent_cursor = asyncio.run(recent_page(collection, query, 3)).next_cursor
+    with pytest.raises(ValueError):
+        asyncio.run(nearest_page(collection, query, (12.8256, 80.04), 2, recent_cursor))
+
+
+def test_user_filter_and_bbox_follow_the_alert_owner_and_latest_position():
+    collection = _alerts()
+    asyncio.run(collection.update_many({"id": {"$in": ["alert-01", "alert-02"]}}, {"$set": {"user_id": "priya"}}))
+    # alert-02 was raised inside the box but has since moved out of it; alert-04 moved in
+    asyncio.run(collection.update_one({"id": "alert-02"}, {"$set": {"last_location": {"lat": 13.0, "lng": 80.04}}}))
+    asyncio.run(collection.update_one({"id": "alert-04"}, {"$set": {"last_location": {"lat": 12.8215, "lng": 80.04}}}))
+    bbox = BBox(min_lat=12.8205, min_lng=80.0, max_lat=12.8225, max_lng=80.1)
+
+    own = asyncio.run(recent_page(collection, alert_filter("active", user_id="priya"), 50))
+    assert [alert["id"] for alert in own.alerts] == ["alert-02", "alert-01"]
+    boxed = asyncio.run(recent_page(collection, alert_filter("active", bbox=bbox), 50))
+    assert [alert["id"] for alert in boxed.alerts] == ["alert-04", "alert-01"]
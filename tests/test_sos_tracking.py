@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+from sos_tracking import LocationPing, SOSTracker
+from tests.fake_mongo import FakeCollection
+
+START = datetime(2026, 3, 1, 21, 0, tzinfo=timezone.utc)
+
+
+def _tracker(**options):
+    locations, alerts = FakeCollection(), FakeCollection()
+    for alert_id in ("alert-1", "alert-2", "alert-3"):
+        asyncio.run(alerts.insert_one({"id": alert_id, "status": "active"}))
+    tracker = SOSTracker(locations, alerts, **options)
+    for alert_id in ("alert-1", "alert-2", "alert-3"):
+        tracker.open_session(alert_id, "user-1")
+    return tracker, locations, alerts
+
+
+def _ping(seconds, lat=12.8249, lng=80.0468):
+    return LocationPing(lat=lat, lng=lng, recorded_at=START + timedelta(seconds=seconds))
+
+
+def test_pings_update_the_live_position_but_only_a_downsampled_track_is_stored():
+    tracker, locations, alerts = _tracker()
+
+    kept = [tracker.record("alert-1", _ping(seconds)) for seconds in (0, 3, 6, 9)]
+    assert kept == [True, False, False, False]
+    assert tracker.live["alert-1"].at == START + timedelta(seconds=9)
+
+    assert tracker.record("alert-1", _ping(12, lat=12.8251))  # ~22 m away
+    assert tracker.record("alert-1", _ping(27, lat=12.8251))  # 15 s later
+    assert not tracker.record("alert-1", _ping(20))  # out of order
+    assert tracker.live["alert-1"].pings == 7
+
+    assert asyncio.run(tracker.flush()) == 3
+    assert [p["ts"] for p in asyncio.run(tracker.track("alert-1"))] == [START, START + timedelta(seconds=12), START + timedelta(seconds=27)]
+    assert alerts.docs[0]["last_location"]["lat"] == 12.8251
+
+
+def test_a_flush_is_one_insert_and_one_bulk_update_across_alerts():
+    tracker, locations, alerts = _tracker()
+    for seconds in range(0, 60, 15):
+        for alert_id in ("alert-1", "alert-2", "alert-3"):
+            tracker.record(alert_id, _ping(seconds))
+
+    assert asyncio.run(tracker.flush()) == 12
+    assert (locations.insert_manys, alerts.bulk_writes) == (1, 1)
+    assert all(alert["last_location_at"] == START + timedelta(seconds=45) for alert in alerts.docs)
+    assert asyncio.run(tracker.flush()) == 0
+    assert (locations.insert_manys, alerts.bulk_writes) == (1, 1)
+
+
+def test_closing_a_session_stores_the_final_position():
+    tracker, locations, alerts = _tracker()
+    tracker.record("alert-1", _ping(0))
+    tracker.record("alert-1", _ping(5))
+    tracker.close_session("alert-1")
+    asyncio.run(tracker.flush())
+
+    assert [p["ts"] for p in locations.docs] == [START, START + timedelta(seconds=5)]
+    assert "alert-1" not in tracker.live and "alert-1" not in tracker.sessions
+
+
+def test_failed_writes_are_retried_on_the_next_flush():
+    tracker, locations, alerts = _tracker(max_pending=3)
+
+    async def unavailable(docs, ordered=True):
+        raise ConnectionError("primary stepped down")
+    insert_many, locations.insert_many = locations.insert_many, unavailable
+
+    for seconds in range(0, 75, 15):
+        tracker.record("alert-1", _ping(seconds))
+    assert asyncio.run(tracker.flush()) == 0
+    assert tracker.metrics()["pending"] == 3 and tracker.stats["dropped"] == 2
+
+    locations.insert_many = insert_many
+    assert asyncio.run(tracker.flush()) == 3
+    assert [p["ts"] for p in locations.docs] == [START + timedelta(seconds=s) for s in (30, 45, 60)]
+
+
+def test_future_device_times_are_clamped_to_now():
+    tracker, locations, alerts = _tracker()
+    before = datetime.now(timezone.utc)
+    tracker.record("alert-1", LocationPing(lat=12.8249, lng=80.0468, recorded_at=before + timedelta(days=1)))
+    assert before <= tracker.live["alert-1"].at <= datetime.now(timezone.utc)
+
+    tracker.record("alert-1", LocationPing(lat=12.8251, lng=80.0468))
+    assert tracker.live["alert-1"].lat == 12.8251
+
+
+def test_pings_after_the_session_closes_are_ignored():
+    tracker, locations, alerts = _tracker()
+    tracker.record("alert-1", _ping(0))
+    tracker.close_session("alert-1")
+
+    assert not tracker.record("alert-1", _ping(5))
+    assert "alert-1" not in tracker.live
+    assert tracker.metrics()["live"] == 0
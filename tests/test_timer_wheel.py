@@ -0,0 +1,40 @@
+import math
+import random
+
+from timer_wheel import TimerWheel
+
+
+def test_timers_fire_on_their_tick_across_levels():
+    now = [1000.0]
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3, clock=lambda: now[0])
+    rng = random.Random(3)
+    pending = {}
+    for step in range(4000):
+        if rng.random() < 0.4:
+            key = rng.randrange(300)
+            deadline = now[0] + rng.choice([rng.uniform(-5, 10), rng.uniform(0, 600), rng.uniform(0, 3000)])
+            wheel.schedule(key, deadline)
+            pending[key] = max(math.floor(deadline), math.floor(now[0]) + 1)
+        elif pending and rng.random() < 0.2:
+            key = rng.choice(list(pending))
+            assert wheel.cancel(key)
+            del pending[key]
+        else:
+            now[0] += rng.choice([0.3, 1, 5, 40])
+            for timer in wheel.advance():
+                assert pending.pop(timer.key) <= now[0]
+            assert all(tick > math.floor(now[0]) for tick in pending.values())
+        assert len(wheel) == len(pending)
+
+
+def test_rescheduling_replaces_and_cancel_removes():
+    wheel = TimerWheel(clock=lambda: 0.0)
+    wheel.schedule("a", 100.0, "first")
+    wheel.schedule("a", 5.0, "second")
+    wheel.schedule("b", 7.0)
+    assert wheel.cancel("b") and not wheel.cancel("b")
+
+    assert wheel.advance(4.0) == []
+    [timer] = wheel.advance(200.0)
+    assert (timer.key, timer.payload) == ("a", "second")
+    assert len(wheel) == 0
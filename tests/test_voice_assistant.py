@@ -0,0 +1,44 @@
+import pytest
+
+from intent_classifier import classify_intent
+from voice_assistant import VoiceResponseCache, fast_path_response
+
+
+def _fast_path(message):
+    return fast_path_response(message, classify_intent(message), "english", "session-1")
+
+
+@pytest.mark.parametrize("message", [
+    "how do I sign up",
+    "forgot password",
+    "show me emergency contacts",
+    "show me the map",
+])
+def test_clear_app_questions_are_answered_from_templates(message):
+    assert _fast_path(message) is not None
+
+
+@pytest.mark.parametrize("message", [
+    "someone is hitting me near the hostel area",
+    "where are you, i need help now",
+    "a man grabbed me at this location",
+    "my accountant stole money",
+    # A specific fast-path phrase does not outweigh a distress word
+    "help, where is the sos button",
+])
+def test_distress_and_weak_matches_go_to_the_llm(message):
+    assert _fast_path(message) is None
+
+
+def test_a_single_generic_word_is_not_enough_for_a_template():
+    result = classify_intent("which area is this")
+    assert result.intent == "map_help" and result.is_unambiguous
+    assert _fast_path("which area is this") is None
+
+
+def test_distress_messages_are_never_answered_from_the_cache():
+    cache = VoiceResponseCache()
+    cache.set("english", "map_help", "where are you, i need help now", "Open the crime map.")
+    assert cache.get("english", "map_help", "where are you, i need help now") is None
+    cache.set("english", "map_help", "show me the map", "Open the crime map.")
+    assert cache.get("english", "map_help", "show me the map") == "Open the crime map."